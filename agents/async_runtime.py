@@ -0,0 +1,42 @@
+# agents/async_runtime.py
+import asyncio
+import threading
+
+_loop = None
+_thread = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """Returns the process-wide event loop, running in a single daemon thread.
+
+    Every conversation's async work is scheduled here, so the async HTTP and
+    database pools live on one loop no matter how many sessions exist.
+    """
+    global _loop, _thread
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="agents-event-loop", daemon=True)
+            _thread.start()
+        return _loop
+
+
+def run_sync(coro, timeout=None):
+    """Runs a coroutine on the shared loop and blocks the calling thread for its result."""
+    loop = get_loop()
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("run_sync called from the event loop thread; await the coroutine instead.")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+async def run_shared(coro):
+    """Awaits a coroutine on the shared loop from another event loop, such as uvicorn's.
+
+    Cancelling the caller cancels the coroutine as well.
+    """
+    loop = get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
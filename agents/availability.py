@@ -0,0 +1,330 @@
+# agents/availability.py
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from agents.table_assignment import SmallestFitPolicy
+from database.queries import (
+    CHECK_RESTAURANT_AVAILABILITY, DINING_DURATION_MINUTES, LOAD_RESTAURANT_TABLES, LOAD_RESERVATIONS_BETWEEN
+)
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def parse_date(value):
+    if isinstance(value, str):
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    return value
+
+
+def minutes_of(value):
+    """Minutes since midnight for a time object or an 'HH:MM[:SS]' string."""
+    if isinstance(value, str):
+        hour, minute = value.split(":")[:2]
+        return int(hour) * 60 + int(minute)
+    return value.hour * 60 + value.minute
+
+
+def slot_range(start_minute, duration_minutes):
+    """Slots covered by [start, start + duration), rounded outwards to whole slots."""
+    first = start_minute // SLOT_MINUTES
+    last = -(-(start_minute + duration_minutes) // SLOT_MINUTES)
+    return first, last
+
+
+class DayOccupancy:
+    """Per-table occupancy of one restaurant for one day.
+
+    ``busy`` has one row per table and one column per slot, covering the day
+    plus one dining duration so late bookings that spill past midnight fit.
+    """
+
+    def __init__(self, table_ids, capacities, enabled, opening, closing, duration_slots, loaded_at):
+        self.table_ids = np.asarray(table_ids, dtype=np.int64)
+        self.capacities = np.asarray(capacities, dtype=np.int32)
+        self.enabled = np.asarray(enabled, dtype=bool)
+        self.opening = opening
+        self.closing = closing
+        self.busy = np.zeros((len(self.table_ids), SLOTS_PER_DAY + duration_slots), dtype=bool)
+        self.row_of = {int(table_id): row for row, table_id in enumerate(self.table_ids)}
+        self.loaded_at = loaded_at
+
+    def mark(self, table_id, first, last, value=True):
+        row = self.row_of.get(int(table_id))
+        if row is not None:
+            self.busy[row, max(first, 0):max(min(last, self.busy.shape[1]), 0)] = value
+
+    def _overnight(self):
+        return self.closing <= self.opening
+
+    def is_open(self, start_minute, duration_minutes):
+        """True if a meal starting at ``start_minute`` ends by closing time.
+
+        For restaurants that close after midnight, the hours before closing
+        belong to the previous evening's service and are open too.
+        """
+        if self.opening is None or self.closing is None:
+            return True
+        opening, closing = self.opening, self.closing
+        if self._overnight():
+            if start_minute + duration_minutes <= closing:
+                return True
+            closing += 24 * 60
+        return opening <= start_minute and start_minute + duration_minutes <= closing
+
+    def free_tables(self, first, last, num_people):
+        """Boolean mask of tables that seat the party and are free for every slot in [first, last)."""
+        return self.enabled & (self.capacities >= num_people) & ~self.busy[:, first:last].any(axis=1)
+
+    def open_slots(self, first=None):
+        """(first open slot, first slot after closing) of the service that slot ``first`` falls in.
+
+        The day's own service by default; an after-midnight slot before
+        opening belongs to the previous evening's, which ends at ``closing``.
+        """
+        width = self.busy.shape[1]
+        if self.opening is None or self.closing is None:
+            return 0, width
+        opening_slot = -(-self.opening // SLOT_MINUTES)
+        if not self._overnight():
+            return opening_slot, min(width, self.closing // SLOT_MINUTES)
+        if first is not None and first < opening_slot:
+            return 0, self.closing // SLOT_MINUTES
+        return opening_slot, min(width, (self.closing + 24 * 60) // SLOT_MINUTES)
+
+    def open_starts(self, duration_minutes):
+        """Boolean mask over the day's start slots at which a full meal fits in opening hours."""
+        starts = np.arange(SLOTS_PER_DAY) * SLOT_MINUTES
+        if self.opening is None or self.closing is None:
+            return np.ones(SLOTS_PER_DAY, dtype=bool)
+        if not self._overnight():
+            return (starts >= self.opening) & (starts + duration_minutes <= self.closing)
+        # The day's own service runs past midnight; the early hours finish the previous evening's
+        return ((starts >= self.opening) & (starts + duration_minutes <= self.closing + 24 * 60)) | (
+            starts + duration_minutes <= self.closing
+        )
+
+    def free_starts(self, num_people, duration_slots):
+        """Boolean mask over the day's start slots at which at least one fitting table is free.
+
+        Computed for every start at once: a running sum of busy slots per table
+        gives the number of busy slots in each dining window by subtraction.
+        """
+        fits = self.enabled & (self.capacities >= num_people)
+        if not fits.any():
+            return np.zeros(SLOTS_PER_DAY, dtype=bool)
+        busy = self.busy[fits]
+        running = np.zeros((busy.shape[0], busy.shape[1] + 1), dtype=np.int32)
+        np.cumsum(busy, axis=1, out=running[:, 1:])
+        starts = np.arange(SLOTS_PER_DAY)
+        busy_in_window = running[:, starts + duration_slots] - running[:, starts]
+        return (busy_in_window == 0).any(axis=0)
+
+
+class _PendingLoad:
+    """A restaurant-day being loaded by one thread while others wait for it.
+
+    Bookings recorded during the load are kept in ``marks`` and replayed onto
+    the result, since its queries may have run before they were committed.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.occupancy = None
+        self.error = None
+        self.marks = []
+
+
+class AvailabilityEngine:
+    """Answers availability from in-memory occupancy arrays instead of a query per check.
+
+    A restaurant-day is loaded with a few small queries on first use (tables,
+    hours and that day's holding reservations) and then kept up to date
+    incrementally via ``record_booking``. Loads run outside the engine lock, and
+    concurrent misses on the same day share one load. Entries older than ``ttl``
+    seconds are reloaded so bookings made by other processes show up; the
+    database constraint remains the final guard against double bookings. At
+    most ``max_days`` restaurant-days are kept, least recently used first out.
+    """
+
+    def __init__(self, db_agent=None, duration_minutes=DINING_DURATION_MINUTES, ttl=30.0, clock=time.monotonic,
+                 max_days=2048):
+        self.db_agent = db_agent
+        self.duration_minutes = duration_minutes
+        self.duration_slots = -(-duration_minutes // SLOT_MINUTES)
+        self.ttl = ttl
+        self.clock = clock
+        self.max_days = max_days
+        self._days = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def _load_day(self, restaurant_id, day):
+        tables = self.db_agent.fetch(LOAD_RESTAURANT_TABLES, {"restaurant_id": restaurant_id})
+        hours = self.db_agent.fetch(CHECK_RESTAURANT_AVAILABILITY, {"restaurant_id": restaurant_id})
+        opening, closing = hours[0] if hours else (None, None)
+        occupancy = DayOccupancy(
+            [t[0] for t in tables], [t[1] for t in tables], [bool(t[2]) for t in tables],
+            minutes_of(opening) if opening is not None else None,
+            minutes_of(closing) if closing is not None else None,
+            self.duration_slots, self.clock(),
+        )
+        day_start = datetime.combine(day, datetime.min.time())
+        window = timedelta(minutes=self.duration_minutes)
+        reservations = self.db_agent.fetch(LOAD_RESERVATIONS_BETWEEN, {
+            "restaurant_id": restaurant_id,
+            "start": day_start - window,
+            "end": day_start + timedelta(days=1) + window,
+        })
+        for table_id, reserved_at in reservations:
+            offset = int((reserved_at - day_start).total_seconds() // 60)
+            occupancy.mark(table_id, *slot_range(offset, self.duration_minutes))
+        return occupancy
+
+    def day(self, restaurant_id, date):
+        """Returns the (possibly freshly loaded) occupancy for a restaurant and date."""
+        day = parse_date(date)
+        key = (restaurant_id, day)
+        with self._lock:
+            occupancy = self._days.get(key)
+            if occupancy is not None and self.clock() - occupancy.loaded_at < self.ttl:
+                self._days.move_to_end(key)
+                return occupancy
+            load = self._loading.get(key)
+            if load is None:
+                load = self._loading[key] = _PendingLoad()
+                loader = True
+            else:
+                loader = False
+
+        if not loader:
+            load.done.wait()
+            if load.error is not None:
+                raise load.error
+            return load.occupancy
+
+        try:
+            occupancy = self._load_day(restaurant_id, day)
+        except BaseException as error:
+            load.error = error
+            with self._lock:
+                if self._loading.get(key) is load:
+                    del self._loading[key]
+            load.done.set()
+            raise
+        with self._lock:
+            for mark in load.marks:
+                occupancy.mark(*mark)
+            # An invalidate during the load drops it from _loading: hand the result out, but do not keep it
+            if self._loading.get(key) is load:
+                del self._loading[key]
+                self._days[key] = occupancy
+                self._days.move_to_end(key)
+                while len(self._days) > self.max_days:
+                    self._days.popitem(last=False)
+        load.occupancy = occupancy
+        load.done.set()
+        return occupancy
+
+    def check(self, restaurant_id, date, time, num_people, policy=None):
+        """Returns {"open": bool, "tables": [{"id", "seating_capacity"}, ...]}.
+
+        Tables are ordered by the assignment ``policy`` (smallest fit by default),
+        so the first one is the table to book.
+        """
+        occupancy = self.day(restaurant_id, date)
+        start = minutes_of(time)
+        if not occupancy.is_open(start, self.duration_minutes):
+            return {"open": False, "tables": []}
+        first, last = slot_range(start, self.duration_minutes)
+        free = occupancy.free_tables(first, last, num_people)
+        rows = (policy or SmallestFitPolicy()).rank(occupancy, free, first, last, num_people)
+        return {
+            "open": True,
+            "tables": [
+                {"id": int(occupancy.table_ids[row]), "seating_capacity": int(occupancy.capacities[row])}
+                for row in rows
+            ],
+        }
+
+    def find_slots(self, restaurant_ids, num_people, window_start, window_end, around=None, top_k=5):
+        """Returns up to ``top_k`` free start times in [window_start, window_end], nearest to ``around`` first.
+
+        Each restaurant-day in the window is evaluated in one vectorized pass, so
+        a week-long search costs at most one load per restaurant-day.
+        """
+        window_from, window_to = np.datetime64(window_start, "m"), np.datetime64(window_end, "m")
+        target = np.datetime64(around or window_start, "m")
+        offsets = np.arange(SLOTS_PER_DAY) * np.timedelta64(SLOT_MINUTES, "m")
+        candidates = []
+        day = window_start.date()
+        while day <= window_end.date():
+            starts = np.datetime64(day, "m") + offsets
+            in_window = (starts >= window_from) & (starts <= window_to)
+            if in_window.any():
+                distance = np.abs(starts - target)
+                for restaurant_id in restaurant_ids:
+                    occupancy = self.day(restaurant_id, day)
+                    mask = in_window & occupancy.open_starts(self.duration_minutes) & occupancy.free_starts(num_people, self.duration_slots)
+                    slots = np.flatnonzero(mask)
+                    # Only this day's nearest k can make the overall top k
+                    nearest = slots[np.argsort(distance[slots], kind="stable")[:top_k]]
+                    candidates.extend((distance[s], starts[s], restaurant_id) for s in nearest)
+            day += timedelta(days=1)
+
+        candidates.sort(key=lambda c: (c[0], c[1]))
+        slots = []
+        for _, start, restaurant_id in candidates[:top_k]:
+            start = start.astype(datetime)
+            slots.append({"restaurant_id": restaurant_id, "date": start.strftime("%Y-%m-%d"), "time": start.strftime("%H:%M:%S")})
+        return slots
+
+    def record_booking(self, restaurant_id, date, time, table_id, booked=True):
+        """Marks (or with ``booked=False`` clears) a table's dining window after a booking or cancellation."""
+        first, last = slot_range(minutes_of(time), self.duration_minutes)
+        day = parse_date(date)
+        with self._lock:
+            self._mark((restaurant_id, day), table_id, first, last, booked)
+            # The window may also show up in the neighbouring days' arrays
+            self._mark((restaurant_id, day - timedelta(days=1)), table_id, first + SLOTS_PER_DAY, last + SLOTS_PER_DAY, booked)
+            if last > SLOTS_PER_DAY:
+                self._mark((restaurant_id, day + timedelta(days=1)), table_id, first - SLOTS_PER_DAY, last - SLOTS_PER_DAY, booked)
+
+    def _mark(self, key, table_id, first, last, booked):
+        """Marks a cached day, and any load of it in flight; call with the lock held."""
+        occupancy = self._days.get(key)
+        if occupancy is not None:
+            occupancy.mark(table_id, first, last, booked)
+        load = self._loading.get(key)
+        if load is not None:
+            load.marks.append((table_id, first, last, booked))
+
+    def invalidate(self, restaurant_id=None, date=None):
+        with self._lock:
+            for entries in (self._days, self._loading):
+                if restaurant_id is None:
+                    entries.clear()
+                elif date is None:
+                    for key in [k for k in entries if k[0] == restaurant_id]:
+                        del entries[key]
+                else:
+                    entries.pop((restaurant_id, parse_date(date)), None)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_availability_engine():
+    """Returns the process-wide availability engine, creating it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            from agents.database import DatabaseAgent
+
+            _engine = AvailabilityEngine(DatabaseAgent())
+        return _engine
@@ -0,0 +1,377 @@
+# agents/catalog.py
+import asyncio
+import heapq
+import logging
+import os
+import select
+import threading
+import time
+from collections import namedtuple
+
+from agents.resolver import CatalogResolver
+from logs.logger import get_logger, log_event, span
+from database.queries import (
+    CATALOG_SAFE_WATERMARK, HAS_RESTAURANT_WATERMARK, LOAD_CATALOG, LOAD_CATALOG_WITH_WATERMARK, LOAD_CATALOG_SINCE,
+    RECENT_BOOKING_COUNTS,
+)
+
+# Compact per-restaurant record; dicts are only built for returned results
+Restaurant = namedtuple("Restaurant", ["id", "name", "location", "cuisine"])
+
+
+log = get_logger("catalog")
+
+# Notifications after which the watermark cannot be trusted: deletes, and bulk imports whose
+# long-running chunks may predate it (database/bulk_import.py)
+FULL_RELOAD_EVENTS = ("DELETE", "BULK_IMPORT")
+
+
+def normalize(value):
+    return " ".join(value.split()).lower() if value else ""
+
+
+class CatalogIndex:
+    """In-process index of the restaurant catalog: normalized city -> cuisine -> records.
+
+    Loaded once with a full scan and then kept fresh incrementally: every
+    ``refresh_interval`` seconds (or immediately after ``invalidate()``, e.g.
+    from the ``catalog_update`` NOTIFY listener) only rows whose ``updated_at``
+    passed the last watermark are re-read. The watermark trails the database
+    clock by ``watermark_margin`` seconds, so rows of transactions that were
+    still open at the last refresh are not skipped. Deletes cannot be seen
+    through the watermark, so they trigger a full reload via
+    ``invalidate(full=True)``. Without an ``updated_at`` column every refresh
+    is a full reload. With ``listen`` the first refresh starts the listener.
+
+    Recommendations are ranked by each restaurant's bookings over the last
+    ``score_window_days``; those counts are re-read with a refresh at most
+    every ``score_interval`` seconds.
+    """
+
+    def __init__(self, db_agent=None, refresh_interval=60.0, clock=time.monotonic,
+                 score_window_days=30, score_interval=300.0, aliases_path=None, watermark_margin=120.0,
+                 listen=False):
+        self.db_agent = db_agent
+        self.refresh_interval = refresh_interval
+        self.watermark_margin = watermark_margin
+        self.listen = listen
+        self.clock = clock
+        self.score_window_days = score_window_days
+        self.score_interval = score_interval
+        self._lock = threading.RLock()
+        self._by_city = {}
+        self._by_id = {}
+        self._scores = {}
+        self._scored_at = None
+        self.aliases_path = aliases_path
+        # Bumped on every change so the name resolver knows when to rebuild
+        self._generation = 0
+        self._resolver = None
+        self._resolver_generation = -1
+        self._watermark = None
+        self._has_watermark = None
+        self._loaded_at = None
+        self._dirty = False
+        self._full_reload = False
+        self._listener = None
+        self._pending_refresh = None
+        self.full_loads = 0
+        self.incremental_loads = 0
+
+    def __len__(self):
+        return len(self._by_id)
+
+    # -- building ---------------------------------------------------------
+
+    def _insert(self, record):
+        self._generation += 1
+        cuisines = self._by_city.setdefault(normalize(record.location), {})
+        cuisines.setdefault(normalize(record.cuisine), []).append(record)
+        self._by_id[record.id] = record
+
+    def _remove(self, restaurant_id):
+        record = self._by_id.pop(restaurant_id, None)
+        if record is None:
+            return
+        self._generation += 1
+        city_key, cuisine_key = normalize(record.location), normalize(record.cuisine)
+        cuisines = self._by_city[city_key]
+        bucket = cuisines[cuisine_key]
+        bucket.remove(record)
+        if not bucket:
+            del cuisines[cuisine_key]
+            if not cuisines:
+                del self._by_city[city_key]
+
+    def upsert(self, rows):
+        """Adds or replaces restaurants given (id, name, location, cuisine) rows."""
+        with self._lock:
+            for row in rows:
+                record = Restaurant(*row[:4])
+                self._remove(record.id)
+                self._insert(record)
+
+    def remove(self, restaurant_ids):
+        with self._lock:
+            for restaurant_id in restaurant_ids:
+                self._remove(restaurant_id)
+
+    def load(self, rows):
+        """Replaces the whole index with the given rows."""
+        with self._lock:
+            self._by_city = {}
+            self._by_id = {}
+            self.upsert(rows)
+
+    def set_scores(self, rows):
+        """Replaces the ranking scores with (restaurant_id, recent_bookings) rows."""
+        scores = {restaurant_id: count for restaurant_id, count in rows}
+        with self._lock:
+            self._scores = scores
+            self._scored_at = self.clock()
+
+    def _scores_stale(self):
+        return self._scored_at is None or self.clock() - self._scored_at >= self.score_interval
+
+    # -- refreshing -------------------------------------------------------
+
+    def _detect_watermark(self):
+        if self._has_watermark is None:
+            self._has_watermark = bool(self.db_agent.fetch(HAS_RESTAURANT_WATERMARK))
+        return self._has_watermark
+
+    def _refresh_query(self, full, has_watermark):
+        """Returns (query, params, full_load) for the next refresh."""
+        if full or self._loaded_at is None or not has_watermark or self._watermark is None:
+            return (LOAD_CATALOG_WITH_WATERMARK if has_watermark else LOAD_CATALOG), None, True
+        return LOAD_CATALOG_SINCE, {"watermark": self._watermark}, False
+
+    def _apply_refresh(self, rows, full_load, watermark):
+        with self._lock:
+            if full_load:
+                self.load(rows)
+                self.full_loads += 1
+            else:
+                if rows:
+                    self.upsert(rows)
+                self.incremental_loads += 1
+            if watermark is not None:
+                # A sync refresh may have moved the watermark while an async one was in flight
+                self._watermark = max(self._watermark, watermark) if self._watermark else watermark
+            self._loaded_at = self.clock()
+            self._dirty = False
+            self._full_reload = False
+
+    def refresh(self, full=False):
+        """Reloads the index from the database, incrementally when possible."""
+        self._ensure_listener()
+        with self._lock:
+            has_watermark = self._detect_watermark()
+            query, params, full_load = self._refresh_query(full, has_watermark)
+            with span("catalog_refresh", full=full_load):
+                # Read before the rows, so the watermark never passes anything the load missed
+                watermark = self.db_agent.fetch(CATALOG_SAFE_WATERMARK, {"margin": self.watermark_margin})[0][0] if has_watermark else None
+                rows = self.db_agent.fetch(query, params)
+                scores = self.db_agent.fetch(RECENT_BOOKING_COUNTS, {"days": self.score_window_days}) if self._scores_stale() else None
+            self._apply_refresh(rows, full_load, watermark)
+            if scores is not None:
+                self.set_scores(scores)
+
+    async def arefresh(self, full=False):
+        """Async refresh through ``db_agent.afetch``; the lock is never held across an await."""
+        self._ensure_listener()
+        if self._has_watermark is None:
+            self._has_watermark = bool(await self.db_agent.afetch(HAS_RESTAURANT_WATERMARK))
+        with self._lock:
+            query, params, full_load = self._refresh_query(full, self._has_watermark)
+        with span("catalog_refresh", full=full_load):
+            watermark = None
+            if self._has_watermark:
+                watermark = (await self.db_agent.afetch(CATALOG_SAFE_WATERMARK, {"margin": self.watermark_margin}))[0][0]
+            rows = await self.db_agent.afetch(query, params)
+            scores = await self.db_agent.afetch(RECENT_BOOKING_COUNTS, {"days": self.score_window_days}) if self._scores_stale() else None
+        self._apply_refresh(rows, full_load, watermark)
+        if scores is not None:
+            self.set_scores(scores)
+
+    def invalidate(self, full=False):
+        """Marks the index stale so the next lookup refreshes it."""
+        with self._lock:
+            self._dirty = True
+            self._full_reload = self._full_reload or full
+
+    def _is_stale(self):
+        return (
+            self._loaded_at is None
+            or self._dirty
+            or self.clock() - self._loaded_at >= self.refresh_interval
+        )
+
+    def maybe_refresh(self):
+        if self.db_agent is None:
+            return
+        with self._lock:
+            if self._is_stale():
+                self.refresh(full=self._full_reload)
+
+    def schedule_refresh(self):
+        """Starts an async refresh on the running loop if the index is stale.
+
+        Returns the refresh task (shared by concurrent callers), or None when
+        the index is fresh. Must be called from the event loop thread.
+        """
+        if self.db_agent is None:
+            return None
+        if self._pending_refresh is None:
+            with self._lock:
+                if not self._is_stale():
+                    return None
+                full = self._full_reload
+            self._pending_refresh = asyncio.ensure_future(self.arefresh(full=full))
+            self._pending_refresh.add_done_callback(self._refresh_done)
+        return self._pending_refresh
+
+    def _refresh_done(self, task):
+        self._pending_refresh = None
+        if not task.cancelled() and task.exception() is not None:
+            log_event(log, logging.WARNING, "catalog refresh failed", error=str(task.exception()))
+
+    async def amaybe_refresh(self):
+        """Awaits a refresh if the index is stale, joining one already in flight."""
+        task = self.schedule_refresh()
+        if task is not None:
+            await asyncio.shield(task)
+
+    # -- lookups ----------------------------------------------------------
+
+    def resolver(self):
+        """The city/cuisine resolver for the current catalog, rebuilt only after it changed."""
+        with self._lock:
+            if self._resolver_generation != self._generation:
+                records = self._by_id.values()
+                self._resolver = CatalogResolver(
+                    sorted({r.location for r in records}), sorted({r.cuisine for r in records}), self.aliases_path
+                )
+                self._resolver_generation = self._generation
+            return self._resolver
+
+    def resolve(self, city, cuisine=None):
+        """Maps user-typed ``city``/``cuisine`` to catalog spellings; see agents/resolver.py."""
+        return self.resolver().resolve(city, cuisine)
+
+    def _records(self, city, cuisine):
+        cuisines = self._by_city.get(normalize(city))
+        if not cuisines:
+            return []
+        if cuisine:
+            return cuisines.get(normalize(cuisine), [])
+        return [r for bucket in cuisines.values() for r in bucket]
+
+    def lookup(self, city, cuisine=None, refresh=True):
+        """Returns restaurants in ``city`` (optionally with exactly ``cuisine``) as dicts.
+
+        Pass ``refresh=False`` after ``await amaybe_refresh()`` so the event loop is never blocked.
+        """
+        if refresh:
+            self.maybe_refresh()
+        with self._lock:
+            return [r._asdict() for r in self._records(city, cuisine)]
+
+    def top(self, city, cuisine=None, k=5, after=None, refresh=True):
+        """Returns (page, cursor): the ``k`` best-ranked matches that come after ``after``.
+
+        Restaurants rank by recent bookings, ties broken by id. ``cursor`` is
+        the [recent_bookings, id] key of the page's last record, to pass back
+        as ``after`` for the next page, or None when nothing is left. Pages
+        are picked with a k-bounded heap, so matches are never fully sorted.
+        """
+        if refresh:
+            self.maybe_refresh()
+        with self._lock:
+            scores = self._scores
+
+            def rank(record):
+                return -scores.get(record.id, 0), record.id
+
+            candidates = self._records(city, cuisine)
+            if after is not None:
+                bound = (-after[0], after[1])
+                candidates = (r for r in candidates if rank(r) > bound)
+            best = heapq.nsmallest(k + 1, candidates, key=rank)
+        page = [dict(r._asdict(), recent_bookings=scores.get(r.id, 0)) for r in best[:k]]
+        cursor = [page[-1]["recent_bookings"], page[-1]["id"]] if len(best) > k else None
+        return page, cursor
+
+    def get(self, restaurant_id):
+        with self._lock:
+            record = self._by_id.get(restaurant_id)
+        return record._asdict() if record else None
+
+    # -- NOTIFY listener --------------------------------------------------
+
+    def _ensure_listener(self):
+        if self.listen and self._listener is None:
+            from database.connect import get_engine
+
+            with self._lock:
+                self.start_listener(get_engine())
+
+    def start_listener(self, engine, channel="catalog_update", poll_timeout=5.0):
+        """LISTENs on ``channel`` in a daemon thread and invalidates the index on each notification.
+
+        If the connection fails the thread exits, and the next refresh with
+        ``listen`` set starts a new one.
+        """
+        if self._listener is not None:
+            return self._listener
+
+        def run():
+            connection = None
+            try:
+                connection = engine.raw_connection()
+                driver = connection.driver_connection
+                driver.autocommit = True
+                with driver.cursor() as cursor:
+                    cursor.execute(f"LISTEN {channel};")
+                while True:
+                    if select.select([driver], [], [], poll_timeout) == ([], [], []):
+                        continue
+                    driver.poll()
+                    while driver.notifies:
+                        notification = driver.notifies.pop(0)
+                        self.invalidate(full=notification.payload in FULL_RELOAD_EVENTS)
+            except Exception as e:
+                log_event(log, logging.WARNING, "catalog listener stopped", error=str(e))
+                # Deletes may have been missed while nobody was listening
+                self.invalidate(full=True)
+                self._listener = None
+            finally:
+                if connection is not None:
+                    connection.close()
+
+        self._listener = threading.Thread(target=run, name="catalog-listener", daemon=True)
+        self._listener.start()
+        return self._listener
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Returns the process-wide catalog index, creating it on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            from agents.database import DatabaseAgent
+
+            _catalog = CatalogIndex(
+                DatabaseAgent(),
+                refresh_interval=float(os.getenv("CATALOG_REFRESH_SECONDS", "60")),
+                score_window_days=int(os.getenv("RANKING_WINDOW_DAYS", "30")),
+                score_interval=float(os.getenv("RANKING_REFRESH_SECONDS", "300")),
+                aliases_path=os.getenv("RESOLVER_ALIASES_PATH"),
+                watermark_margin=float(os.getenv("CATALOG_WATERMARK_MARGIN_SECONDS", "120")),
+                listen=os.getenv("CATALOG_LISTEN", "true").lower() in ("1", "true", "yes"),
+            )
+        return _catalog
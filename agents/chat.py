@@ -1,142 +1,396 @@
 # agents/chat.py
+import asyncio
+import logging
 import os
+import uuid
 import json
-import requests
 import re
+import time
 
+from logs.logger import get_logger, log_event, span
+from settings import get_settings
+
+from .async_runtime import run_sync
+from .extraction import (
+    build_extraction_prompt, build_streaming_prompt, load_extraction, reservation_details, EMPTY_EXTRACTION, REPLY_MARKER
+)
+from .intent_classifier import IntentClassifier
+from .llm_cache import get_cache, make_key
+from .llm_client import get_async_client, get_client, LLMError, GROQ_API_URL
+from .llm_dispatcher import BOOKING, BROWSING, get_dispatcher, priority_scope
+from .model_router import SMALL_MODEL, get_router, turn_budget
 from .recommendation import RecommendationAgent
 from .reservation import ReservationAgent
+from .state_store import get_state_store
+from .streaming import ReplyStream
+
+# Cache namespace and streaming model; structured calls are routed across models by agents/model_router.py
+MODEL = SMALL_MODEL
+
+log = get_logger("chat")
+
+# What _parse_intent returns for a well-formed answer naming no intent we handle
+UNCLEAR = "unclear"
+
+INTENT_PROMPT = (
+    "ONLY determine if the user is looking for 'restaurants' or 'reservation'. "
+    "Respond only with a JSON object containing {{'intent': <value>}}, where <value> is either 'restaurants' or 'reservation'. "
+    "If the intent is unclear, return {{'intent': null}}. "
+    "User input: {user_input}"
+)
+
+DETAILS_PROMPT = (
+    "**Donot** fetch details on your own, only focus on the user input "
+    "**Only extract** structured details in JSON format with keys: 'city', 'cuisine' "
+    "If any detail is missing, return it as null. Donot make any assumptions"
+    "Strictly return only a pure JSON object with no extra text."
+    "User input: {user_input}"
+)
+
+# The whole message asks for more of the same: "more", "show more", "show me more options", "any more?"
+SHOW_MORE_RE = re.compile(
+    r"^\s*(show|see|list|give|any)?\s*(me\s+)?(some\s+)?more(\s+(options|results|places|restaurants))?(\s+please)?\s*[.!?]*\s*$",
+    re.IGNORECASE,
+)
+
+# Turns that look like booking are served before browsing when Groq calls have to queue
+BOOKING_RE = re.compile(r"\b(book|booking|reserve|reservation|table for|cancel)\b", re.IGNORECASE)
+
+NO_MORE_MESSAGE = "That's every restaurant I found for this search. Try another city or cuisine."
+
+DEGRADED_MESSAGE = "I'm having trouble understanding requests right now. Could you please rephrase or try again in a moment?"
 
 class ChatAgent:
-    def __init__(self):
-        api_key = os.getenv("GROQ_API_KEY")
+    def __init__(self, session_id=None, state_store=None):
+        # Loads .env first, so the os.getenv reads below and in the sub-agents see it too
+        api_key = get_settings().groq_api_key
         if not api_key:
             raise ValueError("GROQ_API_KEY is missing. Set it in .env or as an environment variable.")
 
         self.recommendation_agent = RecommendationAgent()
         self.reservation_agent = ReservationAgent()
-        self.groq_api_url = "https://api.groq.com/openai/v1/chat/completions"
-        self.headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        self.groq_api_url = os.getenv("GROQ_API_URL", GROQ_API_URL)
+        self.llm = get_client(api_key, self.groq_api_url)
+        self.allm = get_async_client(api_key, self.groq_api_url)
+        # Rate limits, coalescing and priority are shared by every agent in the process
+        self.dispatcher = get_dispatcher(self.allm)
+        self.router = get_router(self.dispatcher)
+        self.llm_cache = get_cache()
+        self.intent_classifier = IntentClassifier()
+        # "combined" makes one structured call per turn, "two_call" keeps the old classify + extract path
+        self.extraction_mode = os.getenv("EXTRACTION_MODE", "combined")
+        # Stream a natural-language reply token by token before the structured fields are parsed
+        self.stream_replies = os.getenv("STREAM_REPLIES", "false").lower() in ("1", "true", "yes")
+
+        # Conversation state lives in a bounded store keyed by session, so one
+        # agent can serve many sessions and any worker can serve any session
+        self.state_store = state_store or get_state_store()
+        self.session_id = session_id or uuid.uuid4().hex
+
+    @property
+    def conversation_state(self):
+        """A snapshot of this agent's own session state."""
+        return self.state_store.load(self.session_id)
+
+    def extract_intent(self, user_input, session_id=None):
+        """Blocking wrapper around aextract_intent for callers without an event loop."""
+        return run_sync(self.aextract_intent(user_input, session_id))
+
+    async def aextract_intent(self, user_input, session_id=None):
+        """Runs one chat turn for ``session_id`` (default: this agent's own session)."""
+        session_id = session_id or self.session_id
+        with span("chat_turn", mode=self.extraction_mode):
+            return await self._aextract_turn(user_input, session_id)
+
+    async def _aextract_turn(self, user_input, session_id):
+        state = await self.state_store.aload(session_id)
+        if state.get("recommendations") and SHOW_MORE_RE.match(user_input):
+            return await self._ashow_more(state, session_id)
+
+        # Warm the catalog for the city we already know about while the LLM call is in flight
+        if state.get("city"):
+            self.recommendation_agent.catalog.schedule_refresh()
+
+        try:
+            with priority_scope(self._priority(user_input, state)), turn_budget(self.router.budget):
+                if self.extraction_mode == "combined":
+                    intent, new_details = await self._aextract_combined(user_input)
+                else:
+                    intent, new_details = await self._aextract_intent_two_call(user_input)
+        except LLMError as e:
+            # Groq is failing or the circuit is open: answer quickly instead of hanging the turn
+            log_event(log, logging.WARNING, "llm unavailable", error=str(e))
+            return {"intent": None, "message": DEGRADED_MESSAGE}
+
+        return await self._amerge_details(intent, new_details, state, session_id)
+
+    def stream_intent(self, user_input, session_id=None):
+        """Starts a streamed turn for ``session_id`` (default: this agent's own session).
 
-        self.conversation_state = {}
+        Iterate the returned ReplyStream, then pass it to finish_stream with the same session.
+        """
+        session_id = session_id or self.session_id
+        key = make_key(MODEL, build_streaming_prompt("{user_input}"), user_input)
+        cached = self.llm_cache.get(key)
+        if cached is not None:
+            deltas = iter([cached["reply"], REPLY_MARKER, json.dumps(cached["extraction"])])
+        else:
+            payload = {
+                "model": MODEL,
+                "messages": [{"role": "user", "content": build_streaming_prompt(user_input)}],
+                "temperature": 0,
+            }
+            priority = self._priority(user_input, self.state_store.load(session_id))
+            deltas = self._dispatched_stream(payload, priority)
+        reply = ReplyStream(deltas)
+        reply.cache_key = key
+        reply.cached = cached is not None
+        return reply
+
+    def _dispatched_stream(self, payload, priority):
+        """self.llm.stream, admitted by the dispatcher like any other completion."""
+        estimate = run_sync(self.dispatcher.admit(payload, priority))
+        try:
+            yield from self.llm.stream(payload)
+        finally:
+            self.dispatcher.release(estimate)
 
-    def extract_intent(self, user_input):
-        intent = self.classify_intent(user_input)
-        print(f"DEBUG: Intent classified as: {intent}")
-        new_details = {}
+    def finish_stream(self, reply, session_id=None):
+        """Merges the structured fields of a fully consumed ReplyStream, like extract_intent."""
+        session_id = session_id or self.session_id
+        if reply.error is not None or reply.result is None:
+            return {"intent": None, "message": DEGRADED_MESSAGE}
+
+        new_details = dict(reply.result)
+        intent = new_details.pop("intent")
+        if intent is not None and not reply.cached:
+            self.llm_cache.set(reply.cache_key, {"reply": reply.text, "extraction": reply.result})
         if intent == "restaurants":
-            new_details = self.extract_restaurant_details(user_input)
-        elif intent == "reservation":
-            new_details = {}
+            city, cuisine = new_details.get("city"), new_details.get("cuisine")
+            new_details.update(self._recommendations(city, cuisine))
+        return self._merge_details(intent, new_details, self.state_store.load(session_id), session_id)
 
-        if new_details is None:
-            print(f"DEBUG: New details are None for intent: {intent}")
+    def _merge_details(self, intent, new_details, state, session_id):
+        if not self._apply_details(intent, new_details, state):
+            return {"intent": intent}
+        self.state_store.save(session_id, state)
+        return state
+
+    async def _amerge_details(self, intent, new_details, state, session_id):
+        """Like _merge_details, but saves without blocking the event loop."""
+        if not self._apply_details(intent, new_details, state):
             return {"intent": intent}
+        await self.state_store.asave(session_id, state)
+        return state
+
+    @staticmethod
+    def _apply_details(intent, new_details, state):
+        """Merges a turn's intent and details into ``state``; False if the turn had no details."""
+        if new_details is None:
+            log_event(log, logging.DEBUG, "no details", intent=intent)
+            return False
 
         for key, value in new_details.items():
             if value and value != "null":
-                self.conversation_state[key] = value
-
-        self.conversation_state["intent"] = intent
-        return self.conversation_state
-
-    def classify_intent(self, user_input):
-        payload = {
-            "model": "llama3-8b-8192",
-            "messages": [{
-                "role": "user",
-                "content": (
-                    "ONLY determine if the user is looking for 'restaurants' or 'reservation'. "
-                    "Respond only with a JSON object containing {'intent': <value>}, where <value> is either 'restaurants' or 'reservation'. "
-                    "If the intent is unclear, return {'intent': null}. "
-                    f"User input: {user_input}"
-                )
-            }]
+                state[key] = value
+        # A new listing replaces the previous one, even when it is empty or has no next page
+        if "recommendation_cursor" in new_details:
+            state["recommendations"] = new_details["recommendations"]
+            state["recommendation_cursor"] = new_details["recommendation_cursor"]
+
+        state["intent"] = intent
+        return True
+
+    def _recommendations(self, city, cuisine):
+        """The first ranked page for a search, with the cursor "show more" continues from.
+
+        City and cuisine come back in their catalog spelling, so the session
+        keeps "Mumbai" even if the user typed "bombay".
+        """
+        if not city:
+            return {"recommendations": [], "recommendation_cursor": None}
+        city, cuisine = self.recommendation_agent.resolve(city, cuisine)
+        page, cursor = self.recommendation_agent.recommend_page(city, cuisine)
+        return {"city": city, "cuisine": cuisine, "recommendations": page, "recommendation_cursor": cursor}
+
+    async def _arecommendations(self, city, cuisine):
+        if not city:
+            return {"recommendations": [], "recommendation_cursor": None}
+        page, cursor = await self.recommendation_agent.arecommend_page(city, cuisine)
+        city, cuisine = self.recommendation_agent.resolve(city, cuisine)
+        return {"city": city, "cuisine": cuisine, "recommendations": page, "recommendation_cursor": cursor}
+
+    async def _ashow_more(self, state, session_id):
+        """Next page of the current listing from the catalog cursor; no LLM call and no new search."""
+        cursor = state.get("recommendation_cursor")
+        if cursor is None:
+            return {"intent": None, "message": NO_MORE_MESSAGE}
+        page, cursor = await self.recommendation_agent.arecommend_page(state.get("city"), state.get("cuisine"), after=cursor)
+        log_event(log, logging.DEBUG, "show more", results=len(page), more=cursor is not None)
+        return await self._amerge_details("restaurants", {"recommendations": page, "recommendation_cursor": cursor}, state, session_id)
+
+    async def _aextract_combined(self, user_input):
+        intent = self.intent_classifier.predict(user_input)
+        if intent is not None:
+            # A search still makes one call, for its details, instead of the combined one
+            if intent != "restaurants":
+                self.intent_classifier.stats.record_saved()
+            return intent, await self._alocal_details(intent, user_input)
+
+        start = time.perf_counter()
+        new_details = await self.aextract_structured(user_input)
+        self.intent_classifier.stats.record_llm(time.perf_counter() - start)
+        intent = new_details.pop("intent")
+        log_event(log, logging.DEBUG, "structured extraction", intent=intent, details=new_details)
+        if intent == "restaurants":
+            city, cuisine = new_details.get("city"), new_details.get("cuisine")
+            new_details.update(await self._arecommendations(city, cuisine))
+        return intent, new_details
+
+    async def _alocal_details(self, intent, user_input):
+        """Details for an intent the local classifier decided; only a search needs an LLM call."""
+        log_event(log, logging.DEBUG, "intent classified", intent=intent, source="local")
+        return await self.aextract_restaurant_details(user_input) if intent == "restaurants" else {}
+
+    async def _aextract_intent_two_call(self, user_input):
+        intent = self.intent_classifier.predict(user_input)
+        if intent is not None:
+            # The intent call is skipped whatever the intent
+            self.intent_classifier.stats.record_saved()
+            return intent, await self._alocal_details(intent, user_input)
+
+        # The classifier could not decide: ask the LLM for the intent and the
+        # restaurant details at the same time, and drop the details if unused
+        details_task = asyncio.ensure_future(self.aextract_restaurant_details(user_input))
+        # Retrieve the result even when it is discarded so a failure is not reported as unhandled
+        details_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        try:
+            intent = await self.aclassify_intent_llm_cached(user_input)
+        except BaseException:
+            details_task.cancel()
+            raise
+        log_event(log, logging.DEBUG, "intent classified", intent=intent, source="llm")
+        if intent != "restaurants":
+            details_task.cancel()
+            return intent, {}
+        return intent, await details_task
+
+    # -- payloads and parsing ----------------------------------------------
+
+    @staticmethod
+    def _priority(user_input, state):
+        if state.get("intent") == "reservation" or BOOKING_RE.search(user_input):
+            return BOOKING
+        return BROWSING
+
+    # The parsers return None only for answers that did not parse; those are
+    # escalated to a larger model, while an unclear intent or a missing city
+    # is a real answer and is kept
+    @staticmethod
+    def _parsed(result):
+        return result is not None
+
+    @staticmethod
+    def _structured_payload(user_input, model=MODEL):
+        return {
+            "model": model,
+            "messages": [{"role": "user", "content": build_extraction_prompt(user_input)}],
+            "response_format": {"type": "json_object"},
+            "temperature": 0,
         }
-        response = requests.post(self.groq_api_url, headers=self.headers, json=payload)
-        print(f"DEBUG: API request status for intent: {response.status_code}")
-        if response.status_code == 200:
-            try:
-                raw_response = response.json()["choices"][0]["message"]["content"].strip()
-                print(f"DEBUG: Raw intent response from API: {raw_response}")
-                # Extract JSON using regex to handle extra text
-                json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                    print(f"DEBUG: Extracted intent JSON: {json_str}")
-                    intent_data = json.loads(json_str)
-                    intent = intent_data.get("intent")
-                    print(f"DEBUG: Parsed intent: {intent}")
-                    return intent if intent in ["restaurants", "reservation"] else None
-                else:
-                    print("DEBUG: No JSON found in intent response")
-                    return None
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"DEBUG: Intent parsing error: {e}")
-                print(f"DEBUG: Raw API response: {response.text}")
+
+    @staticmethod
+    def _intent_payload(user_input, model=MODEL):
+        return {
+            "model": model,
+            "messages": [{"role": "user", "content": INTENT_PROMPT.format(user_input=user_input)}]
+        }
+
+    @staticmethod
+    def _details_payload(user_input, model=MODEL):
+        return {
+            "model": model,
+            "messages": [{"role": "user", "content": DETAILS_PROMPT.format(user_input=user_input)}]
+        }
+
+    @staticmethod
+    def _parse_structured(content):
+        log_event(log, logging.DEBUG, "raw structured extraction", response=content)
+        return load_extraction(content)
+
+    @staticmethod
+    def _parse_intent(raw_response):
+        log_event(log, logging.DEBUG, "raw intent response", response=raw_response)
+        try:
+            # Extract JSON using regex to handle extra text
+            json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
+            if json_match:
+                intent = json.loads(json_match.group(0)).get("intent")
+                return intent if intent in ["restaurants", "reservation"] else UNCLEAR
+            else:
+                log_event(log, logging.INFO, "no json in intent response")
                 return None
-        print(f"DEBUG: API error in classify_intent: {response.status_code} - {response.text}")
-        return None
-
-    def extract_restaurant_details(self, user_input):
-        payload = {
-            "model": "llama3-8b-8192",
-            "messages": [{
-                "role": "user",
-                "content": (
-                    "**Donot** fetch details on your own, only focus on the user input "
-                    "**Only extract** structured details in JSON format with keys: 'city', 'cuisine' "
-                    "If any detail is missing, return it as null. Donot make any assumptions"
-                    "Strictly return only a pure JSON object with no extra text."
-                    f"User input: {user_input}"
+        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+            log_event(log, logging.INFO, "intent parsing error", error=str(e))
+            return None
+
+    @staticmethod
+    def _parse_details(raw_response):
+        log_event(log, logging.DEBUG, "raw details response", response=raw_response)
+        try:
+            json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
+            if json_match:
+                details = json.loads(json_match.group(0))
+                return {"city": details.get("city"), "cuisine": details.get("cuisine")}
+            else:
+                log_event(log, logging.INFO, "no json in details response")
+                return None
+        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+            log_event(log, logging.INFO, "details parsing error", error=str(e))
+            return None
+
+    # -- async --------------------------------------------------------------
+
+    async def aextract_structured(self, user_input):
+        """Extracts intent, city, cuisine and reservation slots in a single JSON-mode completion."""
+        # The template embeds today's date, so relative dates never leak across days
+        template = build_extraction_prompt("{user_input}")
+
+        async def compute():
+            with span("extraction_llm"):
+                return await self.router.complete(
+                    lambda model: self._structured_payload(user_input, model), self._parse_structured, self._parsed
                 )
-            }]
-        }
-        response = requests.post(self.groq_api_url, headers=self.headers, json=payload)
-        print(f"DEBUG: API request status: {response.status_code}")
-        if response.status_code == 200:
-            try:
-                raw_response = response.json()["choices"][0]["message"]["content"].strip()
-                print(f"DEBUG: Raw API response: {raw_response}")
-                json_match = re.search(r'\{.*\}', raw_response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                    print(f"DEBUG: Extracted JSON string: {json_str}")
-                    details = json.loads(json_str)
-                    print(f"DEBUG: Parsed details: {details}")
-                    city = details.get("city")
-                    cuisine = details.get("cuisine")
-                    print(f"DEBUG: Extracted city: {city}, cuisine: {cuisine}")
-                    recommendations = self.recommendation_agent.recommend(city, cuisine) if city else []
-                    print(f"DEBUG: Recommendations: {recommendations}")
-                    # Return full recommendations without filtering 'id'
-                    return {"city": city, "cuisine": cuisine, "recommendations": recommendations}
-                else:
-                    print("DEBUG: No JSON found in response")
-                    return {"city": None, "cuisine": None, "recommendations": []}
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"DEBUG: Parsing error in extract_restaurant_details: {e}")
-                print(f"DEBUG: Raw API response: {response.text}")
-                return {"city": None, "cuisine": None, "recommendations": []}
-        print(f"DEBUG: API error in extract_restaurant_details: {response.status_code} - {response.text}")
-        return {"city": None, "cuisine": None, "recommendations": []}
 
-    def extract_reservation_details(self, restaurant_name, date, time, num_people):
-        if not all([restaurant_name, date, time, num_people]):
-            return {"time": None, "date": None, "num_people": None, "restaurant_name": None}
+        result = await self.llm_cache.aget_or_compute(MODEL, template, user_input, compute)
+        return dict(EMPTY_EXTRACTION if result is None else result)
 
+    async def aclassify_intent_llm_cached(self, user_input):
+        start = time.perf_counter()
         try:
-            date_str = date.strftime("%Y-%m-%d")
-            time_str = time.strftime("%H:%M:%S")
-            num_people_int = int(num_people)
-            if num_people_int < 1:
-                raise ValueError("Number of people must be at least 1")
-        except (AttributeError, ValueError) as e:
-            return {"time": None, "date": None, "num_people": None, "restaurant_name": None}
+            intent = await self.llm_cache.aget_or_compute(MODEL, INTENT_PROMPT, user_input, lambda: self.aclassify_intent_llm(user_input))
+            return None if intent == UNCLEAR else intent
+        finally:
+            self.intent_classifier.stats.record_llm(time.perf_counter() - start)
 
-        return {
-            "restaurant_name": restaurant_name,
-            "date": date_str,
-            "time": time_str,
-            "num_people": num_people_int
-        }
\ No newline at end of file
+    async def aclassify_intent_llm(self, user_input):
+        with span("intent_llm"):
+            return await self.router.complete(
+                lambda model: self._intent_payload(user_input, model), lambda raw: self._parse_intent(raw.strip()), self._parsed
+            )
+
+    async def aextract_restaurant_details(self, user_input):
+        async def compute():
+            with span("extraction_llm"):
+                return await self.router.complete(
+                    lambda model: self._details_payload(user_input, model), lambda raw: self._parse_details(raw.strip()), self._parsed
+                )
+
+        details = await self.llm_cache.aget_or_compute(MODEL, DETAILS_PROMPT, user_input, compute)
+        city = details["city"] if details else None
+        cuisine = details["cuisine"] if details else None
+        log_event(log, logging.DEBUG, "restaurant details", city=city, cuisine=cuisine)
+        return {"city": city, "cuisine": cuisine, **(await self._arecommendations(city, cuisine))}
+
+    def extract_reservation_details(self, restaurant_name, date, time, num_people):
+        return reservation_details(restaurant_name, date, time, num_people)
@@ -1,65 +1,57 @@
 # agents/database.py
+import logging
+
 from sqlalchemy import text
-from database.connect import get_db
-from database.queries import GET_RESTAURANTS_BY_CITY_FOOD, CHECK_RESTAURANT_AVAILABILITY, CHECK_TABLE_AVAILABILITY, BOOK_TABLE
-import sqlite3
+from logs.logger import get_logger, log_event
+from database.connect import async_session_scope, session_scope
+from database.queries import CHECK_RESTAURANT_AVAILABILITY, FIND_RESTAURANTS_PAGE
+
+log = get_logger("database")
 
 class DatabaseAgent:
-    def __init__(self):
-        self.db = next(get_db())
+    """Runs queries on short-lived sessions from the shared engine pool.
 
-    def find_restaurants(self, city, food_type):
-        query = text("""
-        SELECT id, name, location, cuisine 
-        FROM restaurants 
-        WHERE location = :city AND cuisine ILIKE :food_type;
-        """)
-        params = {"city": city, "food_type": f"%{food_type}%"}
-        result = self.db.execute(query, params).fetchall()
-        return result
+    Each call is its own unit of work, so no connection is pinned to the agent
+    and a failed statement is rolled back instead of poisoning later calls.
+    """
+
+    def find_restaurants(self, city, food_type, limit=20, after_id=0):
+        """One page of matching restaurants; pass the last id returned as ``after_id`` for the next."""
+        params = {"city": city, "food_type": f"%{food_type}%", "limit": limit, "after_id": after_id}
+        with session_scope() as db:
+            return db.execute(text(FIND_RESTAURANTS_PAGE), params).fetchall()
 
     def is_restaurant_open(self, restaurant_id, reservation_time):
         """Check if the restaurant is open at the given time."""
-        result = self.db.execute(CHECK_RESTAURANT_AVAILABILITY, (restaurant_id,)).fetchone()
+        with session_scope() as db:
+            result = db.execute(text(CHECK_RESTAURANT_AVAILABILITY), {"restaurant_id": restaurant_id}).fetchone()
         if result:
             open_time, close_time = result
             return open_time <= reservation_time <= close_time
         return False
 
-    def is_table_available(self, restaurant_id, reservation_time):
-        """Check if a table is available at the given time."""
-        result = self.db.execute(CHECK_TABLE_AVAILABILITY, (restaurant_id, reservation_time)).fetchone()
-        return result[0] == 0
-
-    def book_table(self, restaurant_id, reservation_time):
-        """Book a table if available."""
-        if not self.is_restaurant_open(restaurant_id, reservation_time):
-            return "Restaurant is closed at this time."
+    def transaction(self):
+        """Returns a session scope for several statements that must commit or roll back together."""
+        return session_scope()
 
-        if not self.is_table_available(restaurant_id, reservation_time):
-            return "No tables available at this time."
-
-        try:
-            self.db.execute(BOOK_TABLE, (restaurant_id, reservation_time))
-            self.db.commit()
-            return "Reservation successful!"
-        except Exception as e:
-            print(f"Error booking table: {e}")
-            return "Error making reservation."
-        
     def fetch(self, query, params=None):
         """Executes a SELECT query and returns the results."""
-        result = self.db.execute(text(query), params).fetchall()
-        return result
+        with session_scope() as db:
+            return db.execute(text(query), params).fetchall()
+
+    async def afetch(self, query, params=None):
+        """Async SELECT on the shared event loop's engine."""
+        async with async_session_scope() as db:
+            result = await db.execute(text(query), params)
+            return result.fetchall()
 
     def insert(self, query, params=None):
         """Executes an INSERT query and returns the last inserted ID."""
         try:
-            result = self.db.execute(text(query), params)
-            self.db.commit()
-            inserted_id = result.scalar()
-            # print(f"DEBUG: Inserted Reservation ID -> {inserted_id}")  # Debugging
-            return inserted_id  
+            with session_scope() as db:
+                result = db.execute(text(query), params)
+                inserted_id = result.scalar()
+            return inserted_id
         except Exception as e:
-            print(f"ERROR in insert: {str(e)}")
+            log_event(log, logging.ERROR, "insert failed", error=str(e))
             return None
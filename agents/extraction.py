@@ -0,0 +1,153 @@
+# agents/extraction.py
+import json
+import re
+from datetime import datetime
+
+# Every key the combined extraction prompt must return
+EXTRACTION_SCHEMA = {
+    "intent": "'restaurants', 'reservation' or null",
+    "city": "string or null",
+    "cuisine": "string or null",
+    "restaurant_name": "string or null",
+    "date": "YYYY-MM-DD or null",
+    "time": "HH:MM (24h) or null",
+    "num_people": "integer or null",
+}
+
+EMPTY_EXTRACTION = {key: None for key in EXTRACTION_SCHEMA}
+
+TIME_RE = re.compile(r"^(\d{1,2}):(\d{2})(?::(\d{2}))?$")
+
+
+def build_extraction_prompt(user_input, today=None):
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    fields = ", ".join(f"'{key}': {kind}" for key, kind in EXTRACTION_SCHEMA.items())
+    return (
+        "You extract structured data for a restaurant assistant. "
+        "Decide if the user is looking for 'restaurants' or wants to make a 'reservation', "
+        "and extract any details they gave. **Donot** fetch details on your own and donot make any assumptions; "
+        "any detail the user did not mention must be null. "
+        f"Today is {today}; resolve relative dates like 'tomorrow' against it. "
+        f"Respond with a single JSON object with exactly these keys: {{{fields}}}. "
+        f"User input: {user_input}"
+    )
+
+
+# Separates the streamed natural-language reply from the trailing JSON object
+REPLY_MARKER = "<<<DATA>>>"
+
+
+def build_streaming_prompt(user_input, today=None):
+    """Like build_extraction_prompt, but asks for a short reply to show while it streams.
+
+    The reply comes first so it can be rendered token by token; the JSON
+    object follows ``REPLY_MARKER`` and is parsed once the stream completes.
+    """
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    fields = ", ".join(f"'{key}': {kind}" for key, kind in EXTRACTION_SCHEMA.items())
+    return (
+        "You are a friendly restaurant assistant. "
+        "Decide if the user is looking for 'restaurants' or wants to make a 'reservation', "
+        "and extract any details they gave. **Donot** fetch details on your own and donot make any assumptions; "
+        "any detail the user did not mention must be null. "
+        f"Today is {today}; resolve relative dates like 'tomorrow' against it. "
+        "First write one or two short sentences to the user acknowledging what you will do, "
+        "without naming any restaurants. "
+        f"Then write {REPLY_MARKER} on its own line, followed by a single JSON object with exactly these keys: {{{fields}}}. "
+        f"User input: {user_input}"
+    )
+
+
+def _clean_str(value):
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    return value if value and value.lower() not in ("null", "none") else None
+
+
+def _clean_date(value):
+    value = _clean_str(value)
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _clean_time(value):
+    value = _clean_str(value)
+    match = TIME_RE.match(value) if value else None
+    if not match:
+        return None
+    hour, minute, second = int(match.group(1)), int(match.group(2)), int(match.group(3) or 0)
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}:{second:02d}"
+
+
+def _clean_people(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value >= 1 else None
+
+
+def parse_extraction(content):
+    """Parses a JSON-mode completion into the extraction schema.
+
+    Unknown keys are dropped and malformed values become None, so callers
+    always get every schema key back.
+    """
+    result = load_extraction(content)
+    return dict(EMPTY_EXTRACTION) if result is None else result
+
+
+def load_extraction(content):
+    """Like parse_extraction, but returns None when ``content`` is not a JSON object at all.
+
+    This tells a completion that failed to parse apart from one that parsed
+    with every field null, such as an off-topic message.
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, json.JSONDecodeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    intent = data.get("intent")
+    return {
+        "intent": intent if intent in ("restaurants", "reservation") else None,
+        "city": _clean_str(data.get("city")),
+        "cuisine": _clean_str(data.get("cuisine")),
+        "restaurant_name": _clean_str(data.get("restaurant_name")),
+        "date": _clean_date(data.get("date")),
+        "time": _clean_time(data.get("time")),
+        "num_people": _clean_people(data.get("num_people")),
+    }
+
+
+def reservation_details(restaurant_name, date, time, num_people):
+    """Formats reservation form values as strings, or all-None if any is missing or invalid."""
+    if not all([restaurant_name, date, time, num_people]):
+        return {"time": None, "date": None, "num_people": None, "restaurant_name": None}
+
+    try:
+        date_str = date.strftime("%Y-%m-%d")
+        time_str = time.strftime("%H:%M:%S")
+        num_people_int = int(num_people)
+        if num_people_int < 1:
+            raise ValueError("Number of people must be at least 1")
+    except (AttributeError, ValueError) as e:
+        return {"time": None, "date": None, "num_people": None, "restaurant_name": None}
+
+    return {
+        "restaurant_name": restaurant_name,
+        "date": date_str,
+        "time": time_str,
+        "num_people": num_people_int
+    }
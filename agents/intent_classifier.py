@@ -0,0 +1,231 @@
+# agents/intent_classifier.py
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+INTENTS = ("restaurants", "reservation")
+
+# Keyword / pattern rules. Each match adds its weight to the intent's score.
+RULES = {
+    "reservation": [
+        (re.compile(r"\b(book|booking|reserve|reserving|reservation|reservations)\b"), 2.0),
+        (re.compile(r"\btable for\b"), 2.0),
+        (re.compile(r"\b(party of|for \d+ (people|persons|guests))\b"), 1.0),
+        (re.compile(r"\b(tonight at|tomorrow at|at \d{1,2}(:\d{2})?\s*(am|pm)?)\b"), 0.5),
+    ],
+    "restaurants": [
+        (re.compile(r"\b(restaurant|restaurants|eatery|eateries|cafe|cafes|diner)\b"), 1.0),
+        (re.compile(r"\b(places? to eat|where (can|should) i eat|somewhere to eat)\b"), 2.0),
+        (re.compile(r"\b(recommend|recommendation|recommendations|suggest|suggestions|options)\b"), 1.5),
+        (re.compile(r"\b(food|cuisine|eat|hungry|dine|dining)\b"), 1.0),
+        (re.compile(r"\b(in|near|around) [a-z]+"), 0.5),
+    ],
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class NaiveBayesIntentModel:
+    """Small multinomial Naive Bayes model over word unigrams, stored as JSON."""
+
+    def __init__(self, priors, likelihoods, unknown):
+        self.priors = priors
+        self.likelihoods = likelihoods
+        self.unknown = unknown
+
+    @classmethod
+    def fit(cls, examples, alpha=1.0):
+        """Trains the model from (text, intent) pairs."""
+        doc_counts = Counter()
+        token_counts = {intent: Counter() for intent in INTENTS}
+        for text, intent in examples:
+            if intent not in INTENTS:
+                continue
+            doc_counts[intent] += 1
+            token_counts[intent].update(tokenize(text))
+
+        vocabulary = set()
+        for counts in token_counts.values():
+            vocabulary.update(counts)
+
+        total_docs = sum(doc_counts.values()) or 1
+        priors, likelihoods, unknown = {}, {}, {}
+        for intent in INTENTS:
+            total_tokens = sum(token_counts[intent].values())
+            denominator = total_tokens + alpha * (len(vocabulary) + 1)
+            priors[intent] = math.log((doc_counts[intent] + alpha) / (total_docs + alpha * len(INTENTS)))
+            likelihoods[intent] = {
+                token: math.log((count + alpha) / denominator)
+                for token, count in token_counts[intent].items()
+            }
+            unknown[intent] = math.log(alpha / denominator)
+        return cls(priors, likelihoods, unknown)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["priors"], data["likelihoods"], data["unknown"])
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"priors": self.priors, "likelihoods": self.likelihoods, "unknown": self.unknown}, f)
+
+    def predict(self, text):
+        """Returns (intent, posterior probability) for the given text."""
+        tokens = tokenize(text)
+        scores = {}
+        for intent in INTENTS:
+            table = self.likelihoods[intent]
+            scores[intent] = self.priors[intent] + sum(table.get(t, self.unknown[intent]) for t in tokens)
+        best = max(scores, key=scores.get)
+        peak = scores[best]
+        norm = sum(math.exp(s - peak) for s in scores.values())
+        return best, 1.0 / norm
+
+
+class ClassifierStats:
+    """Thread-safe counters for local hits versus LLM fall-throughs.
+
+    A hit only counts as a saved round trip once the caller reports, through
+    record_saved, that it really skipped an LLM call because of it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.local_hits = 0
+        self.fallthroughs = 0
+        self.saved = 0
+        self.local_seconds = 0.0
+        self.llm_seconds = 0.0
+
+    def record_local(self, hit, seconds):
+        with self._lock:
+            if hit:
+                self.local_hits += 1
+            else:
+                self.fallthroughs += 1
+            self.local_seconds += seconds
+
+    def record_saved(self):
+        with self._lock:
+            self.saved += 1
+
+    def record_llm(self, seconds):
+        with self._lock:
+            self.llm_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            total = self.local_hits + self.fallthroughs
+            avg_llm = self.llm_seconds / self.fallthroughs if self.fallthroughs else 0.0
+            return {
+                "requests": total,
+                "local_hits": self.local_hits,
+                "llm_fallthroughs": self.fallthroughs,
+                "hit_rate": self.local_hits / total if total else 0.0,
+                "avg_local_ms": 1000 * self.local_seconds / total if total else 0.0,
+                "avg_llm_ms": 1000 * avg_llm,
+                "round_trips_saved": self.saved,
+                "estimated_ms_saved": 1000 * avg_llm * self.saved,
+            }
+
+
+# Process-wide counters shared by every ChatAgent
+classifier_stats = ClassifierStats()
+
+
+class IntentClassifier:
+    """Local intent classifier that runs before the Groq call.
+
+    Combines the keyword rules with an optional Naive Bayes model loaded from
+    ``model_path`` (or the INTENT_MODEL_PATH environment variable). ``classify``
+    returns ``(intent, confidence)``; callers should only trust results whose
+    confidence reaches ``threshold`` and fall through to the LLM otherwise.
+    """
+
+    def __init__(self, model_path=None, threshold=0.8, stats=None):
+        self.threshold = threshold
+        self.stats = stats or classifier_stats
+        self.model = None
+        model_path = model_path or os.getenv("INTENT_MODEL_PATH")
+        if model_path and os.path.exists(model_path):
+            self.model = NaiveBayesIntentModel.load(model_path)
+
+    def rule_scores(self, text):
+        text = text.lower()
+        return {
+            intent: sum(weight for pattern, weight in patterns if pattern.search(text))
+            for intent, patterns in RULES.items()
+        }
+
+    def classify(self, text):
+        """Returns (intent, confidence); intent is None when nothing matched."""
+        scores = self.rule_scores(text)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (best, top), (_, runner_up) = ranked[0], ranked[1]
+
+        if top == 0:
+            intent, confidence = None, 0.0
+        else:
+            # Confidence grows with the margin over the other intent
+            intent = best
+            margin = (top - runner_up) / top
+            confidence = min(0.99, 0.5 + 0.5 * margin * min(1.0, top / 2.0))
+
+        if self.model is not None:
+            model_intent, probability = self.model.predict(text)
+            if intent is None:
+                intent, confidence = model_intent, probability * 0.9
+            elif model_intent == intent:
+                confidence = max(confidence, probability)
+            else:
+                confidence = min(confidence, 1.0 - probability)
+
+        return intent, confidence
+
+    def predict(self, text):
+        """Classifies locally and records the outcome.
+
+        Returns the intent when confident, otherwise None so the caller can
+        fall back to the LLM.
+        """
+        start = time.perf_counter()
+        intent, confidence = self.classify(text)
+        hit = intent is not None and confidence >= self.threshold
+        self.stats.record_local(hit, time.perf_counter() - start)
+        return intent if hit else None
+
+
+def train_from_jsonl(examples_path, model_path):
+    """Trains a model from a JSONL file of {"text": ..., "intent": ...} rows."""
+    examples = []
+    with open(examples_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                examples.append((row["text"], row["intent"]))
+    model = NaiveBayesIntentModel.fit(examples)
+    model.save(model_path)
+    return model
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print("Usage: python -m agents.intent_classifier <examples.jsonl> <model.json>")
+        sys.exit(1)
+    train_from_jsonl(sys.argv[1], sys.argv[2])
+    print(f"Model written to {sys.argv[2]}")
@@ -0,0 +1,164 @@
+# agents/llm_cache.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+PUNCTUATION_RE = re.compile(r"[^\w\s]")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_input(text):
+    """Lowercases, strips punctuation and collapses whitespace."""
+    text = PUNCTUATION_RE.sub(" ", text.lower())
+    return WHITESPACE_RE.sub(" ", text).strip()
+
+
+def make_key(model, template, user_input):
+    raw = "\x1f".join([model, template, normalize_input(user_input)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """LRU + TTL cache of parsed LLM results, optionally persisted to SQLite.
+
+    Values must be JSON-serialisable. The in-memory LRU holds at most
+    ``max_entries`` items; when ``path`` is set every write also goes to a
+    SQLite file so entries survive restarts and are promoted back into memory
+    on first use.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600.0, path=None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM completions WHERE expires_at <= ?", (self.clock(),))
+            self._db.commit()
+
+    def get(self, key):
+        """Returns the cached value, or None on a miss."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM completions WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._store(key, value, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO completions (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                self._db.commit()
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, model, template, user_input, compute, should_cache=bool):
+        """Returns the cached result for this prompt, calling ``compute()`` on a miss.
+
+        Results for which ``should_cache`` is false (e.g. empty extractions)
+        are returned but not stored.
+        """
+        key = make_key(model, template, user_input)
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = compute()
+        if value is not None and should_cache(value):
+            self.set(key, value)
+        return value
+
+    async def aget_or_compute(self, model, template, user_input, compute, should_cache=bool):
+        """Async variant of get_or_compute; ``compute`` is a coroutine function."""
+        key = make_key(model, template, user_input)
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = await compute()
+        if value is not None and should_cache(value):
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM completions")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the process-wide cache configured from LLM_CACHE_* environment variables."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = CompletionCache(
+                max_entries=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+                ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+                path=os.getenv("LLM_CACHE_PATH") or None,
+            )
+        return _default_cache
@@ -0,0 +1,349 @@
+# agents/llm_client.py
+import asyncio
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when a completion could not be obtained."""
+
+
+class LLMUnavailableError(LLMError):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and fails fast
+    until ``reset_timeout`` seconds have passed, then lets one trial call through."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Ends a trial call that produced no outcome (it was cancelled), so the next call may try."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+def parse_retry_after(value):
+    """Returns the Retry-After header as seconds, or None if absent/invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def iter_sse_deltas(lines):
+    """Yields the content deltas of a chat-completions server-sent-event stream.
+
+    ``lines`` are the decoded lines of the response body; the stream ends at
+    ``data: [DONE]``. Error events are raised as LLMError.
+    """
+    for line in lines:
+        if not line or line.startswith(":") or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            chunk = json.loads(data)
+        except ValueError as e:
+            raise LLMError(f"LLM stream sent invalid JSON: {e}")
+        if "error" in chunk:
+            raise LLMError(f"LLM stream error: {chunk['error']}")
+        try:
+            delta = chunk["choices"][0].get("delta", {}).get("content")
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            raise LLMError(f"Unexpected stream chunk format: {e}")
+        if delta:
+            yield delta
+
+
+class BaseGroqClient:
+    """Retry, backoff and circuit-breaker logic shared by the sync and async clients."""
+
+    def __init__(self, api_key, api_url=GROQ_API_URL, connect_timeout=3.05, read_timeout=15.0,
+                 max_retries=2, backoff_base=0.25, backoff_max=4.0, pool_size=10, breaker=None):
+        self.api_url = api_url
+        self.headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.breaker = breaker or CircuitBreaker()
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter keeps concurrent retries from synchronising
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _check_open(self):
+        if not self.breaker.allow():
+            raise LLMUnavailableError("LLM circuit breaker is open")
+
+    def _check_response(self, status_code, headers, text, decode):
+        """Returns (body, retry_after, error) for one attempt.
+
+        ``body`` is set on success; otherwise ``error`` is the retryable failure.
+        Non-retryable responses raise LLMError directly.
+        """
+        if status_code == 200:
+            try:
+                body = decode()
+            except ValueError as e:
+                return None, None, LLMError(f"LLM returned invalid JSON: {e}")
+            self.breaker.record_success()
+            return body, None, None
+        if status_code in RETRYABLE_STATUS:
+            retry_after = parse_retry_after(headers.get("Retry-After"))
+            return None, retry_after, LLMError(f"LLM API error: {status_code} - {text}")
+        # Client errors will not succeed on retry and say nothing about Groq's health
+        self.breaker.record_success()
+        raise LLMError(f"LLM API error: {status_code} - {text}")
+
+    def _give_up(self, error):
+        self.breaker.record_failure()
+        raise error
+
+    @contextmanager
+    def _recording(self):
+        """Records a failure for errors the retry loop did not, so a half-open trial never stays in flight."""
+        try:
+            yield
+        except LLMError:
+            # Already recorded by _give_up or _check_response
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            raise LLMError(f"LLM request failed: {e}") from e
+        except BaseException:
+            self.breaker.release_trial()
+            raise
+
+    @staticmethod
+    def _content(body):
+        try:
+            return body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"Unexpected completion format: {e}")
+
+
+class GroqClient(BaseGroqClient):
+    """Chat-completions client with a pooled keep-alive session, connect/read
+    timeouts, jittered retries on 429/5xx and a circuit breaker."""
+
+    def __init__(self, api_key, api_url=GROQ_API_URL, **kwargs):
+        super().__init__(api_key, api_url, **kwargs)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post(self, payload):
+        """POSTs the payload and returns the decoded JSON body."""
+        self._check_open()
+        with self._recording():
+            error = None
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                try:
+                    response = self.session.post(self.api_url, json=payload, timeout=(self.connect_timeout, self.read_timeout))
+                except requests.RequestException as e:
+                    error = LLMError(f"LLM request failed: {e}")
+                else:
+                    body, retry_after, error = self._check_response(response.status_code, response.headers, response.text, response.json)
+                    if error is None:
+                        return body
+
+                if attempt < self.max_retries:
+                    time.sleep(self._backoff(attempt, retry_after))
+            self._give_up(error)
+
+    def complete(self, payload):
+        """Returns the message content of the first choice."""
+        return self._content(self.post(payload))
+
+    def stream(self, payload):
+        """Yields content deltas of a streamed completion as they arrive.
+
+        Retries only happen until the stream has started; a stream that breaks
+        midway raises LLMError, since replaying it would repeat tokens already shown.
+        """
+        self._check_open()
+        payload = dict(payload, stream=True)
+        with self._recording():
+            error = None
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                try:
+                    response = self.session.post(self.api_url, json=payload, timeout=(self.connect_timeout, self.read_timeout), stream=True)
+                except requests.RequestException as e:
+                    error = LLMError(f"LLM request failed: {e}")
+                else:
+                    if response.status_code == 200:
+                        break
+                    with response:
+                        _, retry_after, error = self._check_response(response.status_code, response.headers, response.text, response.json)
+
+                if attempt < self.max_retries:
+                    time.sleep(self._backoff(attempt, retry_after))
+            else:
+                self._give_up(error)
+
+            with response:
+                try:
+                    # chunk_size=None hands over events as they arrive instead of filling a 512 byte buffer
+                    yield from iter_sse_deltas(response.iter_lines(chunk_size=None, decode_unicode=True))
+                except requests.RequestException as e:
+                    self._give_up(LLMError(f"LLM stream interrupted: {e}"))
+                except LLMError as e:
+                    self._give_up(e)
+                except GeneratorExit:
+                    # The reader stopped early; the stream itself was healthy
+                    self.breaker.record_success()
+                    raise
+            self.breaker.record_success()
+
+
+class AsyncGroqClient(BaseGroqClient):
+    """asyncio counterpart of GroqClient built on a pooled httpx.AsyncClient.
+
+    Many conversations can share one event loop (and one connection pool)
+    without a thread per user.
+    """
+
+    def __init__(self, api_key, api_url=GROQ_API_URL, **kwargs):
+        super().__init__(api_key, api_url, **kwargs)
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+        )
+
+    async def post(self, payload):
+        """POSTs the payload and returns the decoded JSON body."""
+        self._check_open()
+        with self._recording():
+            error = None
+            for attempt in range(self.max_retries + 1):
+                retry_after = None
+                try:
+                    response = await self.client.post(self.api_url, json=payload)
+                except httpx.TransportError as e:
+                    error = LLMError(f"LLM request failed: {e}")
+                else:
+                    body, retry_after, error = self._check_response(response.status_code, response.headers, response.text, response.json)
+                    if error is None:
+                        return body
+
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self._backoff(attempt, retry_after))
+            self._give_up(error)
+
+    async def complete(self, payload):
+        """Returns the message content of the first choice."""
+        return self._content(await self.post(payload))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, api_url=GROQ_API_URL):
+    """Returns the process-wide client for this key so sessions and breaker state are shared."""
+    with _clients_lock:
+        client = _clients.get((api_key, api_url))
+        if client is None:
+            client = _clients[(api_key, api_url)] = GroqClient(api_key, api_url=api_url)
+        return client
+
+
+_async_clients = {}
+
+
+def get_async_client(api_key, api_url=GROQ_API_URL):
+    """Returns the process-wide async client for this key; it shares the sync client's circuit breaker."""
+    breaker = get_client(api_key, api_url).breaker
+    with _clients_lock:
+        client = _async_clients.get((api_key, api_url))
+        if client is None:
+            client = _async_clients[(api_key, api_url)] = AsyncGroqClient(api_key, api_url=api_url, breaker=breaker)
+        return client
+
+
+async def aclose_async_clients():
+    """Closes the pooled connections of every async client created in this process."""
+    with _clients_lock:
+        clients = list(_async_clients.values())
+        _async_clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -0,0 +1,313 @@
+# agents/llm_dispatcher.py
+"""Process-wide admission control for Groq completions.
+
+Every ChatAgent sends its completions through one LLMDispatcher per client,
+which:
+- stays under the requests-per-minute and tokens-per-minute limits with two
+  token buckets, so a traffic spike waits here instead of coming back as 429s;
+- coalesces identical in-flight payloads, so concurrent "restaurants in Delhi"
+  turns share one completion;
+- admits waiting requests in priority order, so a turn in the middle of a
+  booking is not stuck behind people browsing.
+"""
+import asyncio
+import contextvars
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from logs.logger import metrics
+
+BOOKING = 0
+BROWSING = 1
+PRIORITY_NAMES = {BOOKING: "booking", BROWSING: "browsing"}
+
+# Prompt tokens are estimated from characters; the charge is corrected from the response's usage
+CHARS_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKENS = 64
+
+_priority = contextvars.ContextVar("llm_priority", default=BROWSING)
+
+
+def current_priority():
+    return _priority.get()
+
+
+@contextmanager
+def priority_scope(priority):
+    """Completions requested inside the block, including from tasks it starts, queue at ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def estimate_tokens(payload):
+    """Rough token count of a chat-completions request, prompt plus expected completion."""
+    chars = sum(len(message.get("content") or "") for message in payload.get("messages", ()))
+    return chars // CHARS_PER_TOKEN + 1 + payload.get("max_tokens", DEFAULT_COMPLETION_TOKENS)
+
+
+def payload_key(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units a minute, holding at most ``capacity`` (default: one minute's worth).
+
+    Not thread-safe on its own; LLMDispatcher calls it under its lock.
+    """
+
+    def __init__(self, per_minute, capacity=None, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute if capacity is None else capacity)
+        self.clock = clock
+        self.level = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until ``amount`` units are available; 0 if they are now."""
+        self._refill()
+        # A request bigger than the whole bucket waits for a full bucket rather than forever
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def refund(self, amount):
+        """Returns ``amount`` units; a negative amount charges the difference."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+def _call_later(loop, delay, callback):
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        loop.call_later(delay, callback)
+    else:
+        loop.call_soon_threadsafe(loop.call_later, delay, callback)
+
+
+def _grant(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class LLMDispatcher:
+    """Rate-limited, coalescing, priority-ordered front for an AsyncGroqClient.
+
+    A limit of 0 turns that bucket off. ``max_concurrency`` caps completions
+    in flight at once.
+    """
+
+    def __init__(self, client, requests_per_minute=30, tokens_per_minute=30000, max_concurrency=16,
+                 clock=time.monotonic):
+        self.client = client
+        self.requests = TokenBucket(requests_per_minute, clock=clock) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute > 0 else None
+        self.max_concurrency = max_concurrency
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Entries are [priority, seq, tokens, waiter, state]; state is False while
+        # queued, True once admitted and None if the caller gave up
+        self._queue = []
+        self._seq = itertools.count()
+        self._in_flight = {}
+        self._wake_at = None
+        self.running = 0
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.peak_depth = 0
+
+    async def complete(self, payload, priority=None, coalesce=True):
+        """Returns the message content of the first choice, like AsyncGroqClient.complete.
+
+        ``priority`` defaults to the one set by the innermost priority_scope().
+        With ``coalesce=False`` the payload is sent even if an identical one is in flight.
+        """
+        priority = _priority.get() if priority is None else priority
+        if not coalesce:
+            with self._lock:
+                self.submitted += 1
+            return await self._dispatch(payload, priority)
+        loop = asyncio.get_running_loop()
+        key = (id(loop), payload_key(payload))
+        with self._lock:
+            self.submitted += 1
+            entry = self._in_flight.get(key)
+            if entry is None:
+                task = loop.create_task(self._dispatch(payload, priority))
+                entry = self._in_flight[key] = [task, 0]
+                task.add_done_callback(lambda _: self._forget(key, entry))
+            else:
+                self.coalesced += 1
+            entry[1] += 1
+        task = entry[0]
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Cancel the shared completion only when nobody else is waiting for it
+            with self._lock:
+                entry[1] -= 1
+                abandoned = entry[1] == 0
+            if abandoned:
+                task.cancel()
+            raise
+
+    def _forget(self, key, entry):
+        with self._lock:
+            if self._in_flight.get(key) is entry:
+                del self._in_flight[key]
+
+    async def _dispatch(self, payload, priority):
+        estimate = await self.admit(payload, priority)
+        used = None
+        try:
+            body = await self.client.post(payload)
+            used = (body.get("usage") or {}).get("total_tokens") if isinstance(body, dict) else None
+            content = self.client._content(body)
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            self.release(estimate, used)
+        with self._lock:
+            self.completed += 1
+        return content
+
+    async def admit(self, payload, priority=None):
+        """Waits for a slot and budget for ``payload`` and returns the tokens charged.
+
+        For calls that bypass complete(), such as streams; pass the result to release().
+        """
+        priority = _priority.get() if priority is None else priority
+        tokens = estimate_tokens(payload)
+        waiter = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), tokens, waiter, False]
+        start = time.perf_counter()
+        with self._lock:
+            heapq.heappush(self._queue, entry)
+            self.peak_depth = max(self.peak_depth, len(self._queue))
+        self._pump()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                admitted = entry[4] is True
+                entry[4] = None
+            if admitted:
+                self.release(tokens, 0)
+            raise
+        finally:
+            metrics.observe(f"llm_queue_wait_{PRIORITY_NAMES.get(priority, priority)}", time.perf_counter() - start)
+        return tokens
+
+    def _wait_time(self, tokens):
+        return max(
+            self.requests.wait_time(1) if self.requests else 0.0,
+            self.tokens.wait_time(tokens) if self.tokens else 0.0,
+        )
+
+    def _pump(self):
+        """Admits queued requests, highest priority first, while slots and budget allow."""
+        admitted = []
+        with self._lock:
+            while self._queue and self.running < self.max_concurrency:
+                entry = self._queue[0]
+                if entry[4] is None:
+                    heapq.heappop(self._queue)
+                    continue
+                wait = self._wait_time(entry[2])
+                if wait > 0:
+                    # Strict priority: lower priorities wait behind the head even if they would fit
+                    wake_at = self.clock() + wait
+                    if self._wake_at is None or wake_at < self._wake_at:
+                        self._wake_at = wake_at
+                        _call_later(entry[3].get_loop(), wait, self._on_timer)
+                    break
+                heapq.heappop(self._queue)
+                if self.requests:
+                    self.requests.take(1)
+                if self.tokens:
+                    self.tokens.take(entry[2])
+                self.running += 1
+                entry[4] = True
+                admitted.append(entry[3])
+        for waiter in admitted:
+            waiter.get_loop().call_soon_threadsafe(_grant, waiter)
+
+    def _on_timer(self):
+        with self._lock:
+            self._wake_at = None
+        self._pump()
+
+    def release(self, estimate, used=None):
+        """Frees an admitted slot; ``used``, if known, corrects the token charge."""
+        with self._lock:
+            self.running -= 1
+            if used is not None and self.tokens:
+                self.tokens.refund(estimate - used)
+        self._pump()
+
+    def stats(self):
+        with self._lock:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for entry in self._queue:
+                if entry[4] is False:
+                    name = PRIORITY_NAMES.get(entry[0], str(entry[0]))
+                    depth[name] = depth.get(name, 0) + 1
+            return {
+                "queue_depth": depth,
+                "peak_queue_depth": self.peak_depth,
+                "running": self.running,
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "completed": self.completed,
+                "failed": self.failed,
+                "requests_available": round(self.requests.level, 2) if self.requests else None,
+                "tokens_available": round(self.tokens.level, 2) if self.tokens else None,
+            }
+
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_dispatcher(client):
+    """Returns the process-wide dispatcher for ``client``, configured from LLM_* environment variables."""
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(id(client))
+        if dispatcher is None:
+            dispatcher = _dispatchers[id(client)] = LLMDispatcher(
+                client,
+                requests_per_minute=int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30")),
+                tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", "30000")),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+            )
+        return dispatcher
+
+
+def dispatcher_stats():
+    """Stats of every dispatcher in this process, for the /metrics endpoint."""
+    with _dispatchers_lock:
+        dispatchers = list(_dispatchers.values())
+    return [dispatcher.stats() for dispatcher in dispatchers]
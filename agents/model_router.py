@@ -0,0 +1,187 @@
+# agents/model_router.py
+"""Latency-budgeted model routing for Groq completions.
+
+Each completion tries the models in order, smallest first. It moves on to
+the next model only when the caller rejects the answer (ChatAgent rejects
+only answers that did not parse) and the turn's latency budget still has
+room for that model's typical latency. With hedging on, a duplicate request is sent once a call
+runs past its model's p95 latency, and whichever answer arrives first wins.
+Per-model latencies go into the ``llm_model_<name>`` histograms, and routing
+decisions are counted in ModelRouter.stats().
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from logs.logger import get_logger, log_event, metrics
+
+from .llm_client import LLMError
+
+SMALL_MODEL = "llama3-8b-8192"
+LARGE_MODEL = "llama3-70b-8192"
+
+# Hedging waits for this many latency samples of a model before trusting its p95
+HEDGE_MIN_SAMPLES = 20
+
+log = get_logger("model_router")
+
+_deadline = contextvars.ContextVar("llm_deadline", default=None)
+
+
+class BudgetExceededError(LLMError):
+    """Raised when no model answered within the latency budget."""
+
+
+@contextmanager
+def turn_budget(seconds):
+    """Completions requested inside the block share one deadline, ``seconds`` from now."""
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def model_histogram(model):
+    return metrics.histogram(f"llm_model_{model}")
+
+
+async def _first_success(tasks):
+    """The first task to finish without an error; raises the last error if all fail."""
+    pending, error = set(tasks), None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                return task
+            error = task.exception()
+    raise error
+
+
+class ModelRouter:
+    """Sends completions through ``dispatcher``, escalating across ``models`` within a budget.
+
+    ``budget`` (seconds) applies when the caller has not set a turn_budget().
+    """
+
+    def __init__(self, dispatcher, models=(SMALL_MODEL, LARGE_MODEL), budget=4.0, hedge=False,
+                 hedge_min_samples=HEDGE_MIN_SAMPLES):
+        self.dispatcher = dispatcher
+        self.models = tuple(models)
+        self.budget = budget
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self._lock = threading.Lock()
+        self.decisions = {}
+
+    def _record(self, decision, model):
+        with self._lock:
+            key = f"{model}:{decision}"
+            self.decisions[key] = self.decisions.get(key, 0) + 1
+        log_event(log, logging.DEBUG, "model routed", model=model, decision=decision)
+
+    async def complete(self, build_payload, parse, accept=bool, priority=None):
+        """Returns ``parse(content)`` of the first answer ``accept`` takes.
+
+        ``build_payload(model)`` makes the request for one model. When no answer
+        is accepted, the last one is returned as it is. BudgetExceededError is
+        raised only if the budget runs out before any model answered.
+        """
+        deadline = _deadline.get()
+        if deadline is None:
+            deadline = time.monotonic() + self.budget
+        result, answered = None, False
+        for index, model in enumerate(self.models):
+            remaining = deadline - time.monotonic()
+            if answered and remaining < model_histogram(model).percentile(0.50):
+                # The larger model would typically not finish in time: keep the answer we have
+                self._record("kept_for_budget", self.models[index - 1])
+                return result
+            if remaining <= 0:
+                break
+            try:
+                content = await asyncio.wait_for(self._call(model, build_payload(model), priority), remaining)
+            except asyncio.TimeoutError:
+                self._record("timed_out", model)
+                break
+            result, answered = parse(content), True
+            if accept(result):
+                self._record("accepted", model)
+                return result
+            if index + 1 < len(self.models):
+                self._record("escalated", model)
+            else:
+                self._record("unresolved", model)
+        if not answered:
+            raise BudgetExceededError("No model answered within the latency budget")
+        return result
+
+    async def _call(self, model, payload, priority):
+        histogram = model_histogram(model)
+        delay = None
+        if self.hedge and histogram.count >= self.hedge_min_samples:
+            delay = histogram.percentile(0.95)
+
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(self.dispatcher.complete(payload, priority))
+        tasks = [primary]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    # A duplicate must not be coalesced into the request it is hedging
+                    self._record("hedged", model)
+                    tasks.append(asyncio.ensure_future(self.dispatcher.complete(payload, priority, coalesce=False)))
+            winner = await _first_success(tasks)
+        except BaseException:
+            histogram.observe(time.perf_counter() - start, error=True)
+            raise
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        histogram.observe(time.perf_counter() - start)
+        if winner is not primary:
+            self._record("hedge_won", model)
+        return winner.result()
+
+    def stats(self):
+        with self._lock:
+            decisions = dict(sorted(self.decisions.items()))
+        return {
+            "models": list(self.models),
+            "budget_ms": round(1000 * self.budget, 1),
+            "hedge": self.hedge,
+            "decisions": decisions,
+            "latency": {model: model_histogram(model).snapshot() for model in self.models},
+        }
+
+
+_routers = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(dispatcher):
+    """Returns the process-wide router for ``dispatcher``, configured from LLM_* environment variables."""
+    with _routers_lock:
+        router = _routers.get(id(dispatcher))
+        if router is None:
+            models = [name.strip() for name in os.getenv("LLM_MODELS", f"{SMALL_MODEL},{LARGE_MODEL}").split(",")]
+            router = _routers[id(dispatcher)] = ModelRouter(
+                dispatcher,
+                models=[name for name in models if name],
+                budget=float(os.getenv("LLM_TURN_BUDGET_MS", "4000")) / 1000,
+                hedge=os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes"),
+            )
+        return router
+
+
+def router_stats():
+    """Stats of every router in this process, for the /metrics endpoint."""
+    with _routers_lock:
+        routers = list(_routers.values())
+    return [router.stats() for router in routers]
@@ -1,10 +1,25 @@
-from crewai import Agent
+import os
+from functools import cached_property
+
+from agents.catalog import get_catalog
 from agents.database import DatabaseAgent
+from logs.logger import span
+from settings import load_env
 
 class RecommendationAgent:
     def __init__(self):
+        load_env()
         self.db_agent = DatabaseAgent()
-        self.agent = Agent(
+        self.catalog = get_catalog()
+        # Recommendations per page; "show more" fetches the next page
+        self.page_size = int(os.getenv("RECOMMENDATION_PAGE_SIZE", "5"))
+
+    @cached_property
+    def agent(self):
+        """The CrewAI agent; crewai is only imported when a crew actually needs it."""
+        from crewai import Agent
+
+        return Agent(
             name="Restaurant Recommender",
             role="A helpful AI assistant for restaurant recommendations.",
             goal="Help users find restaurants based on location and cuisine.",
@@ -12,21 +27,27 @@ class RecommendationAgent:
         )
 
     def recommend(self, location, cuisine=None):
-        """Fetch actual restaurant recommendations from the database."""
-        # print(f"Debug: Querying for location={location}, cuisine={cuisine if cuisine else 'Any'}")
-        recommendations = self.db_agent.find_restaurants(location, cuisine if cuisine else "")
-            
-        # Convert query results into a list of dictionaries
-        formatted_recommendations = [
-            {"id": r[0], "name": r[1], "location": r[2], "cuisine": r[3]} for r in recommendations
-        ]
-
-        # print(f"Debug: Recommendations fetched: {formatted_recommendations}")
-        
-        if cuisine and formatted_recommendations:
-            formatted_recommendations = [
-                r for r in formatted_recommendations if r["cuisine"].lower() == cuisine.lower()
-            ]
-
-        return formatted_recommendations if formatted_recommendations else []
-    
\ No newline at end of file
+        """The best-ranked page of recommendations from the in-memory catalog index."""
+        return self.recommend_page(location, cuisine)[0]
+
+    def resolve(self, location, cuisine=None):
+        """Canonical catalog spellings for a user-typed city and cuisine ("bombay" -> "Mumbai")."""
+        return self.catalog.resolve(location, cuisine)
+
+    def recommend_page(self, location, cuisine=None, after=None, limit=None):
+        """Returns (page, cursor); pass ``cursor`` back as ``after`` to show more."""
+        # Heap selection on the shared index; the catalog refreshes itself from the database
+        with span("catalog_lookup"):
+            self.catalog.maybe_refresh()
+            location, cuisine = self.catalog.resolve(location, cuisine)
+            return self.catalog.top(location, cuisine, limit or self.page_size, after, refresh=False)
+
+    async def arecommend(self, location, cuisine=None):
+        """Async variant of recommend that refreshes the catalog without blocking the event loop."""
+        return (await self.arecommend_page(location, cuisine))[0]
+
+    async def arecommend_page(self, location, cuisine=None, after=None, limit=None):
+        await self.catalog.amaybe_refresh()
+        with span("catalog_lookup"):
+            location, cuisine = self.catalog.resolve(location, cuisine)
+            return self.catalog.top(location, cuisine, limit or self.page_size, after, refresh=False)
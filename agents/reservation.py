@@ -1,10 +1,33 @@
-from crewai import Agent
+import logging
+import os
+from datetime import datetime
+from functools import cached_property
+
+from sqlalchemy import text
+from agents.availability import get_availability_engine
 from agents.database import DatabaseAgent
+from agents.table_assignment import make_policy
+from database.queries import CLAIM_TABLE, INSERT_RESERVATION, TABLE_SLOT_TAKEN
+from logs.logger import get_logger, log_event, span
+from settings import load_env
+
+log = get_logger("reservation")
 
 class ReservationAgent:
-    def __init__(self):
+    def __init__(self, max_booking_attempts=5, table_policy=None):
+        load_env()
         self.db_agent = DatabaseAgent()
-        self.agent = Agent(
+        self.availability = get_availability_engine()
+        # "first", "smallest" (default) or "lookahead"; see agents/table_assignment.py
+        self.table_policy = make_policy(table_policy or os.getenv("TABLE_POLICY", "smallest"), self.availability.duration_slots)
+        self.max_booking_attempts = max_booking_attempts
+
+    @cached_property
+    def agent(self):
+        """The CrewAI agent; crewai is only imported when a crew actually needs it."""
+        from crewai import Agent
+
+        return Agent(
             name="Reservation Manager",
             role="Handles restaurant reservations and availability checks.",
             goal="Ensure smooth restaurant reservations for users.",
@@ -12,31 +35,13 @@ class ReservationAgent:
         )
 
     def check_availability(self, restaurant_id, date, time, num_people):
-        """Checks if a table is available at the given restaurant, date, time, and number of people."""
-        query = """
-        SELECT id, seating_capacity 
-        FROM tables
-        WHERE restaurant_id = :restaurant_id
-        AND seating_capacity >= :num_people
-        AND is_available = TRUE
-        AND id NOT IN (
-            SELECT table_id 
-            FROM reservations 
-            WHERE restaurant_id = :restaurant_id 
-            AND reservation_time = :reservation_time
-            AND status = 'confirmed'
-        )
-        """
-        available_tables = self.db_agent.fetch(query, {
-            "id": id,
-            "restaurant_id": restaurant_id,
-            "reservation_time": f"{date} {time}",
-            "num_people": num_people
-        })
-        
-        # Convert tuples into dictionaries
-        available_tables = [{"id": table[0], "seating_capacity": table[1]} for table in available_tables]
+        """Checks if a table is free for the whole dining duration within opening hours."""
+        with span("availability_query"):
+            result = self.availability.check(restaurant_id, date, time, num_people, policy=self.table_policy)
+        if not result["open"]:
+            return {"available": False, "message": "Restaurant is closed at this time."}
 
+        available_tables = result["tables"]
         if available_tables:
             return {
                 "available": True,
@@ -45,39 +50,95 @@ class ReservationAgent:
             }
         return {"available": False, "message": "No tables available at this time."}
 
+    def find_available_slots(self, restaurants, num_people, window_start, window_end, around=None, top_k=5):
+        """Finds the ``top_k`` free slots nearest to ``around`` within a window.
+
+        ``restaurants`` is a restaurant id or a list of ids / recommendation dicts.
+        Window bounds accept datetimes or 'YYYY-MM-DD HH:MM[:SS]' strings; slots
+        in the past are never returned.
+        """
+        if not isinstance(restaurants, (list, tuple)):
+            restaurants = [restaurants]
+        restaurant_ids = [r["id"] if isinstance(r, dict) else r for r in restaurants]
+        window_start, window_end, around = (self._parse_datetime(v) for v in (window_start, window_end, around))
+        window_start = max(window_start, datetime.now())
+        if window_end < window_start:
+            return []
+        with span("slot_search", restaurants=len(restaurant_ids)):
+            return self.availability.find_slots(restaurant_ids, num_people, window_start, window_end, around=around, top_k=top_k)
+
+    @staticmethod
+    def _parse_datetime(value):
+        if isinstance(value, str):
+            return datetime.strptime(value[:16], "%Y-%m-%d %H:%M")
+        return value
+
     def book_table(self, restaurant_id, table_id, customer_name, customer_contact, num_people, date, time):
-        """Books a table for a customer at a restaurant."""
-        availability = self.check_availability(restaurant_id, date, time, num_people)
-        
-        if not availability["available"]:
-            return {"status": "failed", "message": "No available tables at this time."}
-
-        insert_query = """
-        INSERT INTO reservations (restaurant_id, table_id, customer_name, customer_contact, num_people, reservation_time, status, created_at)
-        VALUES (:restaurant_id, :table_id, :customer_name, :customer_contact, :num_people, :reservation_time, 'pending', NOW())
-        RETURNING id;
+        """Books a table for a customer at a restaurant.
+
+        The availability check and the insert run in one transaction: a free table
+        (``table_id`` if it is still free, else the assignment policy's choice) is
+        locked and claimed together. If another booking wins the slot first, the
+        next free table is tried automatically; ``attempts`` in the result counts
+        the claims made, so anything above 1 is a lost race.
         """
-        
-        reservation_id = self.db_agent.insert(insert_query, {
-            "restaurant_id": restaurant_id,
-            "table_id": table_id,
-            "customer_name": customer_name,
-            "customer_contact": customer_contact,
-            "num_people": num_people,
-            "reservation_time": f"{date} {time}"
-        })
-
-        # print(f"DEBUG: Inserted Reservation ID -> {reservation_id}")  # Debugging print
-
-        if reservation_id:
-            return {
-                "status": "success",
-                "reservation_id": reservation_id,
-                "restaurant_id": restaurant_id,
-                "table_id": table_id,
-                "customer_name": customer_name,
-                "customer_contact": customer_contact,
-                "reservation_time": f"{date} {time}"
-            }
+        reservation_time = f"{date} {time}"
+        with span("availability_query"):
+            availability = self.availability.check(restaurant_id, date, time, num_people, policy=self.table_policy)
+        if not availability["open"]:
+            return {"status": "failed", "message": "Restaurant is closed at this time."}
+        if table_id is None and availability["tables"]:
+            table_id = availability["tables"][0]["id"]
+
+        skip_table_ids = []
+        for attempt in range(1, self.max_booking_attempts + 1):
+            try:
+                with span("booking_insert"), self.db_agent.transaction() as db:
+                    table = db.execute(text(CLAIM_TABLE), {
+                        "restaurant_id": restaurant_id,
+                        "num_people": num_people,
+                        "reservation_time": reservation_time,
+                        "preferred_table_id": table_id,
+                        "skip_table_ids": skip_table_ids,
+                        "duration_minutes": self.availability.duration_minutes,
+                    }).fetchone()
+                    if table is None:
+                        return {"status": "failed", "message": "No available tables at this time.", "attempts": attempt}
+
+                    # Re-checked under the lock: the claim's snapshot may predate the last booking of this table
+                    taken = db.execute(text(TABLE_SLOT_TAKEN), {
+                        "table_id": table[0],
+                        "reservation_time": reservation_time,
+                        "duration_minutes": self.availability.duration_minutes,
+                    }).scalar()
+                    reservation_id = None if taken else db.execute(text(INSERT_RESERVATION), {
+                        "restaurant_id": restaurant_id,
+                        "table_id": table[0],
+                        "customer_name": customer_name,
+                        "customer_contact": customer_contact,
+                        "num_people": num_people,
+                        "reservation_time": reservation_time
+                    }).scalar()
+            except Exception as e:
+                log_event(log, logging.ERROR, "booking failed", restaurant_id=restaurant_id,
+                          reservation_time=reservation_time, attempt=attempt, error=repr(e))
+                return {"status": "failed", "message": "Could not complete the reservation."}
+
+            if reservation_id:
+                self.availability.record_booking(restaurant_id, date, time, table[0])
+                return {
+                    "status": "success",
+                    "reservation_id": reservation_id,
+                    "restaurant_id": restaurant_id,
+                    "table_id": table[0],
+                    "customer_name": customer_name,
+                    "customer_contact": customer_contact,
+                    "reservation_time": reservation_time,
+                    "attempts": attempt
+                }
+
+            # Lost the race for this table; retry with the next free one
+            skip_table_ids.append(table[0])
+            self.availability.invalidate(restaurant_id, date)
 
-        return {"status": "failed", "message": "Could not complete the reservation."}
\ No newline at end of file
+        return {"status": "failed", "message": "Could not complete the reservation.", "attempts": self.max_booking_attempts}
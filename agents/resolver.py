@@ -0,0 +1,194 @@
+# agents/resolver.py
+"""Maps free-form city and cuisine names to the catalog's canonical values.
+
+The LLM hands back whatever the user typed: "mumbai", "Bombay", "Mumbaai",
+"italian food". Resolution tries, in order: the normalized name, an alias,
+then the closest name by trigram similarity (the measure pg_trgm uses) and
+finally by edit distance, which catches swapped letters in short names that
+share too few trigrams. A near miss still finds restaurants instead of
+costing another chat turn.
+Exact and alias hits are dictionary lookups; fuzzy results are memoized.
+"""
+import heapq
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Names checked by edit distance when no trigram match is close enough
+EDIT_CANDIDATES = 32
+
+CITY_ALIASES = {
+    "bombay": "mumbai",
+    "bangalore": "bengaluru",
+    "bengaluru": "bangalore",
+    "madras": "chennai",
+    "calcutta": "kolkata",
+    "poona": "pune",
+    "new delhi": "delhi",
+    "ncr": "delhi",
+    "gurgaon": "gurugram",
+    "gurugram": "gurgaon",
+    "trivandrum": "thiruvananthapuram",
+    "cochin": "kochi",
+    "baroda": "vadodara",
+    "mysore": "mysuru",
+    "vizag": "visakhapatnam",
+    "nyc": "new york",
+    "sf": "san francisco",
+}
+
+CUISINE_ALIASES = {
+    "desi": "indian",
+    "north indian": "indian",
+    "punjabi": "indian",
+    "indo chinese": "chinese",
+    "chindian": "chinese",
+    "pizza": "italian",
+    "pasta": "italian",
+    "sushi": "japanese",
+    "ramen": "japanese",
+    "tacos": "mexican",
+    "burritos": "mexican",
+    "dosa": "south indian",
+    "idli": "south indian",
+    "biryani": "mughlai",
+    "kebab": "mughlai",
+    "burgers": "american",
+    "coffee": "cafe",
+}
+
+# Words that qualify a cuisine without naming it: "italian food" -> "italian"
+CUISINE_FILLER = {"food", "foods", "cuisine", "restaurant", "restaurants", "place", "places", "dishes", "style"}
+
+
+def normalize(value, filler=()):
+    """Lowercases, drops punctuation and filler words and collapses whitespace."""
+    return " ".join(word for word in WORD_RE.findall(value.lower()) if word not in filler) if value else ""
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (a swap counts as one edit), or ``limit + 1`` once exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def trigrams(value):
+    """pg_trgm-style trigrams: each word padded with two leading spaces and one trailing."""
+    grams = set()
+    for word in value.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NameResolver:
+    """Resolves names of one kind (cities or cuisines) against a fixed vocabulary."""
+
+    def __init__(self, names, aliases=None, filler=(), threshold=0.4, cache_size=4096):
+        self.filler = set(filler)
+        self.threshold = threshold
+        self.cache_size = cache_size
+        # normalized -> canonical spelling as stored in the catalog (first one seen wins)
+        self._canonical = {}
+        for name in names:
+            self._canonical.setdefault(normalize(name, self.filler), name)
+        self._aliases = {
+            normalize(alias): self._canonical[normalize(target)]
+            for alias, target in (aliases or {}).items()
+            if normalize(target) in self._canonical
+        }
+        self._grams = {key: trigrams(key) for key in self._canonical}
+        self._by_gram = {}
+        for key, grams in self._grams.items():
+            for gram in grams:
+                self._by_gram.setdefault(gram, []).append(key)
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._canonical)
+
+    def resolve(self, value):
+        """Returns the canonical name for ``value``, or None if nothing is close enough."""
+        key = normalize(value, self.filler)
+        if not key:
+            return None
+        exact = self._canonical.get(key) or self._aliases.get(key)
+        if exact is not None:
+            return exact
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        match = self._closest(key)
+        with self._lock:
+            self._memo[key] = match
+            if len(self._memo) > self.cache_size:
+                self._memo.popitem(last=False)
+        return match
+
+    def _closest(self, key):
+        grams = trigrams(key)
+        # Only names sharing at least one trigram are scored
+        shared = {}
+        for gram in grams:
+            for candidate in self._by_gram.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        best, best_score = None, self.threshold
+        for candidate, common in shared.items():
+            score = common / (len(grams) + len(self._grams[candidate]) - common)
+            if score > best_score or (score == best_score and best is not None and candidate < best):
+                best, best_score = candidate, score
+        if best is not None:
+            return self._canonical[best]
+
+        # One edit for short names, two for longer ones, among the names sharing the most trigrams
+        limit = 1 if len(key) <= 5 else 2
+        nearest = heapq.nlargest(EDIT_CANDIDATES, shared, key=shared.get)
+        distances = sorted((edit_distance(key, candidate, limit), candidate) for candidate in nearest)
+        if distances and distances[0][0] <= limit:
+            return self._canonical[distances[0][1]]
+        return None
+
+
+def load_aliases(path):
+    """Reads extra aliases from a JSON file of the form {"city": {...}, "cuisine": {...}}."""
+    if not path or not os.path.exists(path):
+        return {}, {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("city", {}), data.get("cuisine", {})
+
+
+class CatalogResolver:
+    """City and cuisine resolvers over the distinct values of one catalog snapshot."""
+
+    def __init__(self, cities, cuisines, aliases_path=None, threshold=0.4):
+        extra_cities, extra_cuisines = load_aliases(aliases_path)
+        self.cities = NameResolver(cities, {**CITY_ALIASES, **extra_cities}, threshold=threshold)
+        self.cuisines = NameResolver(
+            cuisines, {**CUISINE_ALIASES, **extra_cuisines}, filler=CUISINE_FILLER, threshold=threshold
+        )
+
+    def resolve(self, city, cuisine=None):
+        """Returns (city, cuisine) in canonical form; unresolvable values come back unchanged."""
+        return (
+            self.cities.resolve(city) or city if city else city,
+            self.cuisines.resolve(cuisine) or cuisine if cuisine else cuisine,
+        )
@@ -0,0 +1,237 @@
+# agents/state_store.py
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+def compact_state(state):
+    """Returns a JSON-serialisable copy of ``state`` with recommendations reduced to their ids."""
+    compact = {key: value for key, value in state.items() if key != "recommendations"}
+    if state.get("recommendations"):
+        compact["recommendation_ids"] = [r["id"] for r in state["recommendations"]]
+    return compact
+
+
+def expand_state(compact, catalog):
+    """Inverse of compact_state: resolves recommendation ids back to catalog records.
+
+    Restaurants that have since left the catalog are dropped, so ``catalog``
+    must be loaded first; StateStore.load and aload see to that.
+    """
+    state = {key: value for key, value in compact.items() if key != "recommendation_ids"}
+    if "recommendation_ids" in compact:
+        records = (catalog.get(restaurant_id) for restaurant_id in compact["recommendation_ids"])
+        state["recommendations"] = [record for record in records if record is not None]
+    return state
+
+
+class StateStore(ABC):
+    """Conversation state keyed by session id, stored compactly.
+
+    Backends only persist JSON strings; ``load`` returns a fresh, expanded
+    dict that callers may mutate and hand back to ``save``. Code on an event
+    loop uses ``aload``, ``asave`` and ``adelete``, which run the storage
+    calls of ``blocking`` backends in a worker thread.
+    """
+
+    # Whether _read, _write and delete block on I/O
+    blocking = False
+
+    def __init__(self, catalog=None):
+        self._catalog = catalog
+
+    @property
+    def catalog(self):
+        if self._catalog is None:
+            from agents.catalog import get_catalog
+
+            self._catalog = get_catalog()
+        return self._catalog
+
+    def load(self, session_id):
+        raw = self._read(session_id)
+        if raw is None:
+            return {}
+        compact = json.loads(raw)
+        if compact.get("recommendation_ids"):
+            # A fresh worker's catalog is still empty and would drop every stored recommendation
+            self.catalog.maybe_refresh()
+        return expand_state(compact, self.catalog)
+
+    async def aload(self, session_id):
+        """Like load, but reads the state and refreshes the catalog without blocking the event loop."""
+        raw = await self._offload(self._read, session_id)
+        if raw is None:
+            return {}
+        compact = json.loads(raw)
+        if compact.get("recommendation_ids"):
+            await self.catalog.amaybe_refresh()
+        return expand_state(compact, self.catalog)
+
+    def save(self, session_id, state):
+        self._write(session_id, json.dumps(compact_state(state), separators=(",", ":")))
+
+    async def asave(self, session_id, state):
+        await self._offload(self.save, session_id, state)
+
+    async def adelete(self, session_id):
+        await self._offload(self.delete, session_id)
+
+    async def _offload(self, func, *args):
+        if not self.blocking:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    @abstractmethod
+    def _read(self, session_id):
+        """The stored JSON string, or None if the session is unknown or expired."""
+
+    @abstractmethod
+    def _write(self, session_id, raw):
+        """Stores ``raw`` for ``session_id``, replacing any previous state."""
+
+    @abstractmethod
+    def delete(self, session_id):
+        """Forgets ``session_id``."""
+
+    @abstractmethod
+    def stats(self):
+        """Backend name and size counters, for the /metrics endpoint."""
+
+
+class MemoryStateStore(StateStore):
+    """In-process LRU with a TTL, capped by session count and by total bytes."""
+
+    def __init__(self, max_sessions=10000, max_bytes=64 * 1024 * 1024, ttl=1800.0, catalog=None, clock=time.monotonic):
+        super().__init__(catalog)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _read(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            expires_at, raw = entry
+            if expires_at <= self.clock():
+                self._drop(session_id)
+                self.expirations += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return raw
+
+    def _write(self, session_id, raw):
+        with self._lock:
+            self._drop(session_id)
+            self._sessions[session_id] = (self.clock() + self.ttl, raw)
+            self.bytes += len(raw)
+            while self._sessions and (len(self._sessions) > self.max_sessions or self.bytes > self.max_bytes):
+                self._drop(next(iter(self._sessions)))
+                self.evictions += 1
+
+    def _drop(self, session_id):
+        entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            self.bytes -= len(entry[1])
+
+    def delete(self, session_id):
+        with self._lock:
+            self._drop(session_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "bytes": self.bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteStateStore(StateStore):
+    """Sessions in a local SQLite file, so every worker on the host can serve any session.
+
+    Expired rows are purged every ``purge_every`` writes.
+    """
+
+    blocking = True
+
+    def __init__(self, path, ttl=1800.0, purge_every=500, catalog=None, clock=time.time):
+        super().__init__(catalog)
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self.clock = clock
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def _read(self, session_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state FROM sessions WHERE session_id = ? AND expires_at > ?", (session_id, self.clock())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _write(self, session_id, raw):
+        with self._lock:
+            now = self.clock()
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, state, expires_at) VALUES (?, ?, ?)",
+                (session_id, raw, now + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            self._db.commit()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            sessions, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(state)), 0) FROM sessions WHERE expires_at > ?", (self.clock(),)
+            ).fetchone()
+        return {"backend": "sqlite", "sessions": sessions, "bytes": size}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_state_store():
+    """Returns the process-wide store configured from STATE_STORE* environment variables."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            ttl = float(os.getenv("STATE_TTL", "1800"))
+            if os.getenv("STATE_STORE", "memory") == "sqlite":
+                _store = SQLiteStateStore(os.getenv("STATE_STORE_PATH", "sessions.db"), ttl=ttl)
+            else:
+                _store = MemoryStateStore(
+                    max_sessions=int(os.getenv("STATE_MAX_SESSIONS", "10000")),
+                    max_bytes=int(os.getenv("STATE_MAX_BYTES", str(64 * 1024 * 1024))),
+                    ttl=ttl,
+                )
+        return _store
@@ -0,0 +1,85 @@
+# agents/streaming.py
+import logging
+import re
+import time
+
+from logs.logger import get_logger, log_event, metrics
+from .extraction import REPLY_MARKER, parse_extraction
+from .llm_client import LLMError
+
+JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+log = get_logger("streaming")
+
+
+def _partial_marker(buffer, marker):
+    """Length of the longest suffix of ``buffer`` that is a prefix of ``marker``."""
+    for size in range(min(len(buffer), len(marker) - 1), 0, -1):
+        if marker.startswith(buffer[-size:]):
+            return size
+    return 0
+
+
+class ReplyStream:
+    """Iterates the visible reply of a streamed completion, then parses its JSON tail.
+
+    Iterate it (e.g. with ``st.write_stream``); text before ``REPLY_MARKER`` is
+    yielded as it arrives, the rest is buffered. Once exhausted, ``text`` is the
+    full reply, ``result`` the parsed extraction and ``error`` any LLMError
+    that cut the stream short.
+    """
+
+    def __init__(self, deltas, marker=REPLY_MARKER, clock=time.perf_counter):
+        self.deltas = deltas
+        self.marker = marker
+        self.clock = clock
+        self.text = ""
+        self.result = None
+        self.error = None
+        self.time_to_first_token = None
+        self.total_time = None
+
+    def __iter__(self):
+        start = self.clock()
+        buffer = ""
+        tail = []
+        in_tail = False
+        try:
+            for delta in self.deltas:
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = self.clock() - start
+                if in_tail:
+                    tail.append(delta)
+                    continue
+                buffer += delta
+                index = buffer.find(self.marker)
+                if index >= 0:
+                    in_tail = True
+                    tail.append(buffer[index + len(self.marker):])
+                    buffer = buffer[:index].rstrip()
+                else:
+                    # Hold back anything that could be the start of the marker, and
+                    # trailing whitespace that may turn out to precede it
+                    keep = _partial_marker(buffer, self.marker)
+                    visible = buffer[:len(buffer) - keep].rstrip()
+                    buffer = buffer[len(visible):]
+                    if visible:
+                        self.text += visible
+                        yield visible
+        except LLMError as e:
+            self.error = e
+            log_event(log, logging.WARNING, "reply stream failed", error=str(e))
+            return
+        finally:
+            self.total_time = self.clock() - start
+
+        if buffer:
+            self.text += buffer
+            yield buffer
+        # Without the marker the model may have answered with the JSON alone
+        match = JSON_OBJECT_RE.search("".join(tail) if in_tail else self.text)
+        self.result = parse_extraction(match.group(0) if match else None)
+        if self.time_to_first_token is not None:
+            metrics.observe("stream_first_token", self.time_to_first_token)
+        metrics.observe("stream_total", self.total_time)
+        log_event(log, logging.DEBUG, "streamed reply", ttft=self.time_to_first_token, total=self.total_time, result=self.result)
@@ -0,0 +1,72 @@
+# agents/table_assignment.py
+import numpy as np
+
+
+class FirstAvailablePolicy:
+    """Takes tables in id order, the behaviour before assignment policies existed."""
+
+    name = "first"
+
+    def rank(self, occupancy, free, first, last, num_people):
+        rows = np.flatnonzero(free)
+        return rows[np.argsort(occupancy.table_ids[rows], kind="stable")]
+
+
+class SmallestFitPolicy:
+    """Prefers the smallest table that seats the party, so big tables stay free for big parties."""
+
+    name = "smallest"
+
+    def rank(self, occupancy, free, first, last, num_people):
+        rows = np.flatnonzero(free)
+        return rows[np.lexsort((occupancy.table_ids[rows], occupancy.capacities[rows]))]
+
+
+class LookaheadPolicy:
+    """Bin-packing over the rest of the day's bookings.
+
+    Each candidate is scored by the seat-slots the booking would waste: empty
+    seats for the dining window, plus the seats of any free gap left before or
+    after it that is too short to hold another full booking. The table that
+    wastes least wins; ties go to the smaller table.
+    """
+
+    name = "lookahead"
+
+    def __init__(self, duration_slots):
+        self.duration_slots = duration_slots
+
+    def rank(self, occupancy, free, first, last, num_people):
+        rows = np.flatnonzero(free)
+        if len(rows) == 0:
+            return rows
+        busy = occupancy.busy[rows]
+        capacities = occupancy.capacities[rows].astype(np.int64)
+
+        opening_slot, closing_slot = occupancy.open_slots(first)
+        gap_before = np.zeros(len(rows), dtype=np.int64)
+        gap_after = np.zeros(len(rows), dtype=np.int64)
+        for i in range(len(rows)):
+            taken_before = np.flatnonzero(busy[i, :first])
+            gap_before[i] = first - (taken_before[-1] + 1 if len(taken_before) else opening_slot)
+            taken_after = np.flatnonzero(busy[i, last:])
+            gap_after[i] = (last + taken_after[0] if len(taken_after) else closing_slot) - last
+        gap_before = np.maximum(gap_before, 0)
+        gap_after = np.maximum(gap_after, 0)
+
+        stranded = np.where(gap_before < self.duration_slots, gap_before, 0) + np.where(gap_after < self.duration_slots, gap_after, 0)
+        waste = (capacities - num_people) * (last - first) + capacities * stranded
+        return rows[np.lexsort((occupancy.table_ids[rows], capacities, waste))]
+
+
+POLICIES = ("first", "smallest", "lookahead")
+
+
+def make_policy(name, duration_slots):
+    if name == "first":
+        return FirstAvailablePolicy()
+    if name == "smallest":
+        return SmallestFitPolicy()
+    if name == "lookahead":
+        return LookaheadPolicy(duration_slots)
+    raise ValueError(f"Unknown table assignment policy: {name}. Choose one of {POLICIES}.")
@@ -0,0 +1,206 @@
+# benchmarks/booking_load.py
+"""Simulates many users booking the same restaurants and peak slots at once.
+
+Usage: python -m benchmarks.booking_load [--users N] [--concurrency C] [--restaurant-ids ID ...]
+                                         [--date YYYY-MM-DD] [--times HH:MM ...] [--keep] [--output FILE]
+
+Every simulated user calls ReservationAgent.check_availability and, if a table
+is offered, book_table for it, like the Streamlit form does. The run reports
+bookings per second, lost-race retries, lock waits sampled from
+pg_stat_activity, DB pool saturation and latency percentiles, then audits the
+slot for overlapping bookings of a table and capacity violations. The exit
+status is 1 when the audit finds any, so it can gate a release.
+
+Runs against the database in .env; bookings made by the run are deleted
+afterwards unless --keep is given.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from benchmarks.suite import summarize
+
+PARTY_SIZES = [2, 2, 2, 3, 4, 4, 5, 6]
+
+
+def build_scenario(restaurant_ids, day, times, users, seed=7):
+    """One visit per user, all aimed at the same few restaurants and peak times."""
+    rng = random.Random(seed)
+    return [
+        {
+            "user": i,
+            "restaurant_id": rng.choice(restaurant_ids),
+            "date": day,
+            "time": rng.choice(times),
+            "num_people": rng.choice(PARTY_SIZES),
+        }
+        for i in range(users)
+    ]
+
+
+class LockWaitMonitor:
+    """Samples how many sessions wait on locks while the load runs."""
+
+    def __init__(self, db_agent, interval=0.05):
+        self.db_agent = db_agent
+        self.interval = interval
+        self.samples = 0
+        self.waiting_samples = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lock-wait-monitor", daemon=True)
+
+    def _run(self):
+        from database.queries import COUNT_LOCK_WAITS
+
+        while not self._stop.wait(self.interval):
+            waiting = self.db_agent.fetch(COUNT_LOCK_WAITS)[0][0]
+            self.samples += 1
+            self.waiting_samples += waiting > 0
+            self.peak = max(self.peak, waiting)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def stats(self):
+        return {
+            "samples": self.samples,
+            "samples_with_waiters": self.waiting_samples,
+            "peak_waiting_sessions": self.peak,
+        }
+
+
+def simulate_user(agent, visit, contact):
+    """Checks availability, then books the first offered table; returns what happened."""
+    outcome = {"restaurant_id": visit["restaurant_id"], "outcome": "error", "attempts": 0}
+    start = time.perf_counter()
+    try:
+        availability = agent.check_availability(visit["restaurant_id"], visit["date"], visit["time"], visit["num_people"])
+        outcome["check_seconds"] = time.perf_counter() - start
+        if not availability["available"]:
+            outcome["outcome"] = "full"
+            return outcome
+
+        book_start = time.perf_counter()
+        result = agent.book_table(visit["restaurant_id"], availability["available_tables"][0]["id"],
+                                  f"Load User {visit['user']}", contact, visit["num_people"], visit["date"], visit["time"])
+        outcome["book_seconds"] = time.perf_counter() - book_start
+        outcome["attempts"] = result.get("attempts", 1)
+        # A table offered by the check but gone by the time of booking
+        outcome["outcome"] = "booked" if result["status"] == "success" else "lost_race"
+    except Exception as e:
+        outcome["error"] = repr(e)
+    finally:
+        outcome["total_seconds"] = time.perf_counter() - start
+    return outcome
+
+
+def audit(db_agent, restaurant_ids, day, duration_minutes):
+    """Overlapping bookings of one table and capacity violations for ``day``."""
+    from database.queries import AUDIT_CAPACITY_VIOLATIONS, AUDIT_OVERBOOKED_TABLES
+
+    start = datetime.combine(date.fromisoformat(day), datetime.min.time())
+    params = {"restaurant_ids": list(restaurant_ids), "start": start, "end": start + timedelta(days=1)}
+    overbooked = db_agent.fetch(AUDIT_OVERBOOKED_TABLES, {**params, "duration_minutes": duration_minutes})
+    capacity = db_agent.fetch(AUDIT_CAPACITY_VIOLATIONS, params)
+    return {
+        "overbooked_pairs": [dict(row._mapping) for row in overbooked],
+        "capacity_violations": [dict(row._mapping) for row in capacity],
+    }
+
+
+def report(outcomes, wall_time, max_attempts):
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome["outcome"]] = counts.get(outcome["outcome"], 0) + 1
+    booked = counts.get("booked", 0)
+    return {
+        "users": len(outcomes),
+        "outcomes": counts,
+        "bookings_per_s": round(booked / wall_time, 2) if wall_time else 0.0,
+        "retries": sum(max(0, o["attempts"] - 1) for o in outcomes),
+        "exhausted_retries": sum(o["attempts"] >= max_attempts for o in outcomes if o["outcome"] == "lost_race"),
+        "check_availability": summarize([o["check_seconds"] for o in outcomes if "check_seconds" in o], 0, wall_time),
+        "book_table": summarize([o["book_seconds"] for o in outcomes if "book_seconds" in o], 0, wall_time),
+        "end_to_end": summarize([o["total_seconds"] for o in outcomes], counts.get("error", 0), wall_time),
+        "errors": sorted({o["error"] for o in outcomes if "error" in o})[:5],
+    }
+
+
+def run(args):
+    from sqlalchemy import text
+    from agents.reservation import ReservationAgent
+    from database.connect import pool_status
+    from database.queries import DELETE_RESERVATIONS_BY_CONTACT, LOAD_CATALOG
+
+    agent = ReservationAgent()
+    db_agent = agent.db_agent
+    restaurant_ids = args.restaurant_ids or [row.id for row in db_agent.fetch(LOAD_CATALOG)[:3]]
+    if not restaurant_ids:
+        sys.exit("The database has no restaurants; seed it with python -m benchmarks.synthetic.")
+    day = args.date or (date.today() + timedelta(days=60)).isoformat()
+    contact = f"loadtest-{uuid.uuid4().hex[:12]}"
+    scenario = build_scenario(restaurant_ids, day, args.times, args.users, args.seed)
+
+    print(f"{args.users} users on {args.concurrency} threads -> restaurants {restaurant_ids} on {day} at {args.times}")
+    try:
+        with LockWaitMonitor(db_agent) as monitor:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                outcomes = list(pool.map(lambda visit: simulate_user(agent, visit, contact), scenario))
+            wall_time = time.perf_counter() - start
+
+        results = report(outcomes, wall_time, agent.max_booking_attempts)
+        results["lock_waits"] = monitor.stats()
+        results["db_pool"] = pool_status()
+        results["audit"] = audit(db_agent, restaurant_ids, day, agent.availability.duration_minutes)
+    finally:
+        if not args.keep:
+            with db_agent.transaction() as db:
+                db.execute(text(DELETE_RESERVATIONS_BY_CONTACT), {"customer_contact": contact})
+
+    results["config"] = {
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "restaurant_ids": restaurant_ids,
+        "date": day,
+        "times": args.times,
+        "customer_contact": contact,
+    }
+    print(json.dumps(results, indent=2, default=str))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+
+    violations = len(results["audit"]["overbooked_pairs"]) + len(results["audit"]["capacity_violations"])
+    if violations:
+        print(f"AUDIT FAILED: {violations} violation(s)")
+    return 1 if violations else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=100, help="users booking at the same time")
+    parser.add_argument("--restaurant-ids", type=int, nargs="+", help="default: the first three restaurants")
+    parser.add_argument("--date", help="default: 60 days from today")
+    parser.add_argument("--times", nargs="+", default=["19:00", "19:30", "20:00"])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="keep the bookings made by the run")
+    parser.add_argument("--output")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(run(parse_args()))
@@ -0,0 +1,56 @@
+# benchmarks/catalog_memory.py
+"""Measures CatalogIndex memory and lookup latency for a synthetic catalog.
+
+Usage: python -m benchmarks.catalog_memory [num_restaurants]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from agents.catalog import CatalogIndex
+
+CITIES = [f"City {i}" for i in range(200)]
+CUISINES = ["Indian", "Chinese", "Italian", "Mexican", "Thai", "Japanese", "French", "Continental",
+            "Mughlai", "South Indian", "Bengali", "Lebanese", "Korean", "American", "Cafe"]
+
+
+def synthetic_rows(count, seed=42):
+    rng = random.Random(seed)
+    for restaurant_id in range(1, count + 1):
+        yield (restaurant_id, f"Restaurant {restaurant_id}", rng.choice(CITIES), rng.choice(CUISINES))
+
+
+def run(count=100_000):
+    # Rows are generated while tracing so the strings are counted too
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    index = CatalogIndex()
+    index.load(synthetic_rows(count))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    index_bytes = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    rng = random.Random(7)
+    queries = [(rng.choice(CITIES).upper(), rng.choice(CUISINES).lower()) for _ in range(1000)]
+    start = time.perf_counter()
+    results = sum(len(index.lookup(city, cuisine)) for city, cuisine in queries)
+    lookup_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+    start = time.perf_counter()
+    city_results = sum(len(index.lookup(city)) for city in CITIES)
+    city_lookup_us = (time.perf_counter() - start) / len(CITIES) * 1e6
+
+    return {
+        "restaurants": count,
+        "index_mb": round(index_bytes / 1024 / 1024, 1),
+        "bytes_per_restaurant": round(index_bytes / count),
+        "city_cuisine_lookup_us": round(lookup_us, 1),
+        "avg_city_cuisine_results": round(results / len(queries), 1),
+        "city_lookup_us": round(city_lookup_us, 1),
+        "avg_city_results": round(city_results / len(CITIES), 1),
+    }
+
+
+if __name__ == "__main__":
+    print(run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -0,0 +1,170 @@
+# benchmarks/fake_groq.py
+"""A local stand-in for Groq's chat-completions endpoint.
+
+Answers the prompts used by agents/chat.py with plausible JSON: the intent is
+'reservation' when the user input mentions booking, otherwise 'restaurants';
+city and cuisine are picked out of the input by name. Latency, jitter and an
+error rate can be configured to exercise timeouts, retries and the breaker.
+
+Usage: python -m benchmarks.fake_groq [port] [latency_ms] [error_rate]
+"""
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agents.extraction import REPLY_MARKER
+
+USER_INPUT_RE = re.compile(r"User input:\s*(.*)$", re.DOTALL)
+RESERVATION_RE = re.compile(r"\b(book|booking|reserve|reservation|table for)\b", re.IGNORECASE)
+
+
+class FakeGroqServer:
+    """Threaded fake server; use as a context manager or call start()/stop()."""
+
+    def __init__(self, cities=(), cuisines=(), latency=0.05, jitter=0.0, error_rate=0.0,
+                 error_status=503, host="127.0.0.1", port=0, seed=0):
+        self.cities = list(cities)
+        self.cuisines = list(cuisines)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/openai/v1/chat/completions"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-groq", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors}
+
+    # -- answering ----------------------------------------------------------
+
+    def _find(self, text, names):
+        lowered = text.lower()
+        return next((name for name in names if name.lower() in lowered), None)
+
+    def answer(self, prompt):
+        """Returns (content, extraction) for a prompt built by agents/chat.py."""
+        match = USER_INPUT_RE.search(prompt)
+        user_input = match.group(1) if match else prompt
+        extraction = {
+            "intent": "reservation" if RESERVATION_RE.search(user_input) else "restaurants",
+            "city": self._find(user_input, self.cities),
+            "cuisine": self._find(user_input, self.cuisines),
+            "restaurant_name": None,
+            "date": None,
+            "time": None,
+            "num_people": None,
+        }
+        if "ONLY determine" in prompt:
+            return json.dumps({"intent": extraction["intent"]}), extraction
+        if "'city', 'cuisine'" in prompt:
+            return json.dumps({"city": extraction["city"], "cuisine": extraction["cuisine"]}), extraction
+        return json.dumps(extraction), extraction
+
+    def _delay(self):
+        with self._lock:
+            delay = max(0.0, self.rng.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+            fail = self.rng.random() < self.error_rate
+            self.requests += 1
+            self.errors += fail
+        return delay, fail
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                delay, fail = fake._delay()
+                if fail:
+                    time.sleep(delay / 2)
+                    self._send_json(fake.error_status, {"error": {"message": "injected failure"}})
+                    return
+
+                prompt = payload.get("messages", [{}])[-1].get("content", "")
+                content, extraction = fake.answer(prompt)
+                if payload.get("stream"):
+                    self._stream(extraction, delay)
+                    return
+                time.sleep(delay)
+                self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": content}}]})
+
+            def _send_json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, extraction, delay):
+                words = ["Sure,", " let", " me", " look", " that", " up."]
+                deltas = words + [f"\n{REPLY_MARKER}\n", json.dumps(extraction)]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                # The first token arrives after a fraction of the full latency
+                time.sleep(delay / 4)
+                for delta in deltas:
+                    chunk = {"choices": [{"delta": {"content": delta}}]}
+                    self._chunk(f"data: {json.dumps(chunk)}\n\n")
+                    time.sleep(delay * 0.75 / len(deltas))
+                self._chunk("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _chunk(self, text):
+                data = text.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    from benchmarks.synthetic import CUISINES, city_names
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8787
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+    error_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    server = FakeGroqServer(city_names(50), CUISINES, latency=latency, error_rate=error_rate, port=port)
+    print(f"Fake Groq listening on {server.url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.server.server_close()
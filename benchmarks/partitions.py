@@ -0,0 +1,159 @@
+# benchmarks/partitions.py
+"""Availability query latency as reservation history grows.
+
+Usage: python -m benchmarks.partitions [--seed-db] [--rows N] [--checkpoints K] [--queries Q] [--output FILE]
+
+Adds ``--rows`` historical reservations to the configured database in
+``--checkpoints`` steps, going back in time from yesterday. After each step it
+times LOAD_RESERVATIONS_BETWEEN and CLAIM_TABLE for upcoming dates and records
+how many reservation partitions each plan touches. With the partitioned
+layout (``python -m database.schema create``) both should stay flat up to 10M
+rows and beyond. Use a scratch database: --seed-db truncates every table and
+takes the sizing flags of benchmarks/synthetic.py.
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+from benchmarks.suite import summarize
+from benchmarks.synthetic import parse_args as synthetic_args
+
+# GENERATE_RESERVATION_HISTORY books each table four times a day
+BOOKINGS_PER_TABLE_DAY = 4
+
+
+def relations(plan):
+    """Names of every relation scanned anywhere in an EXPLAIN (FORMAT JSON) plan."""
+    names = set()
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if "Relation Name" in node:
+            names.add(node["Relation Name"])
+        stack.extend(node.get("Plans", ()))
+    return names
+
+
+def partitions_scanned(db, query, params):
+    plan = db.execute(text("EXPLAIN (FORMAT JSON) " + query), params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return len({name for name in relations(plan[0]["Plan"]) if name.startswith("reservations")})
+
+
+def probes(rng, restaurant_range, count, today):
+    """Random (restaurant, upcoming day) pairs; the same for every checkpoint."""
+    first, last = restaurant_range
+    return [(rng.randint(first, last), today + timedelta(days=rng.randint(1, 14))) for _ in range(count)]
+
+
+def measure(db_agent, calls, duration_minutes):
+    from database.queries import CLAIM_TABLE, LOAD_RESERVATIONS_BETWEEN
+
+    queries = {
+        "load_reservations": lambda restaurant_id, day: (LOAD_RESERVATIONS_BETWEEN, {
+            "restaurant_id": restaurant_id, "start": day, "end": day + timedelta(days=1),
+        }),
+        "claim_table": lambda restaurant_id, day: (CLAIM_TABLE, {
+            "restaurant_id": restaurant_id, "num_people": 2, "reservation_time": f"{day} 19:00",
+            "preferred_table_id": -1, "skip_table_ids": [], "duration_minutes": duration_minutes,
+        }),
+    }
+    results = {}
+    for name, build in queries.items():
+        latencies = []
+        start = time.perf_counter()
+        for restaurant_id, day in calls:
+            query, params = build(restaurant_id, day)
+            began = time.perf_counter()
+            db_agent.fetch(query, params)
+            latencies.append(time.perf_counter() - began)
+        results[name] = summarize(latencies, 0, time.perf_counter() - start)
+        with db_agent.transaction() as db:
+            results[name]["partitions_scanned"] = partitions_scanned(db, *build(*calls[0]))
+    return results
+
+
+def run(args):
+    from agents.database import DatabaseAgent
+    from benchmarks.synthetic import SyntheticDataset, seed_database
+    from database import schema
+    from database.queries import COUNT_RESERVATIONS, COUNT_TABLES, DINING_DURATION_MINUTES, GENERATE_RESERVATION_HISTORY
+
+    db_agent = DatabaseAgent()
+    today = date.today()
+    if args.seed_db:
+        with db_agent.transaction() as db:
+            schema.create_schema(db)
+        # Restaurants and tables only; the history is generated below
+        dataset = SyntheticDataset(args.cities, args.restaurants, args.tables, 0, 0, args.seed, today)
+        print(f"Seeding: {seed_database(db_agent, dataset, reset=True)}")
+
+    with db_agent.transaction() as db:
+        partitioned = schema.is_partitioned(db)
+        tables, first_restaurant, last_restaurant = db.execute(text(COUNT_TABLES)).fetchone()
+    if not tables:
+        sys.exit("The database has no tables; rerun with --seed-db.")
+    print(f"Layout: {'partitioned' if partitioned else 'unpartitioned'}, {tables} tables")
+
+    rows_per_day = tables * BOOKINGS_PER_TABLE_DAY
+    days_per_step = max(1, math.ceil(args.rows / args.checkpoints / rows_per_day))
+    calls = probes(random.Random(args.rng_seed), (first_restaurant, last_restaurant), args.queries, today)
+
+    checkpoints = []
+    end = datetime.combine(today, datetime.min.time())
+    for step in range(args.checkpoints + 1):
+        if step:
+            start = end - timedelta(days=days_per_step)
+            began = time.perf_counter()
+            with db_agent.transaction() as db:
+                db.execute(text("SET LOCAL statement_timeout = 0"))
+                if partitioned:
+                    schema.ensure_partitions(db, start.date(), end.date())
+                db.execute(text(GENERATE_RESERVATION_HISTORY), {"start": start, "end": end})
+            with db_agent.transaction() as db:
+                db.execute(text("ANALYZE reservations"))
+            print(f"Added {days_per_step} days of history in {time.perf_counter() - began:.1f}s")
+            end = start
+        with db_agent.transaction() as db:
+            total = db.execute(text(COUNT_RESERVATIONS)).scalar()
+        results = measure(db_agent, calls, DINING_DURATION_MINUTES)
+        checkpoints.append({"reservations": total, **results})
+        print(f"{total:>12,} rows  " + "  ".join(
+            f"{name} p50 {r['p50_ms']}ms p95 {r['p95_ms']}ms ({r['partitions_scanned']} partitions)"
+            for name, r in results.items()
+        ))
+
+    report = {"partitioned": partitioned, "tables": tables, "checkpoints": checkpoints}
+    for name in ("load_reservations", "claim_table"):
+        first, last = checkpoints[0][name]["p95_ms"], checkpoints[-1][name]["p95_ms"]
+        report[f"{name}_p95_growth"] = round(last / first, 2) if first else None
+        print(f"{name}: p95 {first}ms -> {last}ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.partitions", allow_abbrev=False)
+    parser.add_argument("--seed-db", action="store_true", help="create the schema, reset and seed restaurants and tables")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="historical reservations to add")
+    parser.add_argument("--checkpoints", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200, help="queries timed per checkpoint")
+    parser.add_argument("--rng-seed", type=int, default=7)
+    parser.add_argument("--output")
+    args, rest = parser.parse_known_args(argv)
+    vars(args).update(vars(synthetic_args(rest)))
+    run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
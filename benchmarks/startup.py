@@ -0,0 +1,106 @@
+# benchmarks/startup.py
+"""Measures cold-start cost: module import time and the first chat turn.
+
+Usage: python -m benchmarks.startup [--repeat N] [--output FILE]
+
+Every measurement runs in a fresh interpreter, so nothing is already
+imported or cached. The first-turn probe talks to a local FakeGroqServer
+and sends a reservation request, which needs no database, so it runs
+without Postgres, a Groq key or a .env.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["agents.chat", "main", "frontend.api_client"]
+FIRST_TURN_MESSAGE = "Book a table for 2 tomorrow at 7pm"
+
+
+def _run(args, env=None):
+    result = subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, **(env or {})},
+    )
+    return result
+
+
+def import_seconds(module):
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    return float(_run(["-c", code]).stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module, top=10):
+    """The ``top`` imports by cumulative time, from ``python -X importtime``."""
+    stderr = _run(["-X", "importtime", "-c", f"import {module}"]).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative), name.strip()))
+    entries.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for us, name in entries[:top]]
+
+
+def first_turn():
+    """Runs in the child: times importing ChatAgent, building it and two chat turns."""
+    from benchmarks.fake_groq import FakeGroqServer
+
+    timings = {}
+    with FakeGroqServer(latency=0.0) as fake:
+        os.environ.update(GROQ_API_KEY="fake-key", GROQ_API_URL=fake.url, STATE_STORE="memory")
+        start = time.perf_counter()
+        from agents.chat import ChatAgent
+        timings["import_s"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        chat_agent = ChatAgent()
+        timings["init_s"] = time.perf_counter() - start
+
+        for name in ("first_turn_s", "second_turn_s"):
+            start = time.perf_counter()
+            result = chat_agent.extract_intent(FIRST_TURN_MESSAGE)
+            timings[name] = time.perf_counter() - start
+        timings["intent"] = result.get("intent")
+    print(json.dumps(timings))
+
+
+def first_turn_seconds():
+    # A zero-sized LLM cache keeps the second turn honest: it pays for the round trip too
+    stdout = _run(["-m", "benchmarks.startup", "--child"], env={"LLM_CACHE_SIZE": "0"}).stdout
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def run(repeat):
+    results = {"imports": {}, "first_turn": {}}
+    for module in MODULES:
+        samples = [import_seconds(module) for _ in range(repeat)]
+        results["imports"][module] = {"median_ms": round(1000 * statistics.median(samples), 1),
+                                      "max_ms": round(1000 * max(samples), 1)}
+    turns = [first_turn_seconds() for _ in range(repeat)]
+    for key in ("import_s", "init_s", "first_turn_s", "second_turn_s"):
+        results["first_turn"][key.replace("_s", "_ms")] = round(1000 * statistics.median(t[key] for t in turns), 1)
+    results["first_turn"]["intent"] = turns[-1]["intent"]
+    results["slowest_imports"] = slowest_imports(MODULES[0])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        first_turn()
+        sys.exit(0)
+    report = run(args.repeat)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,226 @@
+# benchmarks/suite.py
+"""End-to-end benchmark of the chat, recommendation and reservation paths.
+
+Usage:
+    python -m benchmarks.suite run [--seed-db] [--iterations N] [--concurrency C] [--output FILE]
+    python -m benchmarks.suite compare OLD.json NEW.json [--threshold 0.10]
+
+``run`` points ChatAgent at a local FakeGroqServer, so no Groq key is needed;
+the database is the one configured in .env (seed it with --seed-db, which
+takes the same sizing flags as benchmarks/synthetic.py). Results are written
+as JSON keyed by operation, next to the git commit they were measured on.
+``compare`` exits with status 1 when any operation's p95 regressed by more
+than ``--threshold``.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from benchmarks.fake_groq import FakeGroqServer
+from benchmarks.synthetic import CUISINES, dataset_from_args, parse_args as synthetic_args, seed_database
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list (0 < q <= 1)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(q * len(sorted_values) + 0.5 - 1e-9))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, errors, wall_time):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "count": count,
+        "errors": errors,
+        "throughput_per_s": round(count / wall_time, 2) if wall_time else 0.0,
+        "mean_ms": round(1000 * sum(latencies) / count, 3) if count else 0.0,
+        "p50_ms": round(1000 * percentile(latencies, 0.50), 3),
+        "p95_ms": round(1000 * percentile(latencies, 0.95), 3),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 3),
+        "max_ms": round(1000 * latencies[-1], 3) if count else 0.0,
+    }
+
+
+def measure(operation, calls, concurrency):
+    """Runs ``operation(arg)`` for every arg in ``calls`` on ``concurrency`` threads."""
+
+    def timed(arg):
+        start = time.perf_counter()
+        try:
+            operation(arg)
+            failed = False
+        except Exception:
+            failed = True
+        return time.perf_counter() - start, failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, calls))
+    wall_time = time.perf_counter() - start
+    return summarize([elapsed for elapsed, _ in outcomes], sum(failed for _, failed in outcomes), wall_time)
+
+
+def compare(old, new, threshold=0.10):
+    """Returns one line per operation whose p95 grew by more than ``threshold``."""
+    regressions = []
+    for name, result in new["results"].items():
+        baseline = old["results"].get(name)
+        if not baseline or not baseline["p95_ms"]:
+            continue
+        change = result["p95_ms"] / baseline["p95_ms"] - 1
+        if change > threshold:
+            regressions.append(f"{name}: p95 {baseline['p95_ms']}ms -> {result['p95_ms']}ms (+{change:.0%})")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _workload(chat_agent, restaurants, rng, iterations):
+    """Argument lists for each benchmarked operation, drawn from the seeded catalog."""
+    cities = sorted({row.location for row in restaurants})
+    by_id = [row.id for row in restaurants]
+    day = (date.today() + timedelta(days=1)).isoformat()
+    messages = [
+        f"Can you book a table for {rng.randint(2, 6)} at a {rng.choice(CUISINES)} place in {rng.choice(cities)} tomorrow?"
+        if i % 2 else f"Suggest some {rng.choice(CUISINES)} restaurants in {rng.choice(cities)}"
+        for i in range(iterations)
+    ]
+    reservations = chat_agent.reservation_agent
+    recommendations = chat_agent.recommendation_agent
+    # Each booking gets its own restaurant and hour so the run measures inserts, not conflicts
+    bookings = [(by_id[i % len(by_id)], f"{12 + i // len(by_id) % 10}:00") for i in range(iterations)]
+    return {
+        "extract_intent": (
+            lambda message: chat_agent.extract_intent(message, uuid.uuid4().hex),
+            messages,
+        ),
+        "recommend": (
+            lambda args: recommendations.recommend(*args),
+            [(rng.choice(cities), rng.choice(CUISINES + [None])) for _ in range(iterations)],
+        ),
+        "check_availability": (
+            lambda args: reservations.check_availability(args[0], day, args[1], 2),
+            [(rng.choice(by_id), f"{rng.randint(12, 21)}:00") for _ in range(iterations)],
+        ),
+        "book_table": (
+            lambda args: reservations.book_table(args[0], None, "Benchmark", "bench@example.com", 2, day, args[1]),
+            bookings,
+        ),
+    }
+
+
+def run(args):
+    from agents.database import DatabaseAgent
+    from database.queries import LOAD_CATALOG
+
+    if args.seed_db:
+        print(f"Seeding: {seed_database(DatabaseAgent(), dataset_from_args(args), reset=True)}")
+    restaurants = DatabaseAgent().fetch(LOAD_CATALOG)
+    if not restaurants:
+        sys.exit("The database has no restaurants; rerun with --seed-db.")
+    cities = sorted({row.location for row in restaurants})
+
+    fake = FakeGroqServer(cities, CUISINES, latency=args.llm_latency / 1000, jitter=args.llm_jitter / 1000,
+                          error_rate=args.llm_error_rate, seed=args.rng_seed).start()
+    os.environ["GROQ_API_KEY"] = "fake-key"
+    os.environ["GROQ_API_URL"] = fake.url
+    # Measure the agents, not the Groq rate limits, unless limits were set explicitly
+    os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "0")
+    os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "0")
+    from agents.chat import ChatAgent
+    from agents.llm_cache import CompletionCache
+    from logs.logger import metrics
+
+    try:
+        chat_agent = ChatAgent()
+        if not args.cache:
+            # Measure the model path, not repeated prompt hits
+            chat_agent.llm_cache = CompletionCache(max_entries=0)
+        metrics.reset()
+        workload = _workload(chat_agent, restaurants, random.Random(args.rng_seed), args.iterations)
+        results = {}
+        for name in args.operations:
+            operation, calls = workload[name]
+            results[name] = measure(operation, calls, args.concurrency)
+            print(f"{name:20} {results[name]}")
+        fake_stats = fake.stats()
+    finally:
+        fake.stop()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "llm_latency_ms": args.llm_latency,
+            "llm_jitter_ms": args.llm_jitter,
+            "llm_error_rate": args.llm_error_rate,
+            "cache": args.cache,
+            "restaurants": len(restaurants),
+        },
+        "fake_groq": fake_stats,
+        "results": results,
+        "stages": metrics.snapshot(),
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit'] or 'latest'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["compare"]:
+        parser = argparse.ArgumentParser(prog="benchmarks.suite compare")
+        parser.add_argument("old")
+        parser.add_argument("new")
+        parser.add_argument("--threshold", type=float, default=0.10)
+        args = parser.parse_args(argv[1:])
+        with open(args.old, encoding="utf-8") as f:
+            old = json.load(f)
+        with open(args.new, encoding="utf-8") as f:
+            new = json.load(f)
+        regressions = compare(old, new, args.threshold)
+        print("\n".join(regressions) or "No p95 regressions.")
+        return 1 if regressions else 0
+
+    operations = ["extract_intent", "recommend", "check_availability", "book_table"]
+    run_argv = argv[1:] if argv[:1] == ["run"] else argv
+    parser = argparse.ArgumentParser(prog="benchmarks.suite run", allow_abbrev=False)
+    parser.add_argument("--seed-db", action="store_true", help="reset and seed the database first")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--operations", nargs="+", choices=operations, default=operations)
+    parser.add_argument("--llm-latency", type=float, default=50.0, help="fake Groq latency in ms")
+    parser.add_argument("--llm-jitter", type=float, default=10.0, help="fake Groq latency stddev in ms")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--cache", action="store_true", help="keep the LLM completion cache enabled")
+    parser.add_argument("--rng-seed", type=int, default=7)
+    parser.add_argument("--output")
+    args, rest = parser.parse_known_args(run_argv)
+    # Remaining flags size the synthetic dataset for --seed-db
+    vars(args).update(vars(synthetic_args(rest)))
+    run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
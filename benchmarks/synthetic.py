@@ -0,0 +1,154 @@
+# benchmarks/synthetic.py
+"""Generates a synthetic catalog with table inventory and reservation history.
+
+Usage: python -m benchmarks.synthetic [--cities N] [--restaurants M] [--tables T] [--months K] [--reset]
+
+Everything is derived from ``--seed``, so two runs with the same arguments
+load identical data. Reservations never overlap on a table, so the data also
+satisfies the reservations_no_overlap constraint.
+"""
+import argparse
+import random
+import time as clock
+from datetime import date, datetime, time, timedelta
+
+from database.queries import DINING_DURATION_MINUTES
+
+CUISINES = ["Indian", "Chinese", "Italian", "Mexican", "Thai", "Japanese", "French", "Continental",
+            "Mughlai", "South Indian", "Bengali", "Lebanese", "Korean", "American", "Cafe"]
+CAPACITIES = [2, 2, 4, 4, 4, 6, 8]
+HOURS = [(time(11, 0), time(23, 0)), (time(12, 0), time(22, 30)), (time(17, 0), time(23, 30))]
+# Start times at least one dining duration apart, so bookings of a table never overlap
+START_TIMES = [time(12, 0), time(13, 30), time(15, 0), time(17, 30), time(19, 0), time(20, 30)]
+STATUSES = ["confirmed"] * 8 + ["cancelled"]
+BATCH_SIZE = 5000
+
+
+def city_names(count):
+    return [f"City {i}" for i in range(1, count + 1)]
+
+
+class SyntheticDataset:
+    """Deterministic rows for the restaurants, tables and reservations tables."""
+
+    def __init__(self, cities=20, restaurants=2000, tables_per_restaurant=8, months=3,
+                 bookings_per_table_day=1.5, seed=42, today=None):
+        self.cities = city_names(cities)
+        self.restaurants = restaurants
+        self.tables_per_restaurant = tables_per_restaurant
+        self.days = months * 30
+        self.bookings_per_table_day = bookings_per_table_day
+        self.seed = seed
+        self.today = today or date.today()
+
+    def restaurant_rows(self):
+        rng = random.Random(self.seed)
+        for restaurant_id in range(1, self.restaurants + 1):
+            opening, closing = rng.choice(HOURS)
+            yield {
+                "id": restaurant_id,
+                "name": f"Restaurant {restaurant_id}",
+                "location": rng.choice(self.cities),
+                "cuisine": rng.choice(CUISINES),
+                "contact": f"+91-{rng.randrange(10 ** 9, 10 ** 10)}",
+                "opening_time": opening,
+                "closing_time": closing,
+            }
+
+    def table_rows(self):
+        rng = random.Random(self.seed + 1)
+        table_id = 0
+        for restaurant_id in range(1, self.restaurants + 1):
+            for _ in range(self.tables_per_restaurant):
+                table_id += 1
+                yield {"id": table_id, "restaurant_id": restaurant_id, "seating_capacity": rng.choice(CAPACITIES)}
+
+    def reservation_rows(self):
+        """Past reservations over the last ``months``, generated table by table."""
+        rng = random.Random(self.seed + 2)
+        per_day = min(self.bookings_per_table_day, len(START_TIMES))
+        for table in self.table_rows():
+            for offset in range(self.days, 0, -1):
+                day = self.today - timedelta(days=offset)
+                count = int(per_day) + (rng.random() < per_day - int(per_day))
+                for start in sorted(rng.sample(START_TIMES, count)):
+                    yield {
+                        "restaurant_id": table["restaurant_id"],
+                        "table_id": table["id"],
+                        "customer_name": f"Guest {rng.randrange(1, 100000)}",
+                        "customer_contact": f"guest{rng.randrange(1, 100000)}@example.com",
+                        "num_people": rng.randint(1, table["seating_capacity"]),
+                        "reservation_time": datetime.combine(day, start),
+                        "status": rng.choice(STATUSES),
+                    }
+
+    def sizes(self):
+        tables = self.restaurants * self.tables_per_restaurant
+        return {
+            "restaurants": self.restaurants,
+            "tables": tables,
+            "reservations_estimate": round(tables * self.days * self.bookings_per_table_day),
+        }
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed_database(db_agent, dataset, reset=False, batch_size=BATCH_SIZE):
+    """Loads ``dataset`` with batched executemany inserts; returns rows loaded per table and timing."""
+    from sqlalchemy import text
+    from database.queries import RESET_SEQUENCES, SEED_RESERVATION, SEED_RESTAURANT, SEED_TABLE, TRUNCATE_ALL
+
+    start = clock.perf_counter()
+    loaded = {}
+    if reset:
+        with db_agent.transaction() as db:
+            db.execute(text(TRUNCATE_ALL))
+    for name, query, rows in (
+        ("restaurants", SEED_RESTAURANT, dataset.restaurant_rows()),
+        ("tables", SEED_TABLE, dataset.table_rows()),
+        ("reservations", SEED_RESERVATION, dataset.reservation_rows()),
+    ):
+        loaded[name] = 0
+        for batch in _batches(rows, batch_size):
+            # One transaction per batch keeps memory and lock time bounded
+            with db_agent.transaction() as db:
+                db.execute(text(query), batch)
+            loaded[name] += len(batch)
+    with db_agent.transaction() as db:
+        db.execute(text(RESET_SEQUENCES))
+    loaded["seconds"] = round(clock.perf_counter() - start, 1)
+    return loaded
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--restaurants", type=int, default=2000)
+    parser.add_argument("--tables", type=int, default=8, help="tables per restaurant")
+    parser.add_argument("--months", type=int, default=3, help="months of reservation history")
+    parser.add_argument("--bookings", type=float, default=1.5, help="average bookings per table per day")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="truncate all three tables first")
+    return parser.parse_args(argv)
+
+
+def dataset_from_args(args):
+    return SyntheticDataset(args.cities, args.restaurants, args.tables, args.months, args.bookings, args.seed)
+
+
+if __name__ == "__main__":
+    from agents.database import DatabaseAgent
+
+    args = parse_args()
+    dataset = dataset_from_args(args)
+    print(f"Generating {dataset.sizes()} (dining duration {DINING_DURATION_MINUTES} min)")
+    print(seed_database(DatabaseAgent(), dataset, reset=args.reset))
@@ -0,0 +1,82 @@
+# benchmarks/table_assignment.py
+"""Replays synthetic days of booking requests against each table assignment policy.
+
+Usage: python -m benchmarks.table_assignment [days] [requests_per_day]
+
+Requests arrive in random order (as bookings are made ahead of service) and ask
+for a start time clustered around the dinner peak. A request is seated if any
+table fits for the whole dining duration, using the policy to pick the table.
+"""
+import random
+import sys
+from datetime import time
+
+from agents.availability import DayOccupancy, SLOT_MINUTES, minutes_of, slot_range
+from agents.table_assignment import POLICIES, make_policy
+from database.queries import DINING_DURATION_MINUTES
+
+# (seating_capacity, count)
+FLOOR_PLAN = [(2, 6), (4, 8), (6, 3), (8, 2)]
+PARTY_SIZES = [1, 2, 2, 2, 3, 4, 4, 4, 5, 6, 6, 7, 8]
+OPENING, CLOSING = time(12, 0), time(23, 0)
+DURATION_SLOTS = -(-DINING_DURATION_MINUTES // SLOT_MINUTES)
+
+
+def synthetic_day(rng, count):
+    requests = []
+    for _ in range(count):
+        peak = rng.random() < 0.7
+        minute = int(rng.gauss(19.5 * 60, 60)) if peak else int(rng.gauss(13.5 * 60, 45))
+        minute = max(12 * 60, min(21 * 60 + 30, minute)) // SLOT_MINUTES * SLOT_MINUTES
+        requests.append((minute, rng.choice(PARTY_SIZES)))
+    return requests
+
+
+def new_floor():
+    # Table ids are not ordered by size on a real floor plan
+    capacities = [capacity for capacity, count in FLOOR_PLAN for _ in range(count)]
+    random.Random(0).shuffle(capacities)
+    ids = list(range(1, len(capacities) + 1))
+    return DayOccupancy(ids, capacities, [True] * len(ids), minutes_of(OPENING), minutes_of(CLOSING), DURATION_SLOTS, 0)
+
+
+def replay(policy_name, requests):
+    occupancy = new_floor()
+    policy = make_policy(policy_name, DURATION_SLOTS)
+    seated = covers = 0
+    for minute, party in requests:
+        first, last = slot_range(minute, DINING_DURATION_MINUTES)
+        free = occupancy.free_tables(first, last, party)
+        rows = policy.rank(occupancy, free, first, last, party)
+        if len(rows):
+            occupancy.busy[rows[0], first:last] = True
+            seated += 1
+            covers += party
+    return seated, covers
+
+
+def run(days=50, requests_per_day=120, seed=1):
+    rng = random.Random(seed)
+    day_requests = [synthetic_day(rng, requests_per_day) for _ in range(days)]
+    total_requests = days * requests_per_day
+    total_party = sum(party for requests in day_requests for _, party in requests)
+    report = {}
+    for name in POLICIES:
+        seated = covers = 0
+        for requests in day_requests:
+            s, c = replay(name, requests)
+            seated += s
+            covers += c
+        report[name] = {
+            "covers_per_day": round(covers / days, 1),
+            "rejection_rate": round(1 - seated / total_requests, 4),
+            "covers_share": round(covers / total_party, 4),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    for name, row in run(days, per_day).items():
+        print(f"{name:10s} {row}")
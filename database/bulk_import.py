@@ -0,0 +1,342 @@
+# database/bulk_import.py
+"""Streams restaurant and table inventories from CSV or JSONL files into the database.
+
+Usage: python -m database.bulk_import [--restaurants FILE] [--tables FILE] [--chunk-size N] [--max-errors N] [--validate-only]
+
+Files are read and validated ``--chunk-size`` rows at a time, so memory stays
+flat however large they are. Each chunk is COPYed into a temporary staging
+table and upserted on its natural key in its own transaction: restaurants
+on (name, location), tables on (restaurant, table_number). Re-running an
+import leaves unchanged rows untouched. Restaurants load before tables, and
+a table row names its restaurant by ``restaurant_name`` and ``location``.
+
+Existing tables without a number are numbered 1, 2, ... per restaurant in id
+order before the first import, so an inventory file for them should use the
+same numbers; any other number adds a table. Once done, every running
+process reloads its recommendation catalog.
+
+CSV files need a header row; JSONL files hold one object per line. Both use
+the column names of the restaurants and tables tables.
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import time
+from datetime import time as clock_time
+
+from sqlalchemy import text
+
+from logs.logger import get_logger, log_event
+
+CHUNK_SIZE = 50_000
+# Error messages kept for the report; the rest are only counted
+ERROR_SAMPLE = 20
+
+log = get_logger("bulk_import")
+
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+FALSE_VALUES = {"0", "false", "f", "no", "n"}
+
+
+class TooManyErrors(ValueError):
+    """Raised when a file has more invalid rows than ``max_errors``."""
+
+
+def iter_records(path):
+    """Yields (line number, record dict) from a .csv, .jsonl or .ndjson file, one line at a time.
+
+    A JSONL line that is not a JSON object is yielded as a string, for validation to reject.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if extension == ".csv":
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        elif extension in (".jsonl", ".ndjson"):
+            for line, raw in enumerate(f, start=1):
+                if not raw.strip():
+                    continue
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    record = raw
+                yield line, record
+        else:
+            raise ValueError(f"Unsupported file type {extension!r}; use .csv or .jsonl")
+
+
+def _text(record, field, limit, required=False):
+    value = record.get(field)
+    value = "" if value is None else str(value).strip()
+    if not value:
+        if required:
+            raise ValueError(f"{field} is required")
+        return None
+    if len(value) > limit:
+        raise ValueError(f"{field} is longer than {limit} characters")
+    return value
+
+
+def _time(record, field):
+    value = _text(record, field, 8)
+    try:
+        return None if value is None else clock_time.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{field} must be HH:MM or HH:MM:SS, got {value!r}") from None
+
+
+def _int(record, field, minimum):
+    value = record.get(field)
+    if isinstance(value, bool) or value is None or str(value).strip() == "":
+        raise ValueError(f"{field} must be a whole number")
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{field} must be a whole number, got {value!r}") from None
+    if number < minimum:
+        raise ValueError(f"{field} must be at least {minimum}")
+    return number
+
+
+def _bool(record, field, default):
+    value = record.get(field)
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    lowered = str(value).strip().lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    raise ValueError(f"{field} must be true or false, got {value!r}")
+
+
+def _require_object(record):
+    if not isinstance(record, dict):
+        raise ValueError("not a JSON object")
+
+
+def validate_restaurant(record):
+    """A restaurants row from ``record``; raises ValueError naming the first bad field."""
+    _require_object(record)
+    return {
+        "name": _text(record, "name", 255, required=True),
+        "location": _text(record, "location", 255, required=True),
+        "cuisine": _text(record, "cuisine", 100),
+        "contact": _text(record, "contact", 50),
+        "opening_time": _time(record, "opening_time"),
+        "closing_time": _time(record, "closing_time"),
+    }
+
+
+def validate_table(record):
+    """A tables row from ``record``; raises ValueError naming the first bad field."""
+    _require_object(record)
+    return {
+        "restaurant_name": _text(record, "restaurant_name", 255, required=True),
+        "location": _text(record, "location", 255, required=True),
+        "table_number": _int(record, "table_number", 1),
+        "seating_capacity": _int(record, "seating_capacity", 1),
+        "is_available": _bool(record, "is_available", True),
+    }
+
+
+class ImportReport:
+    """Row counts and throughput of one file."""
+
+    def __init__(self, kind, path):
+        self.kind = kind
+        self.path = path
+        self.read = 0
+        self.written = 0
+        self.unchanged = 0
+        self.invalid = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def reject(self, line, message, max_errors=None):
+        self.invalid += 1
+        if len(self.errors) < ERROR_SAMPLE:
+            self.errors.append(f"line {line}: {message}")
+        if max_errors is not None and self.invalid > max_errors:
+            raise TooManyErrors(f"{self.path}: more than {max_errors} invalid rows; first: {self.errors[0]}")
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+        return self
+
+    @property
+    def rows_per_second(self):
+        return round(self.read / self.seconds) if self.seconds else 0
+
+    def as_dict(self):
+        return {
+            "kind": self.kind, "path": self.path, "read": self.read, "written": self.written,
+            "unchanged": self.unchanged, "invalid": self.invalid, "seconds": round(self.seconds, 1),
+            "rows_per_s": self.rows_per_second, "errors": self.errors,
+        }
+
+
+def chunks(records, validate, report, size=CHUNK_SIZE, max_errors=None):
+    """Validated rows of ``records`` in lists of up to ``size``, each row tagged with its ``line``.
+
+    Invalid rows are counted in ``report`` and skipped.
+    """
+    chunk = []
+    for line, record in records:
+        report.read += 1
+        try:
+            row = validate(record)
+        except ValueError as error:
+            report.reject(line, str(error), max_errors)
+            continue
+        row["line"] = line
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _kinds():
+    from database.queries import (
+        COPY_RESTAURANT_IMPORT, COPY_TABLE_IMPORT, STAGE_RESTAURANT_IMPORT, STAGE_TABLE_IMPORT,
+        UPSERT_RESTAURANTS, UPSERT_TABLES,
+    )
+    return {
+        "restaurants": {
+            "validate": validate_restaurant,
+            "columns": ("line", "name", "location", "cuisine", "contact", "opening_time", "closing_time"),
+            "copy": COPY_RESTAURANT_IMPORT, "stage": STAGE_RESTAURANT_IMPORT, "upsert": UPSERT_RESTAURANTS,
+        },
+        "tables": {
+            "validate": validate_table,
+            "columns": ("line", "restaurant_name", "location", "table_number", "seating_capacity", "is_available"),
+            "copy": COPY_TABLE_IMPORT, "stage": STAGE_TABLE_IMPORT, "upsert": UPSERT_TABLES,
+        },
+    }
+
+
+def _stage(conn, spec, rows):
+    cursor = conn.connection.cursor()
+    try:
+        copy = getattr(cursor, "copy_expert", None)
+        if copy is None:
+            # Drivers without psycopg2's COPY API get a batched executemany instead
+            conn.execute(text(spec["stage"]), rows)
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        columns = spec["columns"]
+        for row in rows:
+            writer.writerow([row[column] for column in columns])
+        buffer.seek(0)
+        copy(spec["copy"], buffer)
+    finally:
+        cursor.close()
+
+
+def load_chunk(conn, kind, rows, report):
+    """Stages ``rows`` and upserts them in one transaction, updating ``report``."""
+    from database.queries import UNMATCHED_TABLE_IMPORT
+
+    spec = _kinds()[kind]
+    conn.execute(text("SET LOCAL statement_timeout = 0"))
+    _stage(conn, spec, rows)
+    unmatched = conn.execute(text(UNMATCHED_TABLE_IMPORT)).fetchall() if kind == "tables" else []
+    written = conn.execute(text(spec["upsert"])).rowcount
+    # Staged rows are deleted by this commit
+    conn.commit()
+    for line, name, location in unmatched:
+        report.reject(line, f"no restaurant {name!r} in {location!r}")
+    report.written += written
+    report.unchanged += len(rows) - len(unmatched) - written
+
+
+def import_file(conn, kind, path, chunk_size=CHUNK_SIZE, max_errors=None, validate_only=False):
+    """Imports one file of ``kind`` ("restaurants" or "tables") and returns its ImportReport.
+
+    With ``validate_only`` the file is only read and checked; ``conn`` may be None.
+    Chunks committed before a TooManyErrors stay loaded.
+    """
+    report = ImportReport(kind, path)
+    spec = _kinds()[kind]
+    for rows in chunks(iter_records(path), spec["validate"], report, chunk_size, max_errors):
+        if validate_only:
+            continue
+        load_chunk(conn, kind, rows, report)
+        elapsed = time.perf_counter() - report.started
+        log_event(log, logging.INFO, "import chunk loaded", kind=kind, read=report.read,
+                  written=report.written, rows_per_s=round(report.read / elapsed) if elapsed else 0)
+    return report.finish()
+
+
+def run(restaurants=None, tables=None, chunk_size=CHUNK_SIZE, max_errors=None, validate_only=False, catalog=None):
+    """Imports the given files, restaurants first, and returns their reports as dicts.
+
+    Afterwards the planner statistics and search indexes are refreshed and a
+    BULK_IMPORT notification makes every listening catalog reload in full;
+    ``catalog`` (a CatalogIndex in this process), if given, is reloaded now.
+    Raises ValueError if restaurants already holds duplicate natural keys.
+    """
+    files = [(kind, path) for kind, path in (("restaurants", restaurants), ("tables", tables)) if path]
+    if validate_only:
+        return [import_file(None, kind, path, chunk_size, max_errors, True).as_dict() for kind, path in files]
+
+    from database.connect import get_engine
+    from database.queries import ANALYZE_IMPORTED, CREATE_IMPORT_STAGING, NOTIFY_BULK_IMPORT, RESTAURANT_SEARCH_INDEXES
+    from database.schema import ensure_natural_keys
+
+    reports = []
+    # One connection throughout, so the temporary staging tables survive between chunks
+    with get_engine().connect() as conn:
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        ensure_natural_keys(conn)
+        conn.exec_driver_sql(CREATE_IMPORT_STAGING)
+        conn.commit()
+        for kind, path in files:
+            reports.append(import_file(conn, kind, path, chunk_size, max_errors).as_dict())
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        conn.exec_driver_sql(RESTAURANT_SEARCH_INDEXES)
+        conn.exec_driver_sql(ANALYZE_IMPORTED)
+        conn.execute(text(NOTIFY_BULK_IMPORT))
+        conn.commit()
+    if catalog is not None:
+        catalog.refresh(full=True)
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--restaurants", help="CSV or JSONL file of restaurants")
+    parser.add_argument("--tables", help="CSV or JSONL file of tables")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--max-errors", type=int, help="abort after this many invalid rows (default: never)")
+    parser.add_argument("--validate-only", action="store_true", help="check the files without touching the database")
+    args = parser.parse_args(argv)
+    if not (args.restaurants or args.tables):
+        parser.error("pass --restaurants and/or --tables")
+    try:
+        reports = run(args.restaurants, args.tables, args.chunk_size, args.max_errors, args.validate_only)
+    except ValueError as error:
+        # TooManyErrors, or duplicate restaurants blocking the natural key
+        sys.exit(str(error))
+    for report in reports:
+        print(f"{report['kind']}: {report['read']:,} read, {report['written']:,} written, "
+              f"{report['unchanged']:,} unchanged, {report['invalid']:,} invalid "
+              f"in {report['seconds']}s ({report['rows_per_s']:,} rows/s)")
+        for error in report["errors"]:
+            print(f"  {error}")
+    return 1 if any(report["invalid"] for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,190 @@
-from sqlalchemy import create_engine
+# database/connect.py
+"""Database engines, created on first use.
+
+Importing this module has no side effects: settings (and .env) are read and
+the engine is built the first time a session, ``get_engine()`` or the
+``engine`` attribute is used.
+"""
+from contextlib import asynccontextmanager, contextmanager
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv, find_dotenv
-import os
 
-# Load environment variables
-env_path = find_dotenv()
-if not env_path:
-    raise FileNotFoundError("⚠️ .env file not found! Ensure it exists in the project root.")
+from settings import get_settings
+
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
+
+
+class PoolStats:
+    """Checkout counters collected from pool events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.timeouts = 0
+        self.connects = 0
+
+    def on_checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self, *args):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def on_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def on_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+
+pool_stats = PoolStats()
+
+
+def get_engine():
+    """Returns the process-wide engine, creating it (and validating credentials) on first use."""
+    global _engine, _session_factory
+    with _engine_lock:
+        if _engine is None:
+            settings = get_settings()
+            engine = create_engine(
+                settings.database_url(),
+                pool_size=settings.pool_size,
+                max_overflow=settings.max_overflow,
+                pool_timeout=settings.pool_timeout,
+                pool_recycle=settings.pool_recycle,
+                pool_pre_ping=settings.pool_pre_ping,
+                connect_args={"options": f"-c statement_timeout={settings.statement_timeout_ms}"},
+            )
+            event.listen(engine, "checkout", pool_stats.on_checkout)
+            event.listen(engine, "checkin", pool_stats.on_checkin)
+            event.listen(engine, "connect", pool_stats.on_connect)
+            _session_factory = sessionmaker(bind=engine)
+            _engine = engine
+        return _engine
+
+
+def _sessions():
+    # Lock-free once the engine exists
+    if _session_factory is None:
+        get_engine()
+    return _session_factory
 
-load_dotenv(env_path)
 
-# Read database credentials
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
+def __getattr__(name):
+    # Keeps ``from database.connect import engine`` working without an import-time engine
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return _sessions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Debugging - Print values to check if they are loaded
-print(f"DB_NAME={DB_NAME}, DB_USER={DB_USER}, DB_HOST={DB_HOST}, DB_PORT={DB_PORT}")
 
-# Ensure all variables are loaded
-if not all([DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT]):
-    raise ValueError("Missing one or more required database environment variables!")
+def pool_status():
+    """Returns pool saturation metrics for sizing against concurrent users."""
+    settings = get_settings()
+    capacity = settings.pool_size + settings.max_overflow
+    pool = _engine.pool if _engine is not None else None
+    checked_out = pool.checkedout() if pool else 0
+    return {
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "checked_out": checked_out,
+        "idle": pool.checkedin() if pool else 0,
+        "overflow": max(0, pool.overflow()) if pool else 0,
+        "saturation": checked_out / capacity if capacity else 0.0,
+        "peak_checked_out": pool_stats.peak_checked_out,
+        "checkouts": pool_stats.checkouts,
+        "connects": pool_stats.connects,
+        "timeouts": pool_stats.timeouts,
+    }
+
+
+@contextmanager
+def session_scope():
+    """Short-lived session for one unit of work: commits on success, rolls back on error."""
+    db = _sessions()()
+    try:
+        yield db
+        db.commit()
+    except PoolTimeoutError:
+        pool_stats.on_timeout()
+        db.rollback()
+        raise
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+_async_engine = None
+_async_session_factory = None
+_async_lock = threading.Lock()
+
+
+def get_async_engine():
+    """Returns the asyncio engine, created on first use.
+
+    It must only be used from the shared event loop (agents/async_runtime.py),
+    since asyncpg connections are bound to the loop that opened them. Code on
+    another loop, like the API handlers in main.py, goes through run_shared().
+    """
+    global _async_engine, _async_session_factory
+    with _async_lock:
+        if _async_engine is None:
+            settings = get_settings()
+            _async_engine = create_async_engine(
+                settings.database_url("postgresql+asyncpg"),
+                pool_size=settings.pool_size,
+                max_overflow=settings.max_overflow,
+                pool_timeout=settings.pool_timeout,
+                pool_recycle=settings.pool_recycle,
+                pool_pre_ping=settings.pool_pre_ping,
+                connect_args={"server_settings": {"statement_timeout": str(settings.statement_timeout_ms)}},
+            )
+            _async_session_factory = async_sessionmaker(_async_engine, expire_on_commit=False)
+        return _async_engine
+
+
+@asynccontextmanager
+async def async_session_scope():
+    """Async counterpart of session_scope."""
+    get_async_engine()
+    db = _async_session_factory()
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
 
-# PostgreSQL Connection URL
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-# Create an engine
-engine = create_engine(DATABASE_URL)
+async def dispose_engines():
+    """Closes every pooled connection of both engines, e.g. on server shutdown."""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
 
-# Create a session factory
-SessionLocal = sessionmaker(bind=engine)
 
 # Function to get a database session
 def get_db():
-    db = SessionLocal()
+    db = _sessions()()
     try:
         yield db
     finally:
@@ -6,15 +6,517 @@ WHERE city = %s AND cuisine_type ILIKE %s;
 """
 
 CHECK_RESTAURANT_AVAILABILITY = """
-SELECT open_time, close_time FROM restaurants WHERE id = %s;
+SELECT opening_time, closing_time FROM restaurants WHERE id = :restaurant_id;
 """
 
-CHECK_TABLE_AVAILABILITY = """
-SELECT COUNT(*) FROM reservations 
-WHERE restaurant_id = %s AND reservation_time = %s;
+# Catalog index (agents/catalog.py)
+HAS_RESTAURANT_WATERMARK = """
+SELECT 1 FROM information_schema.columns
+WHERE table_name = 'restaurants' AND column_name = 'updated_at';
 """
 
-BOOK_TABLE = """
-INSERT INTO reservations (restaurant_id, reservation_time) 
-VALUES (%s, %s) RETURNING id;
+# Recent bookings per restaurant, the ranking signal for recommendations (agents/catalog.py)
+RECENT_BOOKING_COUNTS = """
+SELECT restaurant_id, COUNT(*) FROM reservations
+WHERE reservation_time >= NOW() - make_interval(days => :days)
+AND status IN ('pending', 'confirmed')
+GROUP BY restaurant_id;
+"""
+
+LOAD_CATALOG = """
+SELECT id, name, location, cuisine FROM restaurants;
+"""
+
+LOAD_CATALOG_WITH_WATERMARK = """
+SELECT id, name, location, cuisine, updated_at FROM restaurants;
+"""
+
+# updated_at is the writing transaction's start time, so a row can commit after a refresh that
+# read newer ones. Incremental refreshes therefore resume from the database clock minus a margin
+# longer than any write transaction, not from the newest updated_at seen.
+CATALOG_SAFE_WATERMARK = """
+SELECT LOCALTIMESTAMP - make_interval(secs => :margin);
+"""
+
+LOAD_CATALOG_SINCE = """
+SELECT id, name, location, cuisine, updated_at FROM restaurants
+WHERE updated_at > :watermark
+ORDER BY updated_at;
+"""
+
+# Adds the updated_at watermark and a NOTIFY hook used to refresh the catalog index
+CATALOG_WATERMARK_MIGRATION = """
+ALTER TABLE restaurants ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+CREATE INDEX IF NOT EXISTS restaurants_updated_at_idx ON restaurants (updated_at);
+
+CREATE OR REPLACE FUNCTION touch_restaurant() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS restaurant_touch_trigger ON restaurants;
+CREATE TRIGGER restaurant_touch_trigger BEFORE UPDATE ON restaurants
+FOR EACH ROW EXECUTE FUNCTION touch_restaurant();
+
+CREATE OR REPLACE FUNCTION notify_catalog_update() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('catalog_update', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS restaurant_notify_trigger ON restaurants;
+CREATE TRIGGER restaurant_notify_trigger AFTER INSERT OR UPDATE OR DELETE ON restaurants
+FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_update();
+"""
+
+# One page of restaurants in id order; pass the last id of a page as :after_id for the next.
+# Served by the indexes in RESTAURANT_SEARCH_INDEXES.
+FIND_RESTAURANTS_PAGE = """
+SELECT id, name, location, cuisine FROM restaurants
+WHERE lower(location) = lower(:city) AND cuisine ILIKE :food_type AND id > :after_id
+ORDER BY id
+LIMIT :limit;
+"""
+
+# Case-insensitive city match and trigram-backed substring/similarity search on cuisine and city
+RESTAURANT_SEARCH_INDEXES = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS restaurants_location_lower_idx ON restaurants (lower(location), id);
+CREATE INDEX IF NOT EXISTS restaurants_cuisine_trgm_idx ON restaurants USING gin (cuisine gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS restaurants_location_trgm_idx ON restaurants USING gin (location gin_trgm_ops);
+"""
+
+# Reservations (agents/reservation.py, agents/availability.py)
+# Reservations in these states hold their table
+HOLDING_STATUSES = "('pending', 'confirmed')"
+
+# Every reservation occupies its table for DINING_DURATION_MINUTES from reservation_time
+DINING_DURATION_MINUTES = 90
+
+# Locks one free table for the whole dining window, preferring the requested one. SKIP LOCKED
+# lets concurrent bookers claim different tables instead of queueing behind each other.
+CLAIM_TABLE = f"""
+SELECT t.id, t.seating_capacity
+FROM tables t
+WHERE t.restaurant_id = :restaurant_id
+AND t.seating_capacity >= :num_people
+AND t.is_available = TRUE
+AND NOT (t.id = ANY(:skip_table_ids))
+AND NOT EXISTS (
+    SELECT 1
+    FROM reservations r
+    WHERE r.table_id = t.id
+    AND r.reservation_time > CAST(:reservation_time AS timestamp) - make_interval(mins => :duration_minutes)
+    AND r.reservation_time < CAST(:reservation_time AS timestamp) + make_interval(mins => :duration_minutes)
+    AND r.status IN {HOLDING_STATUSES}
+)
+ORDER BY (t.id = :preferred_table_id) DESC, t.seating_capacity, t.id
+LIMIT 1
+FOR UPDATE OF t SKIP LOCKED;
+"""
+
+# CLAIM_TABLE's NOT EXISTS reads the snapshot its statement started with, so a booking committed
+# by the previous holder of the table's lock can be missed. Asked again once the lock is held, a
+# new statement sees it. This is what guards the month boundary, where the per-partition
+# exclusion constraints cannot see a 23:30 booking on the last day next to a 00:30 one on the first.
+TABLE_SLOT_TAKEN = f"""
+SELECT EXISTS (
+    SELECT 1
+    FROM reservations r
+    WHERE r.table_id = :table_id
+    AND r.reservation_time > CAST(:reservation_time AS timestamp) - make_interval(mins => :duration_minutes)
+    AND r.reservation_time < CAST(:reservation_time AS timestamp) + make_interval(mins => :duration_minutes)
+    AND r.status IN {HOLDING_STATUSES}
+);
+"""
+
+# Relies on RESERVATION_OVERLAP_CONSTRAINT: a concurrent overlapping claim inserts nothing
+INSERT_RESERVATION = """
+INSERT INTO reservations (restaurant_id, table_id, customer_name, customer_contact, num_people, reservation_time, status, created_at)
+VALUES (:restaurant_id, :table_id, :customer_name, :customer_contact, :num_people, :reservation_time, 'pending', NOW())
+ON CONFLICT DO NOTHING
+RETURNING id;
+"""
+
+# No two holding reservations of a table may overlap within the dining window. For the unpartitioned
+# table; the partitioned layout adds it to each partition (CREATE_RESERVATION_PARTITION).
+RESERVATION_OVERLAP_CONSTRAINT = f"""
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+DROP INDEX IF EXISTS reservations_table_slot_uniq;
+ALTER TABLE reservations DROP CONSTRAINT IF EXISTS reservations_no_overlap;
+ALTER TABLE reservations ADD CONSTRAINT reservations_no_overlap EXCLUDE USING gist (
+    table_id WITH =,
+    tsrange(reservation_time, reservation_time + interval '{DINING_DURATION_MINUTES} minutes') WITH &&
+) WHERE (status IN {HOLDING_STATUSES});
+"""
+
+# Holding reservations that overlap an earlier-booked (lower id) one of the same table: the rows
+# RESERVATION_OVERLAP_CONSTRAINT would reject. Databases from before the constraint can hold such
+# double bookings; cancel or move them first, or adding the constraint fails.
+OVERLAPPING_RESERVATIONS = f"""
+SELECT later.id, later.table_id, later.reservation_time, earlier.id, earlier.reservation_time
+FROM reservations later
+JOIN reservations earlier
+    ON earlier.table_id = later.table_id
+    AND earlier.id < later.id
+    AND earlier.reservation_time < later.reservation_time + interval '{DINING_DURATION_MINUTES} minutes'
+    AND later.reservation_time < earlier.reservation_time + interval '{DINING_DURATION_MINUTES} minutes'
+WHERE later.status IN {HOLDING_STATUSES}
+AND earlier.status IN {HOLDING_STATUSES}
+ORDER BY later.table_id, later.reservation_time, later.id;
+"""
+
+LOAD_RESTAURANT_TABLES = """
+SELECT id, seating_capacity, is_available FROM tables
+WHERE restaurant_id = :restaurant_id
+ORDER BY seating_capacity, id;
+"""
+
+LOAD_RESERVATIONS_BETWEEN = f"""
+SELECT table_id, reservation_time FROM reservations
+WHERE restaurant_id = :restaurant_id
+AND reservation_time >= :start AND reservation_time < :end
+AND status IN {HOLDING_STATUSES};
+"""
+
+# Schema and monthly partitions (database/schema.py)
+# reservations is range-partitioned by month on reservation_time. Every query on it should
+# bound reservation_time by constants or parameters (as CLAIM_TABLE and LOAD_RESERVATIONS_BETWEEN
+# do) so Postgres prunes it to the partitions of that window, however much history there is.
+
+CREATE_TABLES = """
+CREATE TABLE IF NOT EXISTS restaurants (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    location VARCHAR(255) NOT NULL,
+    cuisine VARCHAR(100),
+    contact VARCHAR(50),
+    opening_time TIME,
+    closing_time TIME,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS tables (
+    id SERIAL PRIMARY KEY,
+    restaurant_id INTEGER REFERENCES restaurants(id) ON DELETE CASCADE,
+    seating_capacity INTEGER NOT NULL,
+    is_available BOOLEAN DEFAULT TRUE,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    table_number INTEGER
+);
+"""
+
+# The partition key must be part of the primary key, and reservation_time may not be NULL.
+# The sequence is created separately so an existing table's ids carry over on migration.
+CREATE_PARTITIONED_RESERVATIONS = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+CREATE SEQUENCE IF NOT EXISTS reservations_id_seq;
+CREATE TABLE IF NOT EXISTS reservations (
+    id INTEGER NOT NULL DEFAULT nextval('reservations_id_seq'),
+    restaurant_id INTEGER REFERENCES restaurants(id) ON DELETE CASCADE,
+    table_id INTEGER REFERENCES tables(id) ON DELETE CASCADE,
+    customer_name VARCHAR(255),
+    customer_contact VARCHAR(50),
+    reservation_time TIMESTAMP NOT NULL,
+    status VARCHAR(20) CHECK (status IN ('confirmed', 'pending', 'cancelled')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    num_people INTEGER DEFAULT 1,
+    PRIMARY KEY (id, reservation_time)
+) PARTITION BY RANGE (reservation_time);
+ALTER SEQUENCE reservations_id_seq OWNED BY reservations.id;
+"""
+
+# Indexes on the partitioned table are created on every partition, present and future.
+#   reservations (restaurant_id, reservation_time): LOAD_RESERVATIONS_BETWEEN, the audits
+#   reservations (table_id, reservation_time): CLAIM_TABLE's overlap check
+#   tables (restaurant_id, seating_capacity, id): LOAD_RESTAURANT_TABLES, CLAIM_TABLE
+SCHEMA_INDEXES = """
+CREATE INDEX IF NOT EXISTS reservations_restaurant_time_idx ON reservations (restaurant_id, reservation_time);
+CREATE INDEX IF NOT EXISTS reservations_table_time_idx ON reservations (table_id, reservation_time);
+CREATE INDEX IF NOT EXISTS reservations_contact_idx ON reservations (customer_contact);
+CREATE INDEX IF NOT EXISTS tables_restaurant_capacity_idx ON tables (restaurant_id, seating_capacity, id);
+"""
+
+IS_RESERVATIONS_PARTITIONED = """
+SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('reservations'));
+"""
+
+LIST_RESERVATION_PARTITIONS = """
+SELECT c.relname FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'reservations'::regclass
+ORDER BY c.relname;
+"""
+
+# Exclusion constraints cannot span a partitioned table, so each partition gets the
+# RESERVATION_OVERLAP_CONSTRAINT rule. Overlaps across a month boundary (a 23:30 booking on
+# the last day and a 00:30 one on the first) are caught by TABLE_SLOT_TAKEN instead.
+# Rows already in the default partition for the new month are moved into it.
+CREATE_RESERVATION_PARTITION = f"""
+DO $$
+BEGIN
+    IF to_regclass('{{name}}') IS NULL THEN
+        CREATE TEMP TABLE reservations_moving (LIKE reservations) ON COMMIT DROP;
+        IF to_regclass('reservations_default') IS NOT NULL THEN
+            WITH moved AS (
+                DELETE FROM reservations_default
+                WHERE reservation_time >= '{{start}}' AND reservation_time < '{{end}}'
+                RETURNING *
+            )
+            INSERT INTO reservations_moving SELECT * FROM moved;
+        END IF;
+        CREATE TABLE {{name}} PARTITION OF reservations FOR VALUES FROM ('{{start}}') TO ('{{end}}');
+        ALTER TABLE {{name}} ADD CONSTRAINT {{name}}_no_overlap EXCLUDE USING gist (
+            table_id WITH =,
+            tsrange(reservation_time, reservation_time + interval '{DINING_DURATION_MINUTES} minutes') WITH &&
+        ) WHERE (status IN {HOLDING_STATUSES});
+        INSERT INTO reservations SELECT * FROM reservations_moving;
+        DROP TABLE reservations_moving;
+    END IF;
+END $$;
+"""
+
+# Catches bookings beyond the last monthly partition until it is created
+CREATE_DEFAULT_RESERVATION_PARTITION = f"""
+DO $$
+BEGIN
+    IF to_regclass('reservations_default') IS NULL THEN
+        CREATE TABLE reservations_default PARTITION OF reservations DEFAULT;
+        ALTER TABLE reservations_default ADD CONSTRAINT reservations_default_no_overlap EXCLUDE USING gist (
+            table_id WITH =,
+            tsrange(reservation_time, reservation_time + interval '{DINING_DURATION_MINUTES} minutes') WITH &&
+        ) WHERE (status IN {HOLDING_STATUSES});
+    END IF;
+END $$;
+"""
+
+# Migration of an existing unpartitioned reservations table: set it aside, then copy it over
+RENAME_UNPARTITIONED_RESERVATIONS = """
+LOCK TABLE reservations IN ACCESS EXCLUSIVE MODE;
+ALTER TABLE reservations RENAME TO reservations_unpartitioned;
+ALTER TABLE reservations_unpartitioned RENAME CONSTRAINT reservations_pkey TO reservations_unpartitioned_pkey;
+ALTER TABLE reservations_unpartitioned DROP CONSTRAINT IF EXISTS reservations_no_overlap;
+"""
+
+UNPARTITIONED_RESERVATION_RANGE = """
+SELECT MIN(reservation_time), MAX(reservation_time), COUNT(*) FROM reservations_unpartitioned;
+"""
+
+COPY_UNPARTITIONED_RESERVATIONS = """
+INSERT INTO reservations (id, restaurant_id, table_id, customer_name, customer_contact, reservation_time, status, created_at, num_people)
+SELECT id, restaurant_id, table_id, customer_name, customer_contact, reservation_time, status, created_at, num_people
+FROM reservations_unpartitioned
+WHERE reservation_time IS NOT NULL;
+"""
+
+# Releases the later of each pair of overlapping bookings (OVERLAPPING_RESERVATIONS) before migrating
+CANCEL_RESERVATIONS = """
+UPDATE reservations SET status = 'cancelled' WHERE id = ANY(:ids);
+"""
+
+DROP_UNPARTITIONED_RESERVATIONS = """
+DROP TABLE reservations_unpartitioned;
+"""
+
+# Archival: a month that has fully passed is detached and moved to the archive schema, which
+# can live on cheaper storage. No rows are copied, and availability queries never see it again.
+ARCHIVE_RESERVATION_PARTITION = """
+CREATE SCHEMA IF NOT EXISTS archive;
+ALTER TABLE reservations DETACH PARTITION {name};
+ALTER TABLE {name} SET SCHEMA archive;
+"""
+
+ARCHIVE_TABLESPACE = """
+ALTER TABLE archive.{name} SET TABLESPACE {tablespace};
+"""
+
+# Bulk import (database/bulk_import.py)
+
+# Restaurants sharing a name in one city, which block the (name, location) key. Only checked
+# while that key does not exist yet.
+DUPLICATE_RESTAURANT_KEYS = """
+SELECT name, location, COUNT(*) FROM restaurants
+WHERE to_regclass('restaurants_name_location_key') IS NULL
+GROUP BY name, location
+HAVING COUNT(*) > 1
+ORDER BY COUNT(*) DESC, name, location
+LIMIT 20;
+"""
+
+# Natural keys the import upserts on: a restaurant is its name in its city, a table its number
+# within the restaurant. Tables without a number (created before the column, or seeded without
+# one) are numbered after the restaurant's highest number, in id order, so an import matches them.
+NATURAL_KEYS_MIGRATION = """
+ALTER TABLE tables ADD COLUMN IF NOT EXISTS table_number INTEGER;
+UPDATE tables t SET table_number = n.number
+FROM (
+    SELECT id, table_number IS NULL AS missing,
+           COALESCE(MAX(table_number) OVER (PARTITION BY restaurant_id), 0)
+               + ROW_NUMBER() OVER (PARTITION BY restaurant_id, table_number IS NULL ORDER BY id) AS number
+    FROM tables
+    WHERE restaurant_id IN (SELECT restaurant_id FROM tables WHERE table_number IS NULL)
+) n
+WHERE t.id = n.id AND n.missing;
+CREATE UNIQUE INDEX IF NOT EXISTS restaurants_name_location_key ON restaurants (name, location);
+CREATE UNIQUE INDEX IF NOT EXISTS tables_restaurant_number_key ON tables (restaurant_id, table_number);
+"""
+
+# Staging tables live per connection and are emptied by every commit, one chunk at a time
+CREATE_IMPORT_STAGING = """
+CREATE TEMP TABLE IF NOT EXISTS restaurant_import (
+    line BIGINT, name TEXT, location TEXT, cuisine TEXT, contact TEXT, opening_time TIME, closing_time TIME
+) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS table_import (
+    line BIGINT, restaurant_name TEXT, location TEXT, table_number INTEGER, seating_capacity INTEGER, is_available BOOLEAN
+) ON COMMIT DELETE ROWS;
+"""
+
+COPY_RESTAURANT_IMPORT = """
+COPY restaurant_import (line, name, location, cuisine, contact, opening_time, closing_time) FROM STDIN WITH (FORMAT csv)
+"""
+
+COPY_TABLE_IMPORT = """
+COPY table_import (line, restaurant_name, location, table_number, seating_capacity, is_available) FROM STDIN WITH (FORMAT csv)
+"""
+
+# executemany fallback for drivers without COPY support
+STAGE_RESTAURANT_IMPORT = """
+INSERT INTO restaurant_import (line, name, location, cuisine, contact, opening_time, closing_time)
+VALUES (:line, :name, :location, :cuisine, :contact, :opening_time, :closing_time);
+"""
+
+STAGE_TABLE_IMPORT = """
+INSERT INTO table_import (line, restaurant_name, location, table_number, seating_capacity, is_available)
+VALUES (:line, :restaurant_name, :location, :table_number, :seating_capacity, :is_available);
+"""
+
+# The last line for a key wins. Unchanged rows are not rewritten, so a re-run touches nothing
+# and the catalog triggers stay quiet.
+UPSERT_RESTAURANTS = """
+INSERT INTO restaurants (name, location, cuisine, contact, opening_time, closing_time)
+SELECT DISTINCT ON (name, location) name, location, cuisine, contact, opening_time, closing_time
+FROM restaurant_import
+ORDER BY name, location, line DESC
+ON CONFLICT (name, location) DO UPDATE SET
+    cuisine = EXCLUDED.cuisine, contact = EXCLUDED.contact,
+    opening_time = EXCLUDED.opening_time, closing_time = EXCLUDED.closing_time
+WHERE (restaurants.cuisine, restaurants.contact, restaurants.opening_time, restaurants.closing_time)
+    IS DISTINCT FROM (EXCLUDED.cuisine, EXCLUDED.contact, EXCLUDED.opening_time, EXCLUDED.closing_time);
+"""
+
+UPSERT_TABLES = """
+INSERT INTO tables (restaurant_id, table_number, seating_capacity, is_available)
+SELECT DISTINCT ON (r.id, s.table_number) r.id, s.table_number, s.seating_capacity, s.is_available
+FROM table_import s
+JOIN restaurants r ON r.name = s.restaurant_name AND r.location = s.location
+ORDER BY r.id, s.table_number, s.line DESC
+ON CONFLICT (restaurant_id, table_number) DO UPDATE SET
+    seating_capacity = EXCLUDED.seating_capacity, is_available = EXCLUDED.is_available, last_updated = CURRENT_TIMESTAMP
+WHERE (tables.seating_capacity, tables.is_available) IS DISTINCT FROM (EXCLUDED.seating_capacity, EXCLUDED.is_available);
+"""
+
+# Staged table rows whose restaurant is not in the catalog
+UNMATCHED_TABLE_IMPORT = """
+SELECT s.line, s.restaurant_name, s.location FROM table_import s
+WHERE NOT EXISTS (SELECT 1 FROM restaurants r WHERE r.name = s.restaurant_name AND r.location = s.location)
+ORDER BY s.line;
+"""
+
+# Fresh planner statistics for the new rows
+ANALYZE_IMPORTED = """
+ANALYZE restaurants;
+ANALYZE tables;
+"""
+
+# Every process listening on catalog_update reloads its catalog in full (agents/catalog.py)
+NOTIFY_BULK_IMPORT = """
+SELECT pg_notify('catalog_update', 'BULK_IMPORT');
+"""
+
+# Synthetic data (benchmarks/synthetic.py)
+
+TRUNCATE_ALL = """
+TRUNCATE reservations, tables, restaurants RESTART IDENTITY CASCADE;
+"""
+
+SEED_RESTAURANT = """
+INSERT INTO restaurants (id, name, location, cuisine, contact, opening_time, closing_time)
+VALUES (:id, :name, :location, :cuisine, :contact, :opening_time, :closing_time);
+"""
+
+SEED_TABLE = """
+INSERT INTO tables (id, restaurant_id, seating_capacity, is_available)
+VALUES (:id, :restaurant_id, :seating_capacity, TRUE);
+"""
+
+SEED_RESERVATION = """
+INSERT INTO reservations (restaurant_id, table_id, customer_name, customer_contact, num_people, reservation_time, status, created_at)
+VALUES (:restaurant_id, :table_id, :customer_name, :customer_contact, :num_people, :reservation_time, :status, :reservation_time);
+"""
+
+# Explicit ids were inserted, so move the sequences past them
+RESET_SEQUENCES = """
+SELECT setval('restaurants_id_seq', COALESCE((SELECT MAX(id) FROM restaurants), 0) + 1, false),
+       setval('tables_id_seq', COALESCE((SELECT MAX(id) FROM tables), 0) + 1, false);
+"""
+
+# Booking load audit (benchmarks/booking_load.py)
+
+# Pairs of holding reservations that share a table and overlap within the dining window
+AUDIT_OVERBOOKED_TABLES = f"""
+SELECT a.table_id, a.id AS first_id, b.id AS second_id, a.reservation_time AS first_time, b.reservation_time AS second_time
+FROM reservations a
+JOIN reservations b ON b.table_id = a.table_id AND b.id > a.id
+WHERE a.restaurant_id = ANY(:restaurant_ids)
+AND a.reservation_time >= :start AND a.reservation_time < :end
+-- Parameter bounds on b as well, so both sides are pruned to the window's partitions
+AND b.reservation_time >= CAST(:start AS timestamp) - make_interval(mins => :duration_minutes)
+AND b.reservation_time < CAST(:end AS timestamp) + make_interval(mins => :duration_minutes)
+AND a.status IN {HOLDING_STATUSES} AND b.status IN {HOLDING_STATUSES}
+AND b.reservation_time > a.reservation_time - make_interval(mins => :duration_minutes)
+AND b.reservation_time < a.reservation_time + make_interval(mins => :duration_minutes);
+"""
+
+# Holding reservations seating more people than the table holds, or on another restaurant's table
+AUDIT_CAPACITY_VIOLATIONS = f"""
+SELECT r.id, r.table_id, r.num_people, t.seating_capacity, r.restaurant_id, t.restaurant_id AS table_restaurant_id
+FROM reservations r
+JOIN tables t ON t.id = r.table_id
+WHERE r.restaurant_id = ANY(:restaurant_ids)
+AND r.reservation_time >= :start AND r.reservation_time < :end
+AND r.status IN {HOLDING_STATUSES}
+AND (r.num_people > t.seating_capacity OR r.restaurant_id <> t.restaurant_id);
+"""
+
+# Sessions of this database currently blocked on a row or table lock
+COUNT_LOCK_WAITS = """
+SELECT COUNT(*) FROM pg_stat_activity
+WHERE datname = current_database() AND wait_event_type = 'Lock';
+"""
+
+DELETE_RESERVATIONS_BY_CONTACT = """
+DELETE FROM reservations WHERE customer_contact = :customer_contact;
+"""
+
+# Partition benchmark (benchmarks/partitions.py)
+
+# Four non-overlapping confirmed bookings per table per day over [:start, :end)
+GENERATE_RESERVATION_HISTORY = """
+INSERT INTO reservations (restaurant_id, table_id, customer_name, customer_contact, num_people, reservation_time, status, created_at)
+SELECT t.restaurant_id, t.id, 'History', 'history@example.com', LEAST(t.seating_capacity, 2),
+       d + make_interval(hours => h), 'confirmed', d
+FROM tables t
+CROSS JOIN generate_series(CAST(:start AS timestamp), CAST(:end AS timestamp) - interval '1 day', interval '1 day') AS d
+CROSS JOIN unnest(ARRAY[12, 14, 18, 20]) AS h;
+"""
+
+COUNT_RESERVATIONS = """
+SELECT COUNT(*) FROM reservations;
+"""
+
+COUNT_TABLES = """
+SELECT COUNT(*), MIN(restaurant_id), MAX(restaurant_id) FROM tables;
 """
@@ -0,0 +1,251 @@
+# database/schema.py
+"""Creates the schema, keeps monthly reservation partitions ahead of time and archives old months.
+
+Usage:
+    python -m database.schema create [--months-back N] [--months-ahead N]
+    python -m database.schema migrate [--months-ahead N] [--cancel-overlaps]
+    python -m database.schema partitions [--months-ahead N]
+    python -m database.schema archive [--keep-months N] [--tablespace NAME] [--dry-run]
+
+``create`` sets up an empty database. ``migrate`` converts an existing
+unpartitioned reservations table in place; it refuses while pending or
+confirmed bookings of a table overlap, unless ``--cancel-overlaps`` cancels
+the later-booked ones. Run ``partitions`` (for example
+daily from cron) so next months' partitions exist before bookings arrive.
+``archive`` moves months that ended more than ``--keep-months`` ago out of
+the live table.
+"""
+import argparse
+import re
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from database.connect import session_scope
+from database.queries import (
+    ARCHIVE_RESERVATION_PARTITION, ARCHIVE_TABLESPACE, CANCEL_RESERVATIONS, CATALOG_WATERMARK_MIGRATION,
+    COPY_UNPARTITIONED_RESERVATIONS, CREATE_DEFAULT_RESERVATION_PARTITION, CREATE_PARTITIONED_RESERVATIONS,
+    CREATE_RESERVATION_PARTITION, CREATE_TABLES, DINING_DURATION_MINUTES, DROP_UNPARTITIONED_RESERVATIONS,
+    DUPLICATE_RESTAURANT_KEYS, IS_RESERVATIONS_PARTITIONED, LIST_RESERVATION_PARTITIONS, NATURAL_KEYS_MIGRATION,
+    OVERLAPPING_RESERVATIONS, RENAME_UNPARTITIONED_RESERVATIONS, RESTAURANT_SEARCH_INDEXES, SCHEMA_INDEXES,
+    UNPARTITIONED_RESERVATION_RANGE,
+)
+
+PARTITION_RE = re.compile(r"^reservations_(\d{4})_(\d{2})$")
+IDENTIFIER_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+MONTHS_AHEAD = 12
+MONTHS_BACK = 1
+KEEP_MONTHS = 6
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"reservations_{month.year:04d}_{month.month:02d}"
+
+
+def partition_month(name):
+    """The month a partition holds, or None for the default partition and foreign names."""
+    match = PARTITION_RE.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def months_between(first, last):
+    """Month starts from ``first``'s month through ``last``'s month, inclusive."""
+    month, last = month_start(first), month_start(last)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def _script(db, sql):
+    # DDL scripts hold several statements and $$-quoted bodies, so they bypass bind parsing
+    db.connection().exec_driver_sql(sql)
+
+
+def _no_timeout(db):
+    # Schema changes and bulk copies outlast the pool's per-statement timeout
+    db.execute(text("SET LOCAL statement_timeout = 0"))
+
+
+def is_partitioned(db):
+    return bool(db.execute(text(IS_RESERVATIONS_PARTITIONED)).scalar())
+
+
+def list_partitions(db):
+    return [row[0] for row in db.execute(text(LIST_RESERVATION_PARTITIONS))]
+
+
+def ensure_partitions(db, first, last):
+    """Creates the monthly partitions covering ``first``..``last`` (dates) that do not exist yet."""
+    created = []
+    existing = set(list_partitions(db))
+    for month in months_between(first, last):
+        name = partition_name(month)
+        if name not in existing:
+            _script(db, CREATE_RESERVATION_PARTITION.format(name=name, start=month, end=add_months(month, 1)))
+            created.append(name)
+    return created
+
+
+def ensure_natural_keys(db):
+    """Adds tables.table_number, numbers unnumbered tables and creates the natural-key indexes.
+
+    Works on a Session or a Connection. Raises ValueError listing duplicate
+    (name, location) restaurants, which must be merged or renamed first.
+    """
+    duplicates = list(db.execute(text(DUPLICATE_RESTAURANT_KEYS)))
+    if duplicates:
+        listed = "; ".join(f"{name!r} in {location!r} ({count} rows)" for name, location, count in duplicates)
+        raise ValueError(f"Restaurants must be unique by name and location; duplicates: {listed}")
+    db.execute(text(NATURAL_KEYS_MIGRATION))
+
+
+def create_schema(db, months_back=MONTHS_BACK, months_ahead=MONTHS_AHEAD, today=None):
+    """Creates all tables, indexes and triggers, with reservations partitioned by month."""
+    today = today or date.today()
+    _no_timeout(db)
+    _script(db, CREATE_TABLES)
+    _script(db, CREATE_PARTITIONED_RESERVATIONS)
+    if not is_partitioned(db):
+        raise RuntimeError("reservations exists and is not partitioned; run `python -m database.schema migrate`.")
+    _script(db, CREATE_DEFAULT_RESERVATION_PARTITION)
+    _script(db, SCHEMA_INDEXES)
+    ensure_natural_keys(db)
+    _script(db, CATALOG_WATERMARK_MIGRATION)
+    _script(db, RESTAURANT_SEARCH_INDEXES)
+    month = month_start(today)
+    return ensure_partitions(db, add_months(month, -months_back), add_months(month, months_ahead))
+
+
+def overlaps_to_cancel(overlaps, duration_minutes=DINING_DURATION_MINUTES):
+    """Ids to cancel so that none of ``overlaps`` (OVERLAPPING_RESERVATIONS rows) clash any more.
+
+    Bookings are kept in the order they were made, so the earliest booking
+    of each clash keeps its table and nothing is cancelled needlessly.
+    """
+    bookings = {}
+    for later_id, table_id, later_time, earlier_id, earlier_time in overlaps:
+        bookings[later_id] = (table_id, later_time)
+        bookings[earlier_id] = (table_id, earlier_time)
+    window = timedelta(minutes=duration_minutes)
+    kept, cancelled = {}, []
+    for reservation_id in sorted(bookings):
+        table_id, start = bookings[reservation_id]
+        if any(abs(start - other) < window for other in kept.get(table_id, ())):
+            cancelled.append(reservation_id)
+        else:
+            kept.setdefault(table_id, []).append(start)
+    return cancelled
+
+
+def migrate(db, months_ahead=MONTHS_AHEAD, today=None, cancel_overlaps=False):
+    """Rebuilds an unpartitioned reservations table as a partitioned one, keeping ids.
+
+    Runs in the caller's transaction, holding an exclusive lock on reservations
+    for the copy. The old table is dropped only if every row was copied; rows
+    with no reservation_time are left in reservations_unpartitioned.
+
+    Every partition enforces the overlap constraint, so bookings that already
+    overlap would abort the copy. They raise ValueError listing them first,
+    or with ``cancel_overlaps`` the later-booked ones are cancelled.
+    """
+    today = today or date.today()
+    _no_timeout(db)
+    if is_partitioned(db):
+        return {"migrated": False, "reason": "already partitioned"}
+    cancelled = overlaps_to_cancel(list(db.execute(text(OVERLAPPING_RESERVATIONS))))
+    if cancelled and not cancel_overlaps:
+        listed = ", ".join(str(reservation_id) for reservation_id in cancelled[:20])
+        raise ValueError(f"{len(cancelled)} pending or confirmed reservations overlap an earlier booking of their table "
+                         f"(ids {listed}{', ...' if len(cancelled) > 20 else ''}); move or cancel them, "
+                         "or rerun with --cancel-overlaps")
+    if cancelled:
+        db.execute(text(CANCEL_RESERVATIONS), {"ids": cancelled})
+    _script(db, RENAME_UNPARTITIONED_RESERVATIONS)
+    oldest, newest, total = db.execute(text(UNPARTITIONED_RESERVATION_RANGE)).fetchone()
+    _script(db, CREATE_PARTITIONED_RESERVATIONS)
+    _script(db, CREATE_DEFAULT_RESERVATION_PARTITION)
+    _script(db, SCHEMA_INDEXES)
+    last = add_months(month_start(today), months_ahead)
+    if newest is not None:
+        last = max(last, month_start(newest))
+    partitions = ensure_partitions(db, oldest or today, last)
+    copied = db.execute(text(COPY_UNPARTITIONED_RESERVATIONS)).rowcount
+    if copied == total:
+        _script(db, DROP_UNPARTITIONED_RESERVATIONS)
+    return {"migrated": True, "rows": total, "copied": copied, "partitions": len(partitions),
+            "kept_old_table": copied != total, "cancelled": cancelled}
+
+
+def archive(db, keep_months=KEEP_MONTHS, tablespace=None, today=None, dry_run=False):
+    """Detaches months that ended more than ``keep_months`` ago into the ``archive`` schema.
+
+    Whole partitions move, so archiving costs the same however many rows a
+    month holds, and the live table only ever spans the recent months.
+    """
+    if tablespace is not None and not IDENTIFIER_RE.match(tablespace):
+        raise ValueError(f"Invalid tablespace name: {tablespace!r}")
+    cutoff = add_months(month_start(today or date.today()), -keep_months)
+    names = [name for name in list_partitions(db) if (partition_month(name) or cutoff) < cutoff]
+    if dry_run:
+        return names
+    _no_timeout(db)
+    for name in names:
+        _script(db, ARCHIVE_RESERVATION_PARTITION.format(name=name))
+        if tablespace:
+            _script(db, ARCHIVE_TABLESPACE.format(name=name, tablespace=tablespace))
+    return names
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="FoodieSpot schema, partitions and archival")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="create tables, indexes and partitions in an empty database")
+    create.add_argument("--months-back", type=int, default=MONTHS_BACK)
+    create.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    migrate_parser = commands.add_parser("migrate", help="partition an existing reservations table")
+    migrate_parser.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    migrate_parser.add_argument("--cancel-overlaps", action="store_true",
+                                help="cancel bookings that overlap an earlier one of their table instead of stopping")
+    partitions = commands.add_parser("partitions", help="create upcoming monthly partitions")
+    partitions.add_argument("--months-ahead", type=int, default=MONTHS_AHEAD)
+    archive_parser = commands.add_parser("archive", help="move old months to the archive schema")
+    archive_parser.add_argument("--keep-months", type=int, default=KEEP_MONTHS)
+    archive_parser.add_argument("--tablespace", help="also move archived months to this tablespace")
+    archive_parser.add_argument("--dry-run", action="store_true", help="list the months without moving them")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        with session_scope() as db:
+            if args.command == "create":
+                print(f"Created partitions: {create_schema(db, args.months_back, args.months_ahead)}")
+            elif args.command == "migrate":
+                print(migrate(db, args.months_ahead, cancel_overlaps=args.cancel_overlaps))
+            elif args.command == "partitions":
+                if not is_partitioned(db):
+                    sys.exit("reservations is not partitioned; run `python -m database.schema migrate` first.")
+                month = month_start(date.today())
+                print(f"Created partitions: {ensure_partitions(db, month, add_months(month, args.months_ahead))}")
+            elif args.command == "archive":
+                names = archive(db, args.keep_months, args.tablespace, dry_run=args.dry_run)
+                print(f"{'Would archive' if args.dry_run else 'Archived'}: {names}")
+    except ValueError as error:
+        # Overlapping bookings blocking migrate, duplicate restaurants, or a bad tablespace name
+        sys.exit(str(error))
+
+
+if __name__ == "__main__":
+    main()
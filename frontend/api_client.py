@@ -0,0 +1,115 @@
+# frontend/api_client.py
+import json
+import os
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ApiError(Exception):
+    """Raised when the FoodieSpot API rejects or fails a request."""
+
+
+class ChatStream:
+    """Iterates the reply text of a /chat/stream response.
+
+    Once exhausted, ``text`` is the full reply and ``result`` is what /chat returns.
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.text = ""
+        self.result = None
+
+    def __iter__(self):
+        with self.response:
+            try:
+                for line in self.response.iter_lines(chunk_size=None, decode_unicode=True):
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if "delta" in event:
+                        self.text += event["delta"]
+                        yield event["delta"]
+                    else:
+                        self.result = event["result"]
+            except requests.RequestException as e:
+                raise ApiError(f"Chat stream interrupted: {e}")
+        if self.result is None:
+            raise ApiError("Chat stream ended without a result.")
+
+
+class FoodieSpotClient:
+    """Thin HTTP client for the API served by main.py.
+
+    One instance is shared by every Streamlit session of a process, so its
+    connection pool is sized for concurrent sessions.
+    """
+
+    def __init__(self, base_url=None, timeout=30.0, pool_size=None):
+        self.base_url = (base_url or os.getenv("FOODIESPOT_API_URL", "http://127.0.0.1:8000")).rstrip("/")
+        self.timeout = timeout
+        self.stream_replies = os.getenv("STREAM_REPLIES", "false").lower() in ("1", "true", "yes")
+        self.session = requests.Session()
+        pool_size = pool_size or int(os.getenv("FOODIESPOT_API_POOL_SIZE", "20"))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _request(self, method, path, **kwargs):
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise ApiError(f"FoodieSpot API is unreachable: {e}")
+        if response.status_code != 200:
+            try:
+                detail = response.json().get("detail")
+            except ValueError:
+                detail = response.text
+            raise ApiError(f"FoodieSpot API error {response.status_code}: {detail}")
+        return response
+
+    def chat(self, session_id, message):
+        return self._request("POST", "/chat", json={"session_id": session_id, "message": message}).json()
+
+    def stream_chat(self, session_id, message):
+        body = {"session_id": session_id, "message": message}
+        return ChatStream(self._request("POST", "/chat/stream", json=body, stream=True))
+
+    def get_state(self, session_id):
+        return self._request("GET", f"/sessions/{session_id}").json()
+
+    def recommend(self, city, cuisine=None):
+        return self._request("GET", "/recommendations", params={"city": city, "cuisine": cuisine}).json()
+
+    def check_availability(self, restaurant_id, date, time, num_people):
+        body = {"restaurant_id": restaurant_id, "date": date, "time": time, "num_people": num_people}
+        return self._request("POST", "/availability", json=body).json()
+
+    def find_available_slots(self, restaurants, num_people, window_start, window_end, around=None, top_k=5):
+        body = {
+            "restaurants": restaurants,
+            "num_people": num_people,
+            "window_start": _format_datetime(window_start),
+            "window_end": _format_datetime(window_end),
+            "around": _format_datetime(around),
+            "top_k": top_k,
+        }
+        return self._request("POST", "/availability/slots", json=body).json()
+
+    def book_table(self, restaurant_id, table_id, customer_name, customer_contact, num_people, date, time):
+        body = {
+            "restaurant_id": restaurant_id,
+            "table_id": table_id,
+            "customer_name": customer_name,
+            "customer_contact": customer_contact,
+            "num_people": num_people,
+            "date": date,
+            "time": time,
+        }
+        return self._request("POST", "/reservations", json=body).json()
+
+
+def _format_datetime(value):
+    return value.strftime("%Y-%m-%d %H:%M") if isinstance(value, datetime) else value
@@ -0,0 +1,214 @@
+# logs/logger.py
+"""Logging and latency instrumentation shared by every module.
+
+Log calls are level-gated before any formatting happens: pass values as
+keyword fields to ``log_event`` (or %-style args to ``logger.debug``) rather
+than pre-formatting f-strings. DEBUG records can additionally be sampled with
+LOG_SAMPLE_RATE so a busy process does not drown in per-turn detail.
+
+``span(name)`` times a stage into a latency histogram; ``metrics.snapshot()``
+reports count, mean and p50/p95/p99 per stage, served on the API's /metrics
+endpoint or dumped to the log every METRICS_DUMP_SECONDS.
+"""
+import bisect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crew_logs.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+METRICS_DUMP_SECONDS = float(os.getenv("METRICS_DUMP_SECONDS", "0"))
+
+
+class StructuredFormatter(logging.Formatter):
+    """Renders ``event key=value ...`` lines, or one JSON object per line."""
+
+    def __init__(self, as_json=False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = getattr(record, "fields", {})
+        if self.as_json:
+            entry = {
+                "ts": round(record.created, 3),
+                "level": record.levelname,
+                "logger": record.name,
+                "event": record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                entry["exc"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        line = f"{self.formatTime(record)} {record.levelname} {record.name} {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{key}={value!r}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class SampleFilter(logging.Filter):
+    """Keeps every record above DEBUG and a ``rate`` fraction of DEBUG records."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+logger = logging.getLogger("foodiespot")
+
+
+def _configure():
+    if logger.handlers:
+        return
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+    formatter = StructuredFormatter(as_json=LOG_FORMAT == "json")
+    for handler in (logging.StreamHandler(), logging.FileHandler(LOG_FILE, encoding="utf-8")):
+        handler.setFormatter(formatter)
+        handler.addFilter(SampleFilter(LOG_SAMPLE_RATE))
+        logger.addHandler(handler)
+
+
+_configure()
+
+
+def get_logger(name):
+    """Returns the child logger for a module, e.g. get_logger("chat") -> foodiespot.chat."""
+    return logger.getChild(name)
+
+
+def log_event(log, level, event, **fields):
+    """Logs ``event`` with structured fields; nothing is formatted unless ``level`` is enabled."""
+    if log.isEnabledFor(level):
+        log.log(level, event, extra={"fields": fields})
+
+
+# -- latency histograms -----------------------------------------------------
+
+# Bucket upper bounds in seconds: 0.1ms growing by 25% per bucket to ~2 minutes
+BUCKETS = [0.0001 * 1.25 ** i for i in range(64)]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; memory does not grow with the number of samples."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            if error:
+                self.errors += 1
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (0 < q <= 1), in seconds."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank:
+                    return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+            return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(1000 * self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(1000 * self.percentile(0.50), 3),
+            "p95_ms": round(1000 * self.percentile(0.95), 3),
+            "p99_ms": round(1000 * self.percentile(0.99), 3),
+            "max_ms": round(1000 * self.max, 3),
+        }
+
+
+class Metrics:
+    """Named latency histograms, one per instrumented stage."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe(self, name, seconds, error=False):
+        self.histogram(name).observe(seconds, error)
+
+    def snapshot(self):
+        return {name: histogram.snapshot() for name, histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+
+metrics = Metrics()
+_span_log = get_logger("span")
+
+
+@contextmanager
+def span(name, **fields):
+    """Times the enclosed block into the ``name`` histogram and logs it at DEBUG."""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe(name, elapsed, error)
+        log_event(_span_log, logging.DEBUG, name, ms=round(elapsed * 1000, 3), error=error, **fields)
+
+
+_dump_thread = None
+
+
+def start_metrics_dump(interval=METRICS_DUMP_SECONDS):
+    """Logs ``metrics.snapshot()`` at INFO every ``interval`` seconds from a daemon thread."""
+    global _dump_thread
+    if interval <= 0 or _dump_thread is not None:
+        return
+
+    def run():
+        while True:
+            time.sleep(interval)
+            log_event(logger, logging.INFO, "latency", **metrics.snapshot())
+
+    _dump_thread = threading.Thread(target=run, name="metrics-dump", daemon=True)
+    _dump_thread.start()
+
+
+start_metrics_dump()
@@ -0,0 +1,325 @@
+# main.py
+"""Headless JSON API around the chat, recommendation and reservation agents.
+
+Run ``python main.py`` to serve it with uvicorn on API_WORKERS processes, or
+``uvicorn main:app`` behind your own process manager. Every worker holds one
+ChatAgent and its own DB pools, so DB_POOL_SIZE applies per worker.
+"""
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional, Union
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from agents.async_runtime import run_shared
+from logs.logger import metrics as latency_metrics
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_WORKERS = int(os.getenv("API_WORKERS", "2"))
+# Per worker: requests running at once, and requests allowed to wait for a slot
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "32"))
+API_MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", "64"))
+API_REQUEST_TIMEOUT = float(os.getenv("API_REQUEST_TIMEOUT", "20"))
+API_SHUTDOWN_TIMEOUT = int(os.getenv("API_SHUTDOWN_TIMEOUT", "30"))
+
+# Cheap endpoints that must answer even when the worker is saturated
+UNGATED_PATHS = {"/health", "/metrics"}
+# Streamed endpoints take their slot and deadline themselves: the middleware's
+# end once the headers are sent, long before the body is
+STREAMED_PATHS = {"/chat/stream"}
+
+
+class Overloaded(Exception):
+    """Raised when the wait queue is full or the worker is shutting down."""
+
+
+class AdmissionGate:
+    """Caps in-flight requests per worker and bounds how many may wait for a slot.
+
+    Requests beyond the queue bound are rejected at once instead of piling up
+    behind a slow Groq or database call.
+    """
+
+    def __init__(self, max_concurrency, max_queue):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.draining = False
+
+    async def acquire(self, timeout):
+        """Waits up to ``timeout`` seconds for a slot; every successful call needs a release()."""
+        if self.draining or (self._semaphore.locked() and self.waiting >= self.max_queue):
+            self.rejected += 1
+            raise Overloaded()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self.served += 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self, timeout):
+        await self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "served": self.served,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "draining": self.draining,
+        }
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """A StreamingResponse that releases its admission slot once the body is sent or abandoned."""
+
+    def __init__(self, content, gate, **kwargs):
+        super().__init__(content, **kwargs)
+        self.gate = gate
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.gate.release()
+
+
+def busy_response():
+    return JSONResponse({"detail": "Server is busy, please retry shortly."}, status_code=503, headers={"Retry-After": "1"})
+
+
+def deadline_response():
+    return JSONResponse({"detail": "Request deadline exceeded."}, status_code=504)
+
+
+def request_deadline(request):
+    """Seconds this request may take: the X-Deadline-Ms header, capped at API_REQUEST_TIMEOUT."""
+    header = request.headers.get("X-Deadline-Ms")
+    try:
+        return min(API_REQUEST_TIMEOUT, max(0.0, float(header) / 1000)) if header else API_REQUEST_TIMEOUT
+    except ValueError:
+        return API_REQUEST_TIMEOUT
+
+
+class ChatRequest(BaseModel):
+    session_id: str
+    message: str
+
+
+class AvailabilityRequest(BaseModel):
+    restaurant_id: int
+    date: str
+    time: str
+    num_people: int
+
+
+class SlotsRequest(BaseModel):
+    restaurants: Union[int, List[int]]
+    num_people: int
+    window_start: str
+    window_end: str
+    around: Optional[str] = None
+    top_k: int = 5
+
+
+class BookingRequest(BaseModel):
+    restaurant_id: int
+    table_id: Optional[int] = None
+    customer_name: str
+    customer_contact: str
+    num_people: int
+    date: str
+    time: str
+
+
+def default_chat_agent():
+    from agents.chat import ChatAgent
+
+    return ChatAgent()
+
+
+async def drain_pools():
+    """Closes the Groq connection pools and disposes both DB engines."""
+    from agents.llm_client import aclose_async_clients
+    from database.connect import dispose_engines
+
+    # Both pools belong to the shared agents loop, not to uvicorn's
+    await run_shared(aclose_async_clients())
+    await run_shared(dispose_engines())
+
+
+def create_app(chat_agent_factory=default_chat_agent, on_shutdown=drain_pools,
+               max_concurrency=API_MAX_CONCURRENCY, max_queue=API_MAX_QUEUE):
+    gate = AdmissionGate(max_concurrency, max_queue)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.chat_agent = chat_agent_factory()
+        yield
+        # uvicorn has stopped accepting connections and waited for in-flight requests
+        gate.draining = True
+        await on_shutdown()
+
+    app = FastAPI(title="FoodieSpot API", lifespan=lifespan)
+    app.state.gate = gate
+
+    @app.middleware("http")
+    async def admission(request: Request, call_next):
+        if request.url.path in UNGATED_PATHS or request.url.path in STREAMED_PATHS:
+            return await call_next(request)
+        deadline = request_deadline(request)
+        start = time.monotonic()
+        try:
+            async with gate.slot(deadline):
+                remaining = deadline - (time.monotonic() - start)
+                return await asyncio.wait_for(call_next(request), remaining)
+        except Overloaded:
+            return busy_response()
+        except asyncio.TimeoutError:
+            return deadline_response()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "draining" if gate.draining else "ok"}
+
+    @app.get("/metrics")
+    async def metrics():
+        from agents.llm_dispatcher import dispatcher_stats
+        from agents.model_router import router_stats
+        from database.connect import pool_status
+
+        return {
+            "admission": gate.stats(),
+            "db_pool": pool_status(),
+            "llm_dispatch": dispatcher_stats(),
+            "llm_routing": router_stats(),
+            "sessions": await run_in_threadpool(app.state.chat_agent.state_store.stats),
+            "latency": latency_metrics.snapshot(),
+        }
+
+    @app.post("/chat")
+    async def chat(body: ChatRequest):
+        """One chat turn; the session's conversation state is kept in the shared state store."""
+        return await run_shared(app.state.chat_agent.aextract_intent(body.message, body.session_id))
+
+    @app.post("/chat/stream")
+    async def chat_stream(body: ChatRequest, request: Request):
+        """Like /chat, streamed as NDJSON: {"delta": ...} lines, then {"result": ...}.
+
+        The admission slot is held and the deadline enforced until the last
+        line is sent; a stream cut short by the deadline ends with {"error": ...}.
+        """
+        chat_agent = app.state.chat_agent
+        deadline = time.monotonic() + request_deadline(request)
+        try:
+            await gate.acquire(deadline - time.monotonic())
+        except Overloaded:
+            return busy_response()
+        except asyncio.TimeoutError:
+            return deadline_response()
+
+        def within_deadline(func, *args):
+            # The Groq stream and finish_stream block, so each step runs in the threadpool
+            return asyncio.wait_for(run_in_threadpool(func, *args), deadline - time.monotonic())
+
+        async def events():
+            try:
+                reply = await within_deadline(chat_agent.stream_intent, body.message, body.session_id)
+                deltas = iter(reply)
+                while True:
+                    delta = await within_deadline(next, deltas, None)
+                    if delta is None:
+                        break
+                    yield json.dumps({"delta": delta}) + "\n"
+                result = await within_deadline(chat_agent.finish_stream, reply, body.session_id)
+                yield json.dumps({"result": result}) + "\n"
+            except asyncio.TimeoutError:
+                gate.timed_out += 1
+                yield json.dumps({"error": "Request deadline exceeded."}) + "\n"
+
+        return AdmittedStreamingResponse(events(), gate, media_type="application/x-ndjson")
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str):
+        return await run_shared(app.state.chat_agent.state_store.aload(session_id))
+
+    @app.delete("/sessions/{session_id}")
+    async def delete_session(session_id: str):
+        await app.state.chat_agent.state_store.adelete(session_id)
+        return {"deleted": session_id}
+
+    @app.get("/recommendations")
+    async def recommendations(city: str, cuisine: Optional[str] = None):
+        return await run_shared(app.state.chat_agent.recommendation_agent.arecommend(city, cuisine))
+
+    @app.post("/availability")
+    async def availability(body: AvailabilityRequest):
+        reservation_agent = app.state.chat_agent.reservation_agent
+        return await run_in_threadpool(
+            reservation_agent.check_availability, body.restaurant_id, body.date, body.time, body.num_people
+        )
+
+    @app.post("/availability/slots")
+    async def available_slots(body: SlotsRequest):
+        reservation_agent = app.state.chat_agent.reservation_agent
+        return await run_in_threadpool(
+            reservation_agent.find_available_slots, body.restaurants, body.num_people,
+            body.window_start, body.window_end, body.around, body.top_k,
+        )
+
+    @app.post("/reservations")
+    async def reservations(body: BookingRequest):
+        reservation_agent = app.state.chat_agent.reservation_agent
+        return await run_in_threadpool(
+            reservation_agent.book_table, body.restaurant_id, body.table_id, body.customer_name,
+            body.customer_contact, body.num_people, body.date, body.time,
+        )
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Workers are separate processes; share sessions between them through SQLite
+    if API_WORKERS > 1:
+        os.environ.setdefault("STATE_STORE", "sqlite")
+    uvicorn.run(
+        "main:app",
+        host=API_HOST,
+        port=API_PORT,
+        workers=API_WORKERS,
+        timeout_graceful_shutdown=API_SHUTDOWN_TIMEOUT,
+    )
@@ -0,0 +1,96 @@
+# settings.py
+"""Process-wide settings, read lazily.
+
+Environment variables come first; a ``.env`` file, if there is one, only
+fills in variables that are not already set. Nothing happens at import time:
+``get_settings()`` loads and caches the settings on first call, and database
+credentials are only validated when a database URL is actually needed, so
+code paths that never touch Postgres start without a ``.env``.
+"""
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+DB_VARIABLES = ("DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST", "DB_PORT")
+
+_env_loaded = False
+_settings = None
+_lock = threading.Lock()
+
+
+def load_env():
+    """Loads the nearest .env into os.environ once, without overriding variables already set."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    from dotenv import find_dotenv, load_dotenv
+
+    path = find_dotenv()
+    if path:
+        load_dotenv(path)
+    _env_loaded = True
+
+
+def _flag(value):
+    return value.lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class Settings:
+    db_name: Optional[str] = None
+    db_user: Optional[str] = None
+    db_password: Optional[str] = field(default=None, repr=False)
+    db_host: Optional[str] = None
+    db_port: Optional[str] = None
+    groq_api_key: Optional[str] = field(default=None, repr=False)
+    # Pool settings, shared by every agent in the process
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 10.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    statement_timeout_ms: int = 5000
+
+    @classmethod
+    def from_env(cls, env=None):
+        env = os.environ if env is None else env
+        return cls(
+            db_name=env.get("DB_NAME"),
+            db_user=env.get("DB_USER"),
+            db_password=env.get("DB_PASSWORD"),
+            db_host=env.get("DB_HOST"),
+            db_port=env.get("DB_PORT"),
+            groq_api_key=env.get("GROQ_API_KEY"),
+            pool_size=int(env.get("DB_POOL_SIZE", "5")),
+            max_overflow=int(env.get("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=float(env.get("DB_POOL_TIMEOUT", "10")),
+            pool_recycle=int(env.get("DB_POOL_RECYCLE", "1800")),
+            pool_pre_ping=_flag(env.get("DB_POOL_PRE_PING", "true")),
+            statement_timeout_ms=int(env.get("DB_STATEMENT_TIMEOUT_MS", "5000")),
+        )
+
+    def database_url(self, driver="postgresql"):
+        """The connection URL; raises ValueError naming (never showing) any missing credentials."""
+        values = (self.db_name, self.db_user, self.db_password, self.db_host, self.db_port)
+        missing = [name for name, value in zip(DB_VARIABLES, values) if not value]
+        if missing:
+            raise ValueError(f"Missing required database environment variables: {', '.join(missing)}")
+        return f"{driver}://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
+
+
+def get_settings():
+    """Returns the process-wide settings, loading .env and reading the environment on first use."""
+    global _settings
+    with _lock:
+        if _settings is None:
+            load_env()
+            _settings = Settings.from_env()
+        return _settings
+
+
+def reset_settings():
+    """Forgets the cached settings so the next get_settings() re-reads the environment."""
+    global _settings
+    with _lock:
+        _settings = None
@@ -0,0 +1,135 @@
+import sys
+import os
+import asyncio
+import json
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from fastapi.testclient import TestClient
+from agents.state_store import MemoryStateStore
+from main import create_app
+
+class FakeRecommendationAgent:
+    async def arecommend(self, location, cuisine=None):
+        return [{"id": 1, "name": "Taj", "location": location, "cuisine": cuisine or "Indian"}]
+
+class FakeReservationAgent:
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+
+    def check_availability(self, restaurant_id, date, time, num_people):
+        self.release.wait(5)
+        return {"available": True, "message": "Tables are available for booking.",
+                "available_tables": [{"id": 7, "seating_capacity": 4}]}
+
+class FakeReply:
+    def __init__(self, text, delay=0):
+        self.text = text
+        self.delay = delay
+
+    def __iter__(self):
+        for word in self.text.split(" "):
+            time.sleep(self.delay)
+            yield word
+
+class FakeCatalog:
+    def get(self, restaurant_id):
+        return None
+
+class FakeChatAgent:
+    """Stands in for ChatAgent: 'slow' messages sleep past any deadline."""
+
+    def __init__(self):
+        self.recommendation_agent = FakeRecommendationAgent()
+        self.reservation_agent = FakeReservationAgent()
+        self.state_store = MemoryStateStore(catalog=FakeCatalog())
+
+    async def aextract_intent(self, user_input, session_id=None):
+        if user_input == "slow":
+            await asyncio.sleep(1)
+        state = self.state_store.load(session_id)
+        state.update(city="Mumbai", intent="restaurants", turns=state.get("turns", 0) + 1)
+        self.state_store.save(session_id, state)
+        return state
+
+    def stream_intent(self, user_input, session_id=None):
+        self.streamed_session = session_id
+        self.streamed_in_flight = self.gate.in_flight if hasattr(self, "gate") else None
+        return FakeReply("Looking for places", delay=1 if user_input == "slow" else 0)
+
+    def finish_stream(self, reply, session_id=None):
+        state = {"intent": "restaurants"}
+        self.state_store.save(session_id, state)
+        return state
+
+async def no_shutdown():
+    pass
+
+def make_client(**kwargs):
+    return TestClient(create_app(FakeChatAgent, on_shutdown=no_shutdown, **kwargs))
+
+def test_chat_keeps_session_state():
+    with make_client() as client:
+        for turns in (1, 2):
+            response = client.post("/chat", json={"session_id": "s1", "message": "food in mumbai"})
+            assert response.status_code == 200
+            assert response.json() == {"city": "Mumbai", "intent": "restaurants", "turns": turns}
+        assert client.get("/sessions/s1").json()["turns"] == 2
+        assert client.get("/sessions/other").json() == {}
+        client.delete("/sessions/s1")
+        assert client.get("/sessions/s1").json() == {}
+        assert client.get("/recommendations", params={"city": "Pune"}).json()[0]["location"] == "Pune"
+
+def test_chat_stream_ndjson():
+    with make_client() as client:
+        response = client.post("/chat/stream", json={"session_id": "s1", "message": "hi"})
+        events = [json.loads(line) for line in response.text.splitlines() if line]
+        assert [e["delta"] for e in events[:-1]] == ["Looking", "for", "places"]
+        assert events[-1]["result"] == {"intent": "restaurants"}
+        assert client.app.state.chat_agent.streamed_session == "s1"
+
+def test_chat_stream_holds_its_slot_until_the_deadline():
+    with make_client() as client:
+        gate = client.app.state.chat_agent.gate = client.app.state.gate
+        client.post("/chat/stream", json={"session_id": "s1", "message": "hi"})
+        # The body still counted against the concurrency cap
+        assert client.app.state.chat_agent.streamed_in_flight == 1
+        response = client.post("/chat/stream", json={"session_id": "s1", "message": "slow"},
+                               headers={"X-Deadline-Ms": "100"})
+        events = [json.loads(line) for line in response.text.splitlines() if line]
+        assert events == [{"error": "Request deadline exceeded."}]
+        stats = gate.stats()
+        assert (stats["in_flight"], stats["timed_out"], stats["served"]) == (0, 1, 2)
+
+def test_deadline_returns_504():
+    with make_client() as client:
+        response = client.post("/chat", json={"session_id": "s1", "message": "slow"}, headers={"X-Deadline-Ms": "100"})
+        assert response.status_code == 504
+
+def test_full_queue_is_rejected():
+    app = create_app(FakeChatAgent, on_shutdown=no_shutdown, max_concurrency=1, max_queue=0)
+    with TestClient(app) as client:
+        reservation_agent = app.state.chat_agent.reservation_agent
+        reservation_agent.release.clear()
+        body = {"restaurant_id": 1, "date": "2030-01-01", "time": "19:00:00", "num_people": 2}
+        holder = threading.Thread(target=client.post, args=("/availability",), kwargs={"json": body})
+        holder.start()
+        while app.state.gate.in_flight == 0:
+            time.sleep(0.01)
+        response = client.post("/availability", json=body)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        # Health checks bypass the gate
+        assert client.get("/health").json() == {"status": "ok"}
+        reservation_agent.release.set()
+        holder.join()
+        assert app.state.gate.stats()["rejected"] == 1
+
+if __name__ == "__main__":
+    test_chat_keeps_session_state()
+    test_chat_stream_ndjson()
+    test_chat_stream_holds_its_slot_until_the_deadline()
+    test_deadline_returns_504()
+    test_full_queue_is_rejected()
@@ -0,0 +1,137 @@
+import sys
+import os
+import threading
+from datetime import datetime, time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.availability import AvailabilityEngine
+from database.queries import CHECK_RESTAURANT_AVAILABILITY, LOAD_RESTAURANT_TABLES, LOAD_RESERVATIONS_BETWEEN
+
+class FakeDatabaseAgent:
+    def __init__(self, tables, reservations, hours=(time(12, 0), time(23, 0))):
+        self.tables = tables
+        self.reservations = reservations
+        self.hours = hours
+        self.calls = 0
+
+    def fetch(self, query, params=None):
+        self.calls += 1
+        if query == LOAD_RESTAURANT_TABLES:
+            return self.tables
+        if query == CHECK_RESTAURANT_AVAILABILITY:
+            return [self.hours]
+        if query == LOAD_RESERVATIONS_BETWEEN:
+            return [r for r in self.reservations if params["start"] <= r[1] < params["end"]]
+        raise AssertionError(f"Unexpected query: {query}")
+
+def make_engine(reservations=()):
+    tables = [(1, 2, True), (2, 4, True), (3, 8, True), (4, 6, False)]
+    return AvailabilityEngine(FakeDatabaseAgent(tables, list(reservations)), duration_minutes=90)
+
+def free_ids(engine, at, people=2):
+    return [t["id"] for t in engine.check(1, "2025-03-18", at, people)["tables"]]
+
+def test_overlapping_booking_blocks_table():
+    engine = make_engine([(1, datetime(2025, 3, 18, 18, 0))])
+    assert free_ids(engine, "18:00:00") == [2, 3]
+    assert free_ids(engine, "18:30:00") == [2, 3]   # still dining
+    assert free_ids(engine, "16:45:00") == [2, 3]   # would run into the 18:00 booking
+    assert free_ids(engine, "19:30:00") == [1, 2, 3]
+    assert free_ids(engine, "16:30:00") == [1, 2, 3]
+    assert free_ids(engine, "18:00:00", people=5) == [3]  # table 4 is disabled
+
+def test_opening_hours():
+    engine = make_engine()
+    assert engine.check(1, "2025-03-18", "11:30:00", 2)["open"] is False
+    assert engine.check(1, "2025-03-18", "22:00:00", 2)["open"] is False  # would end after closing
+    assert engine.check(1, "2025-03-18", "21:30:00", 2)["open"] is True
+
+def test_hours_past_midnight():
+    tables = [(1, 2, True)]
+    engine = AvailabilityEngine(FakeDatabaseAgent(tables, [], hours=(time(18, 0), time(2, 0))), duration_minutes=90)
+    assert engine.check(1, "2025-03-18", "00:30:00", 2)["open"] is True   # the previous evening's service
+    assert engine.check(1, "2025-03-18", "01:00:00", 2)["open"] is False  # would end after 02:00
+    assert engine.check(1, "2025-03-18", "12:00:00", 2)["open"] is False
+    assert engine.check(1, "2025-03-18", "23:30:00", 2)["open"] is True
+    slots = engine.find_slots([1], 2, datetime(2025, 3, 18, 0, 0), datetime(2025, 3, 18, 23, 0),
+                              around=datetime(2025, 3, 18, 0, 0), top_k=3)
+    assert [s["time"] for s in slots] == ["00:00:00", "00:15:00", "00:30:00"]
+
+def test_record_booking_updates_without_reloading():
+    engine = make_engine()
+    assert free_ids(engine, "19:00:00") == [1, 2, 3]
+    calls = engine.db_agent.calls
+    engine.record_booking(1, "2025-03-18", "19:15:00", 1)
+    assert free_ids(engine, "20:00:00") == [2, 3]
+    engine.record_booking(1, "2025-03-18", "19:15:00", 1, booked=False)
+    assert free_ids(engine, "20:00:00") == [1, 2, 3]
+    assert engine.db_agent.calls == calls
+
+class GatedDatabaseAgent(FakeDatabaseAgent):
+    """Holds restaurant 1's table query until ``gate`` is set."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gate = threading.Event()
+        self.waiting = threading.Event()
+
+    def fetch(self, query, params=None):
+        if query == LOAD_RESTAURANT_TABLES and params["restaurant_id"] == 1:
+            self.waiting.set()
+            assert self.gate.wait(5)
+        return super().fetch(query, params)
+
+def test_loads_run_outside_the_lock_and_are_shared():
+    db_agent = GatedDatabaseAgent([(1, 2, True)], [])
+    engine = AvailabilityEngine(db_agent, duration_minutes=90)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(engine.day(1, "2025-03-18"))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert db_agent.waiting.wait(5)
+    # Another restaurant is served while restaurant 1 is still loading
+    assert engine.check(2, "2025-03-18", "19:00:00", 2)["open"] is True
+    engine.record_booking(1, "2025-03-18", "19:00:00", 1)
+    db_agent.gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == 3 and all(result is results[0] for result in results)
+    assert db_agent.calls == 3 + 3  # one load per restaurant-day
+    # The booking recorded mid-load is not lost
+    assert engine.check(1, "2025-03-18", "19:30:00", 2)["tables"] == []
+
+def test_least_recently_used_days_are_evicted():
+    engine = AvailabilityEngine(FakeDatabaseAgent([(1, 2, True)], []), duration_minutes=90, max_days=2)
+    engine.day(1, "2025-03-18")
+    engine.day(1, "2025-03-19")
+    engine.day(1, "2025-03-18")
+    engine.day(1, "2025-03-20")
+    assert [day.day for _, day in engine._days] == [18, 20]
+
+def test_find_slots_nearest_first():
+    # Every table busy 18:00-19:30; the requested 18:30 slot is full
+    engine = make_engine([(t, datetime(2025, 3, 18, 18, 0)) for t in (1, 2, 3)])
+    slots = engine.find_slots([1], 2, datetime(2025, 3, 18, 16, 0), datetime(2025, 3, 18, 21, 0),
+                              around=datetime(2025, 3, 18, 18, 30), top_k=5)
+    assert [s["time"] for s in slots] == ["19:30:00", "19:45:00", "20:00:00", "20:15:00", "16:30:00"]
+    assert all(s["restaurant_id"] == 1 and s["date"] == "2025-03-18" for s in slots)
+
+def test_find_slots_spans_days_and_hours():
+    engine = make_engine()
+    slots = engine.find_slots([1], 2, datetime(2025, 3, 18, 22, 0), datetime(2025, 3, 19, 23, 0),
+                              around=datetime(2025, 3, 18, 22, 0), top_k=2)
+    # Last seating is 21:30, so the nearest slots are the next day's opening
+    assert slots == [
+        {"restaurant_id": 1, "date": "2025-03-19", "time": "12:00:00"},
+        {"restaurant_id": 1, "date": "2025-03-19", "time": "12:15:00"},
+    ]
+
+if __name__ == "__main__":
+    test_overlapping_booking_blocks_table()
+    test_opening_hours()
+    test_hours_past_midnight()
+    test_record_booking_updates_without_reloading()
+    test_loads_run_outside_the_lock_and_are_shared()
+    test_least_recently_used_days_are_evicted()
+    test_find_slots_nearest_first()
+    test_find_slots_spans_days_and_hours()
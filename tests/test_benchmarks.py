@@ -0,0 +1,102 @@
+import sys
+import os
+import json
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.llm_client import GroqClient, LLMError
+from agents.streaming import ReplyStream
+from benchmarks.booking_load import build_scenario, report
+from benchmarks.fake_groq import FakeGroqServer
+from benchmarks.suite import compare, percentile, summarize
+from benchmarks.synthetic import CUISINES, SyntheticDataset, city_names
+from database.queries import DINING_DURATION_MINUTES
+
+def payload(user_input, stream=False):
+    body = {"messages": [{"role": "user", "content": f"Extract the fields.\nUser input: {user_input}"}]}
+    if stream:
+        body["stream"] = True
+    return body
+
+def test_fake_groq_answers_extraction_prompts():
+    with FakeGroqServer(city_names(5), CUISINES, latency=0.0) as fake:
+        client = GroqClient("test-key", api_url=fake.url, max_retries=0)
+        extraction = json.loads(client.complete(payload("Book a table for 4 at a Thai place in City 3")))
+        assert extraction["intent"] == "reservation"
+        assert extraction["city"] == "City 3"
+        assert extraction["cuisine"] == "Thai"
+
+        reply = ReplyStream(client.stream(payload("Any Italian restaurants in City 2?", stream=True)))
+        assert "".join(reply) == "Sure, let me look that up."
+        assert reply.result["intent"] == "restaurants"
+        assert fake.stats() == {"requests": 2, "errors": 0}
+
+def test_fake_groq_injects_errors():
+    with FakeGroqServer(latency=0.0, error_rate=1.0) as fake:
+        client = GroqClient("test-key", api_url=fake.url, max_retries=1, backoff_base=0.01)
+        try:
+            client.complete(payload("hello"))
+            assert False, "expected LLMError"
+        except LLMError as e:
+            assert "503" in str(e)
+        assert fake.stats() == {"requests": 2, "errors": 2}
+
+def test_synthetic_dataset_is_deterministic_and_never_overlaps():
+    today = date(2025, 1, 31)
+    first = SyntheticDataset(cities=3, restaurants=10, tables_per_restaurant=4, months=1, seed=1, today=today)
+    second = SyntheticDataset(cities=3, restaurants=10, tables_per_restaurant=4, months=1, seed=1, today=today)
+    reservations = list(first.reservation_rows())
+    assert list(first.restaurant_rows()) == list(second.restaurant_rows())
+    assert reservations == list(second.reservation_rows())
+    assert len(list(first.table_rows())) == 40
+
+    capacities = {table["id"]: table["seating_capacity"] for table in first.table_rows()}
+    by_table = {}
+    for row in reservations:
+        assert row["reservation_time"].date() < today
+        assert row["num_people"] <= capacities[row["table_id"]]
+        by_table.setdefault(row["table_id"], []).append(row["reservation_time"])
+    for times in by_table.values():
+        times.sort()
+        for earlier, later in zip(times, times[1:]):
+            assert later - earlier >= timedelta(minutes=DINING_DURATION_MINUTES)
+
+def test_percentiles_and_regression_compare():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 0.50) == 0.050
+    assert percentile(values, 0.99) == 0.099
+    summary = summarize(values, errors=1, wall_time=2.0)
+    assert summary["count"] == 100 and summary["throughput_per_s"] == 50.0
+    assert summary["p95_ms"] == 95.0 and summary["max_ms"] == 100.0
+
+    old = {"results": {"recommend": {"p95_ms": 10.0}, "book_table": {"p95_ms": 20.0}}}
+    new = {"results": {"recommend": {"p95_ms": 10.5}, "book_table": {"p95_ms": 30.0}, "new_op": {"p95_ms": 1.0}}}
+    regressions = compare(old, new, threshold=0.10)
+    assert len(regressions) == 1 and regressions[0].startswith("book_table")
+
+def test_booking_load_scenario_and_report():
+    scenario = build_scenario([1, 2], "2099-01-01", ["19:00", "19:30"], users=50, seed=3)
+    assert scenario == build_scenario([1, 2], "2099-01-01", ["19:00", "19:30"], users=50, seed=3)
+    assert {v["restaurant_id"] for v in scenario} == {1, 2}
+    assert {v["time"] for v in scenario} == {"19:00", "19:30"}
+
+    outcomes = [
+        {"outcome": "booked", "attempts": 1, "check_seconds": 0.01, "book_seconds": 0.02, "total_seconds": 0.03},
+        {"outcome": "booked", "attempts": 3, "check_seconds": 0.01, "book_seconds": 0.05, "total_seconds": 0.06},
+        {"outcome": "lost_race", "attempts": 5, "check_seconds": 0.01, "book_seconds": 0.09, "total_seconds": 0.10},
+        {"outcome": "full", "attempts": 0, "check_seconds": 0.01, "total_seconds": 0.01},
+        {"outcome": "error", "attempts": 0, "error": "TimeoutError()", "total_seconds": 0.5},
+    ]
+    result = report(outcomes, wall_time=1.0, max_attempts=5)
+    assert result["outcomes"] == {"booked": 2, "lost_race": 1, "full": 1, "error": 1}
+    assert result["bookings_per_s"] == 2.0
+    assert result["retries"] == 2 + 4 and result["exhausted_retries"] == 1
+    assert result["book_table"]["count"] == 3 and result["end_to_end"]["errors"] == 1
+    assert result["errors"] == ["TimeoutError()"]
+
+if __name__ == "__main__":
+    test_fake_groq_answers_extraction_prompts()
+    test_fake_groq_injects_errors()
+    test_synthetic_dataset_is_deterministic_and_never_overlaps()
+    test_percentiles_and_regression_compare()
+    test_booking_load_scenario_and_report()
@@ -0,0 +1,43 @@
+import sys
+import os
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.reservation import ReservationAgent
+from database.queries import CHECK_RESTAURANT_AVAILABILITY
+
+PARALLEL_BOOKERS = 20
+
+def test_parallel_bookings_never_share_a_table():
+    res_agent = ReservationAgent()
+    restaurant_id = 1
+    # A random far-future day so earlier runs do not interfere, at a time the restaurant is open
+    date = f"2099-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
+    opening, _ = res_agent.db_agent.fetch(CHECK_RESTAURANT_AVAILABILITY, {"restaurant_id": restaurant_id})[0]
+    time = (datetime.combine(datetime.min, opening) + timedelta(minutes=15)).strftime("%H:%M:00") if opening else "19:00:00"
+    free_tables = res_agent.check_availability(restaurant_id, date, time, 1).get("available_tables", [])
+    assert free_tables, "The race needs at least one free table"
+
+    def book(i):
+        return res_agent.book_table(restaurant_id, free_tables[0]["id"] if free_tables else None,
+                                    f"Load User {i}", "0000000000", 1, date, time)
+
+    with ThreadPoolExecutor(max_workers=PARALLEL_BOOKERS) as pool:
+        results = list(pool.map(book, range(PARALLEL_BOOKERS)))
+
+    booked = [r for r in results if r["status"] == "success"]
+    booked_tables = Counter(r["table_id"] for r in booked)
+    try:
+        # Losers fall back to the next free table, so every table is won by exactly one booker
+        assert all(count == 1 for count in booked_tables.values()), "A table was double booked"
+        assert booked_tables[free_tables[0]["id"]] == 1
+        assert len(booked) == min(PARALLEL_BOOKERS, len(free_tables))
+    finally:
+        for r in booked:
+            res_agent.db_agent.insert("DELETE FROM reservations WHERE id = :id RETURNING id", {"id": r["reservation_id"]})
+
+if __name__ == "__main__":
+    test_parallel_bookings_never_share_a_table()
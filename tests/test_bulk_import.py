@@ -0,0 +1,79 @@
+import sys
+import os
+import tempfile
+from datetime import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from database import bulk_import
+from database.bulk_import import ImportReport, TooManyErrors
+
+def write_file(suffix, content):
+    f = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8", newline="")
+    f.write(content)
+    f.close()
+    return f.name
+
+def test_csv_and_jsonl_records_carry_line_numbers():
+    csv_path = write_file(".csv", "name,location,cuisine\nSpice Hub,Delhi,Indian\n\"Dragon, Wok\",Mumbai,Chinese\n")
+    jsonl_path = write_file(".jsonl", '{"name": "Spice Hub", "location": "Delhi"}\n\nnot json\n')
+    try:
+        records = list(bulk_import.iter_records(csv_path))
+        assert [line for line, _ in records] == [2, 3]
+        assert records[1][1]["name"] == "Dragon, Wok"
+        records = list(bulk_import.iter_records(jsonl_path))
+        assert records == [(1, {"name": "Spice Hub", "location": "Delhi"}), (3, "not json\n")]
+    finally:
+        os.remove(csv_path)
+        os.remove(jsonl_path)
+
+def test_validation_normalizes_and_rejects_rows():
+    row = bulk_import.validate_restaurant({"name": " Spice Hub ", "location": "Delhi", "cuisine": "",
+                                           "opening_time": "11:00", "closing_time": "23:30:00"})
+    assert row == {"name": "Spice Hub", "location": "Delhi", "cuisine": None, "contact": None,
+                   "opening_time": time(11, 0), "closing_time": time(23, 30)}
+    row = bulk_import.validate_table({"restaurant_name": "Spice Hub", "location": "Delhi", "table_number": "3",
+                                      "seating_capacity": 4, "is_available": "no"})
+    assert row["table_number"] == 3 and row["is_available"] is False
+    for validate, record, field in (
+        (bulk_import.validate_restaurant, {"location": "Delhi"}, "name"),
+        (bulk_import.validate_restaurant, {"name": "A", "location": "B", "opening_time": "7pm"}, "opening_time"),
+        (bulk_import.validate_table, {"restaurant_name": "A", "location": "B", "table_number": 0,
+                                      "seating_capacity": 2}, "table_number"),
+        (bulk_import.validate_table, "not json", "JSON object"),
+    ):
+        try:
+            validate(record)
+            assert False, "expected ValueError"
+        except ValueError as error:
+            assert field in str(error)
+
+def test_chunks_skip_invalid_rows_and_honour_max_errors():
+    records = [(line, {"name": f"R{line}", "location": "Delhi"}) for line in range(1, 6)]
+    records.insert(2, (99, {"name": "", "location": "Delhi"}))
+    report = ImportReport("restaurants", "r.csv")
+    batches = list(bulk_import.chunks(iter(records), bulk_import.validate_restaurant, report, size=2))
+    assert [[row["line"] for row in batch] for batch in batches] == [[1, 2], [3, 4], [5]]
+    assert (report.read, report.invalid) == (6, 1)
+    assert report.errors == ["line 99: name is required"]
+    try:
+        list(bulk_import.chunks(iter(records), bulk_import.validate_restaurant, ImportReport("restaurants", "r.csv"),
+                                size=2, max_errors=0))
+        assert False, "expected TooManyErrors"
+    except TooManyErrors as error:
+        assert "line 99" in str(error)
+
+def test_validate_only_reports_without_a_database():
+    path = write_file(".csv", "restaurant_name,location,table_number,seating_capacity\n"
+                              "Spice Hub,Delhi,1,4\nSpice Hub,Delhi,2,many\n")
+    try:
+        [report] = bulk_import.run(tables=path, validate_only=True)
+    finally:
+        os.remove(path)
+    assert (report["kind"], report["read"], report["written"], report["invalid"]) == ("tables", 2, 0, 1)
+    assert "seating_capacity" in report["errors"][0]
+
+if __name__ == "__main__":
+    test_csv_and_jsonl_records_carry_line_numbers()
+    test_validation_normalizes_and_rejects_rows()
+    test_chunks_skip_invalid_rows_and_honour_max_errors()
+    test_validate_only_reports_without_a_database()
@@ -0,0 +1,123 @@
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.catalog import CatalogIndex
+from database.queries import CATALOG_SAFE_WATERMARK, HAS_RESTAURANT_WATERMARK, LOAD_CATALOG_WITH_WATERMARK, LOAD_CATALOG_SINCE, RECENT_BOOKING_COUNTS
+
+class FakeDatabaseAgent:
+    """Answers the catalog queries from an in-memory list of rows."""
+
+    def __init__(self, rows, booking_counts=(), now=datetime(2025, 1, 1, 12)):
+        self.rows = rows
+        self.booking_counts = list(booking_counts)
+        self.now = now
+        self.queries = []
+
+    def fetch(self, query, params=None):
+        self.queries.append(query)
+        if query == HAS_RESTAURANT_WATERMARK:
+            return [(1,)]
+        if query == CATALOG_SAFE_WATERMARK:
+            return [(self.now - timedelta(seconds=params["margin"]),)]
+        if query == LOAD_CATALOG_WITH_WATERMARK:
+            return list(self.rows)
+        if query == LOAD_CATALOG_SINCE:
+            return sorted((r for r in self.rows if r[4] > params["watermark"]), key=lambda r: r[4])
+        if query == RECENT_BOOKING_COUNTS:
+            return list(self.booking_counts)
+        raise AssertionError(f"Unexpected query: {query}")
+
+    async def afetch(self, query, params=None):
+        await asyncio.sleep(0.01)
+        return self.fetch(query, params)
+
+def test_lookup_by_city_and_cuisine():
+    index = CatalogIndex()
+    index.load([
+        (1, "Taj", "Mumbai", "Indian"),
+        (2, "Dragon", "Mumbai", "Chinese"),
+        (3, "Saffron", "Pune", "Indian"),
+    ])
+    assert [r["id"] for r in index.lookup("mumbai ", "INDIAN")] == [1]
+    assert sorted(r["id"] for r in index.lookup("Mumbai")) == [1, 2]
+    assert index.lookup("Delhi") == []
+    assert index.lookup("Mumbai", "Thai") == []
+    assert index.lookup("Pune", "Indian")[0] == {"id": 3, "name": "Saffron", "location": "Pune", "cuisine": "Indian"}
+
+def test_incremental_refresh_moves_records():
+    t0, t1 = datetime(2025, 1, 1), datetime(2025, 1, 2)
+    db = FakeDatabaseAgent([(1, "Taj", "Mumbai", "Indian", t0)], now=t0)
+    now = [0.0]
+    index = CatalogIndex(db, refresh_interval=60, clock=lambda: now[0])
+    assert len(index.lookup("Mumbai", "Indian")) == 1
+    assert index.full_loads == 1
+
+    # Restaurant moves city; only the changed row is re-read after invalidation
+    db.rows = [(1, "Taj", "Pune", "Indian", t1)]
+    index.invalidate()
+    assert index.lookup("Mumbai", "Indian") == []
+    assert [r["id"] for r in index.lookup("Pune", "Indian")] == [1]
+    assert index.incremental_loads == 1
+    assert db.queries[-1] == LOAD_CATALOG_SINCE
+
+    # Within the refresh interval lookups never touch the database
+    queries_before = len(db.queries)
+    index.lookup("Pune")
+    assert len(db.queries) == queries_before
+
+def test_late_commits_are_not_skipped():
+    t = datetime(2025, 1, 1, 12)
+    db = FakeDatabaseAgent([(1, "Taj", "Mumbai", "Indian", t)], now=t + timedelta(seconds=5))
+    index = CatalogIndex(db, refresh_interval=60, watermark_margin=120)
+    index.refresh()
+
+    # This row's transaction began before that refresh but committed after it
+    db.rows.append((2, "Trishna", "Mumbai", "Indian", t - timedelta(seconds=30)))
+    db.now = t + timedelta(seconds=65)
+    index.invalidate()
+    assert sorted(r["id"] for r in index.lookup("Mumbai")) == [1, 2]
+    assert index.incremental_loads == 1
+
+def test_concurrent_async_refreshes_share_one_load():
+    db = FakeDatabaseAgent([(1, "Taj", "Mumbai", "Indian", datetime(2025, 1, 1))])
+    index = CatalogIndex(db, refresh_interval=60)
+
+    async def run():
+        await asyncio.gather(*(index.amaybe_refresh() for _ in range(5)))
+        return index.lookup("Mumbai", refresh=False)
+
+    assert [r["id"] for r in asyncio.run(run())] == [1]
+    assert index.full_loads == 1
+    assert db.queries.count(LOAD_CATALOG_WITH_WATERMARK) == 1
+
+def test_top_pages_by_recent_bookings():
+    rows = [(i, f"R{i}", "Mumbai", "Indian" if i % 2 else "Thai", datetime(2025, 1, 1)) for i in range(1, 8)]
+    db = FakeDatabaseAgent(rows, booking_counts=[(3, 10), (6, 10), (5, 2)])
+    index = CatalogIndex(db, refresh_interval=60)
+
+    page, cursor = index.top("Mumbai", k=3)
+    # Most booked first, ties broken by id
+    assert [r["id"] for r in page] == [3, 6, 5]
+    assert page[0]["recent_bookings"] == 10
+    assert cursor == [2, 5]
+
+    # The next page continues from the cursor without touching the database again
+    queries_before = len(db.queries)
+    page, cursor = index.top("Mumbai", k=3, after=cursor)
+    assert [r["id"] for r in page] == [1, 2, 4]
+    page, cursor = index.top("Mumbai", k=3, after=cursor)
+    assert [r["id"] for r in page] == [7] and cursor is None
+    assert len(db.queries) == queries_before
+
+    assert [r["id"] for r in index.top("Mumbai", "Indian", k=2)[0]] == [3, 5]
+    assert index.top("Delhi") == ([], None)
+
+if __name__ == "__main__":
+    test_lookup_by_city_and_cuisine()
+    test_incremental_refresh_moves_records()
+    test_late_commits_are_not_skipped()
+    test_concurrent_async_refreshes_share_one_load()
+    test_top_pages_by_recent_bookings()
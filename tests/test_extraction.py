@@ -0,0 +1,43 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.extraction import load_extraction, parse_extraction, build_extraction_prompt, EXTRACTION_SCHEMA
+
+def test_parse_full_extraction():
+    content = '{"intent": "reservation", "city": "Pune", "cuisine": null, "restaurant_name": "Taj", "date": "2025-03-18", "time": "19:30", "num_people": "4"}'
+    result = parse_extraction(content)
+    assert result == {
+        "intent": "reservation",
+        "city": "Pune",
+        "cuisine": None,
+        "restaurant_name": "Taj",
+        "date": "2025-03-18",
+        "time": "19:30:00",
+        "num_people": 4,
+    }
+
+def test_parse_rejects_malformed_values():
+    result = parse_extraction('{"intent": "weather", "city": "null", "date": "tomorrow", "time": "25:00", "num_people": 0, "extra": 1}')
+    assert set(result) == set(EXTRACTION_SCHEMA)
+    assert all(value is None for value in result.values())
+
+def test_parse_invalid_json():
+    assert parse_extraction("Sure! Here is the JSON") == {key: None for key in EXTRACTION_SCHEMA}
+
+def test_load_tells_invalid_json_from_empty_answer():
+    assert load_extraction("Sure! Here is the JSON") is None
+    assert load_extraction('["restaurants"]') is None
+    assert load_extraction('{"intent": null}') == {key: None for key in EXTRACTION_SCHEMA}
+
+def test_prompt_lists_every_key():
+    prompt = build_extraction_prompt("table for 2 in Delhi", today="2025-03-01")
+    assert all(f"'{key}'" in prompt for key in EXTRACTION_SCHEMA)
+    assert "2025-03-01" in prompt
+
+if __name__ == "__main__":
+    test_parse_full_extraction()
+    test_parse_rejects_malformed_values()
+    test_parse_invalid_json()
+    test_load_tells_invalid_json_from_empty_answer()
+    test_prompt_lists_every_key()
@@ -0,0 +1,57 @@
+import sys
+import os
+import logging
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from logs.logger import Histogram, Metrics, SampleFilter, StructuredFormatter, get_logger, log_event, metrics, span
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for ms in range(1, 101):
+        histogram.observe(ms / 1000)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert abs(snapshot["mean_ms"] - 50.5) < 1e-6
+    # Bucket bounds are 25% apart, so estimates are within one bucket of the truth
+    assert 50 <= snapshot["p50_ms"] <= 50 * 1.25
+    assert 95 <= snapshot["p95_ms"] <= 95 * 1.25
+    assert 99 <= snapshot["p99_ms"] <= 100
+    assert snapshot["max_ms"] == 100
+
+def test_span_records_errors():
+    metrics.reset()
+    with span("unit_stage"):
+        pass
+    try:
+        with span("unit_stage"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    stats = metrics.snapshot()["unit_stage"]
+    assert stats["count"] == 2
+    assert stats["errors"] == 1
+
+def test_disabled_level_skips_formatting():
+    class Expensive:
+        def __repr__(self):
+            raise AssertionError("formatted although DEBUG is disabled")
+
+    log = get_logger("unit")
+    log.setLevel(logging.INFO)
+    log_event(log, logging.DEBUG, "never rendered", payload=Expensive())
+
+def test_structured_formatter_and_sampling():
+    record = logging.LogRecord("foodiespot.unit", logging.INFO, __file__, 1, "turn", None, None)
+    record.fields = {"intent": "restaurants", "ms": 12.5}
+    assert StructuredFormatter().format(record).endswith("turn intent='restaurants' ms=12.5")
+    assert '"intent": "restaurants"' in StructuredFormatter(as_json=True).format(record)
+
+    debug = logging.LogRecord("foodiespot.unit", logging.DEBUG, __file__, 1, "detail", None, None)
+    assert not SampleFilter(0.0).filter(debug)
+    assert SampleFilter(0.0).filter(record)
+
+if __name__ == "__main__":
+    test_histogram_percentiles()
+    test_span_records_errors()
+    test_disabled_level_skips_formatting()
+    test_structured_formatter_and_sampling()
@@ -0,0 +1,79 @@
+import sys
+import os
+import asyncio
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.chat import ChatAgent
+from agents.intent_classifier import IntentClassifier, NaiveBayesIntentModel, ClassifierStats
+from agents.model_router import ModelRouter
+
+def test_rules_classify_obvious_queries():
+    classifier = IntentClassifier(stats=ClassifierStats())
+    assert classifier.predict("places to eat in Pune") == "restaurants"
+    assert classifier.predict("Book a table for 4") == "reservation"
+    assert classifier.predict("restaurants in mumbai") == "restaurants"
+
+def test_low_confidence_falls_through():
+    stats = ClassifierStats()
+    classifier = IntentClassifier(stats=stats)
+    assert classifier.predict("Mumbai") is None
+    assert classifier.predict("book a table at an italian restaurant in pune") is None
+    snapshot = stats.snapshot()
+    assert snapshot["requests"] == 2
+    assert snapshot["llm_fallthroughs"] == 2
+    assert snapshot["hit_rate"] == 0.0
+
+def test_model_round_trip():
+    examples = [
+        ("show me chinese food in delhi", "restaurants"),
+        ("any good thai spots in goa", "restaurants"),
+        ("i want to reserve for tonight", "reservation"),
+        ("hold a spot for two at eight", "reservation"),
+    ]
+    model = NaiveBayesIntentModel.fit(examples)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "intent_model.json")
+        model.save(path)
+        classifier = IntentClassifier(model_path=path, stats=ClassifierStats())
+    intent, confidence = classifier.classify("hold a spot for two")
+    assert intent == "reservation"
+    assert 0.0 < confidence <= 1.0
+
+class RecordingDispatcher:
+    """Records every completion it is asked for and answers with an empty JSON object."""
+
+    def __init__(self):
+        self.payloads = []
+
+    async def complete(self, payload, priority=None, coalesce=True):
+        self.payloads.append(payload)
+        return "{}"
+
+def test_confident_turn_sends_no_completion():
+    # No Groq key or database needed: only the pieces the turn uses
+    agent = ChatAgent.__new__(ChatAgent)
+    stats = ClassifierStats()
+    agent.intent_classifier = IntentClassifier(stats=stats)
+    dispatcher = RecordingDispatcher()
+    agent.router = ModelRouter(dispatcher, models=("small-local",))
+
+    assert asyncio.run(agent._aextract_combined("Book a table for 4")) == ("reservation", {})
+    assert asyncio.run(agent._aextract_intent_two_call("Book a table for 4")) == ("reservation", {})
+    assert dispatcher.payloads == []
+    assert stats.snapshot()["llm_fallthroughs"] == 0
+    assert stats.snapshot()["round_trips_saved"] == 2
+
+def test_hits_are_not_counted_as_saved_by_predict():
+    stats = ClassifierStats()
+    classifier = IntentClassifier(stats=stats)
+    assert classifier.predict("places to eat in Pune") == "restaurants"
+    snapshot = stats.snapshot()
+    assert (snapshot["local_hits"], snapshot["round_trips_saved"]) == (1, 0)
+
+if __name__ == "__main__":
+    test_rules_classify_obvious_queries()
+    test_low_confidence_falls_through()
+    test_model_round_trip()
+    test_confident_turn_sends_no_completion()
+    test_hits_are_not_counted_as_saved_by_predict()
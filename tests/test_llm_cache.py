@@ -0,0 +1,51 @@
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.llm_cache import CompletionCache, make_key, normalize_input
+
+def test_normalized_keys():
+    assert normalize_input("  Restaurants in   MUMBAI?! ") == "restaurants in mumbai"
+    assert make_key("m", "t", "Restaurants in Mumbai.") == make_key("m", "t", "restaurants in mumbai")
+    assert make_key("m", "t", "restaurants in mumbai") != make_key("other", "t", "restaurants in mumbai")
+
+def test_lru_eviction_and_ttl():
+    now = [0.0]
+    cache = CompletionCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", {"intent": "restaurants"})
+    cache.set("b", {"intent": "reservation"})
+    assert cache.get("a") == {"intent": "restaurants"}
+    cache.set("c", {"intent": "restaurants"})  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    now[0] = 11.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+def test_get_or_compute_skips_compute_on_hit():
+    cache = CompletionCache()
+    calls = []
+    compute = lambda: calls.append(1) or {"city": "Mumbai", "cuisine": None}
+    first = cache.get_or_compute("m", "t", "Mumbai restaurants", compute)
+    second = cache.get_or_compute("m", "t", "mumbai restaurants!", compute)
+    assert first == second
+    assert len(calls) == 1
+
+def test_disk_persistence():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm_cache.sqlite")
+        CompletionCache(path=path).set("k", {"intent": "restaurants"})
+        reopened = CompletionCache(path=path)
+        assert reopened.get("k") == {"intent": "restaurants"}
+        assert reopened.stats()["disk_hits"] == 1
+        reopened._db.close()
+
+if __name__ == "__main__":
+    test_normalized_keys()
+    test_lru_eviction_and_ttl()
+    test_get_or_compute_skips_compute_on_hit()
+    test_disk_persistence()
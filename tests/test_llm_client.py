@@ -0,0 +1,176 @@
+import sys
+import os
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.llm_client import AsyncGroqClient, GroqClient, CircuitBreaker, LLMError, LLMUnavailableError, parse_retry_after
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    # Each entry is (status, headers, body); the last one repeats
+    script = []
+    calls = 0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        cls = type(self)
+        status, headers, body = cls.script[min(cls.calls, len(cls.script) - 1)]
+        cls.calls += 1
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def completion(content):
+    return {"choices": [{"message": {"content": content}}]}
+
+def start_server(script):
+    handler = type("Handler", (FakeGroqHandler,), {"script": script, "calls": 0})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, handler, f"http://127.0.0.1:{server.server_port}/openai/v1/chat/completions"
+
+def test_retries_on_429_then_succeeds():
+    server, handler, url = start_server([
+        (429, {"Retry-After": "0"}, {"error": "rate limited"}),
+        (503, {}, {"error": "unavailable"}),
+        (200, {}, completion('{"intent": "restaurants"}')),
+    ])
+    try:
+        client = GroqClient("test-key", api_url=url, max_retries=2, backoff_base=0.01)
+        assert client.complete({"model": "m", "messages": []}) == '{"intent": "restaurants"}'
+        assert handler.calls == 3
+        assert client.breaker.state == "closed"
+    finally:
+        server.shutdown()
+
+def test_async_client_retries_then_succeeds():
+    server, handler, url = start_server([
+        (502, {}, {"error": "bad gateway"}),
+        (200, {}, completion('{"intent": "reservation"}')),
+    ])
+
+    async def run():
+        client = AsyncGroqClient("test-key", api_url=url, max_retries=1, backoff_base=0.01)
+        try:
+            return await asyncio.gather(*(client.complete({"model": "m", "messages": []}) for _ in range(3)))
+        finally:
+            await client.aclose()
+
+    try:
+        # The first request hits the 502 and retries; the others succeed straight away
+        assert asyncio.run(run()) == ['{"intent": "reservation"}'] * 3
+        assert handler.calls == 4
+    finally:
+        server.shutdown()
+
+def test_client_error_is_not_retried():
+    server, handler, url = start_server([(400, {}, {"error": "bad request"})])
+    try:
+        client = GroqClient("test-key", api_url=url, max_retries=3, backoff_base=0.01)
+        try:
+            client.complete({"model": "m", "messages": []})
+            assert False, "Expected LLMError"
+        except LLMError:
+            pass
+        assert handler.calls == 1
+    finally:
+        server.shutdown()
+
+def test_circuit_opens_and_fails_fast():
+    server, handler, url = start_server([(500, {}, {"error": "boom"})])
+    try:
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        client = GroqClient("test-key", api_url=url, max_retries=0, breaker=breaker)
+        for _ in range(2):
+            try:
+                client.complete({"model": "m", "messages": []})
+            except LLMError:
+                pass
+        assert breaker.state == "open"
+        calls_before = handler.calls
+        try:
+            client.complete({"model": "m", "messages": []})
+            assert False, "Expected LLMUnavailableError"
+        except LLMUnavailableError:
+            pass
+        assert handler.calls == calls_before
+    finally:
+        server.shutdown()
+
+def test_half_open_trial_closes_circuit():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] = 11.0
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+def test_unexpected_errors_end_half_open_trial():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    now[0] = 11.0
+    client = GroqClient("test-key", api_url="http://127.0.0.1:9/", max_retries=0, breaker=breaker)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    client.session.post = broken
+    try:
+        client.complete({"model": "m", "messages": []})
+        assert False, "Expected LLMError"
+    except LLMError:
+        pass
+    # The failed trial reopened the circuit instead of leaving it stuck half-open
+    now[0] = 22.0
+    assert breaker.allow()
+
+    async def cancelled_trial():
+        aclient = AsyncGroqClient("test-key", api_url="http://127.0.0.1:9/", max_retries=0, breaker=breaker)
+
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        aclient.client.post = hang
+        task = asyncio.ensure_future(aclient.post({"model": "m", "messages": []}))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await aclient.aclose()
+
+    now[0] = 33.0
+    breaker.record_failure()
+    now[0] = 44.0
+    asyncio.run(cancelled_trial())
+    assert breaker.allow()
+
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+if __name__ == "__main__":
+    test_retries_on_429_then_succeeds()
+    test_async_client_retries_then_succeeds()
+    test_client_error_is_not_retried()
+    test_circuit_opens_and_fails_fast()
+    test_half_open_trial_closes_circuit()
+    test_unexpected_errors_end_half_open_trial()
+    test_parse_retry_after()
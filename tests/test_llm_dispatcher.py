@@ -0,0 +1,105 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.llm_client import BaseGroqClient
+from agents.llm_dispatcher import BOOKING, BROWSING, LLMDispatcher, TokenBucket, priority_scope
+
+def payload(text):
+    return {"model": "m", "messages": [{"role": "user", "content": text}]}
+
+class FakeAsyncClient:
+    """Answers with the prompt text; holds every call until ``gate`` is set."""
+    _content = staticmethod(BaseGroqClient._content)
+
+    def __init__(self):
+        self.calls = []
+        self.gate = asyncio.Event()
+
+    async def post(self, payload):
+        text = payload["messages"][0]["content"]
+        self.calls.append(text)
+        await self.gate.wait()
+        return {"choices": [{"message": {"content": text}}], "usage": {"total_tokens": 10}}
+
+def test_token_bucket_refills_per_minute():
+    now = [0.0]
+    bucket = TokenBucket(60, capacity=2, clock=lambda: now[0])
+    assert bucket.wait_time(1) == 0.0
+    bucket.take(2)
+    assert bucket.wait_time(1) == 1.0
+    now[0] = 0.5
+    assert bucket.wait_time(1) == 0.5
+    # Asking for more than the capacity waits for a full bucket
+    assert bucket.wait_time(10) == 1.5
+
+def test_identical_prompts_share_one_completion():
+    async def run():
+        client = FakeAsyncClient()
+        dispatcher = LLMDispatcher(client, requests_per_minute=0, tokens_per_minute=0)
+        calls = [asyncio.ensure_future(dispatcher.complete(payload("restaurants in Delhi"))) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        client.gate.set()
+        return client, dispatcher, await asyncio.gather(*calls)
+
+    client, dispatcher, results = asyncio.run(run())
+    assert results == ["restaurants in Delhi"] * 5
+    assert client.calls == ["restaurants in Delhi"]
+    stats = dispatcher.stats()
+    assert stats["submitted"] == 5 and stats["coalesced"] == 4 and stats["completed"] == 1
+
+def test_booking_turns_are_admitted_first():
+    async def run():
+        client = FakeAsyncClient()
+        dispatcher = LLMDispatcher(client, requests_per_minute=0, tokens_per_minute=0, max_concurrency=1)
+        first = asyncio.ensure_future(dispatcher.complete(payload("browse 1")))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(dispatcher.complete(payload("browse 2"), BROWSING))
+        with priority_scope(BOOKING):
+            third = asyncio.ensure_future(dispatcher.complete(payload("book a table")))
+        await asyncio.sleep(0.01)
+        depth = dispatcher.stats()["queue_depth"]
+        client.gate.set()
+        await asyncio.gather(first, second, third)
+        return client.calls, depth
+
+    calls, depth = asyncio.run(run())
+    assert depth == {"booking": 1, "browsing": 1}
+    assert calls == ["browse 1", "book a table", "browse 2"]
+
+def test_rate_limit_queues_instead_of_sending():
+    async def run():
+        client = FakeAsyncClient()
+        client.gate.set()
+        # One request per 50ms: the second call must wait for the bucket to refill
+        dispatcher = LLMDispatcher(client, requests_per_minute=1200, tokens_per_minute=0)
+        dispatcher.requests.capacity = dispatcher.requests.level = 1
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(dispatcher.complete(payload("a")), dispatcher.complete(payload("b")))
+        return loop.time() - start, dispatcher.stats()
+
+    elapsed, stats = asyncio.run(run())
+    assert elapsed >= 0.04
+    assert stats["completed"] == 2 and stats["running"] == 0
+
+def test_abandoned_completion_is_cancelled():
+    async def run():
+        client = FakeAsyncClient()
+        dispatcher = LLMDispatcher(client, requests_per_minute=0, tokens_per_minute=0, max_concurrency=1)
+        call = asyncio.ensure_future(dispatcher.complete(payload("never mind")))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        await asyncio.sleep(0.01)
+        return dispatcher.stats()
+
+    stats = asyncio.run(run())
+    assert stats["running"] == 0 and stats["failed"] == 1
+
+if __name__ == "__main__":
+    test_token_bucket_refills_per_minute()
+    test_identical_prompts_share_one_completion()
+    test_booking_turns_are_admitted_first()
+    test_rate_limit_queues_instead_of_sending()
+    test_abandoned_completion_is_cancelled()
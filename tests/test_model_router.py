@@ -0,0 +1,100 @@
+import sys
+import os
+import asyncio
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.chat import ChatAgent, UNCLEAR
+from agents.model_router import BudgetExceededError, ModelRouter, model_histogram, turn_budget
+
+class FakeDispatcher:
+    """Answers from ``replies[model]``: a list of (delay, content), one per call to that model."""
+
+    def __init__(self, replies):
+        self.replies = {model: list(answers) for model, answers in replies.items()}
+        self.calls = []
+
+    async def complete(self, payload, priority=None, coalesce=True):
+        model = payload["model"]
+        self.calls.append((model, coalesce))
+        delay, content = self.replies[model].pop(0)
+        await asyncio.sleep(delay)
+        return content
+
+def payload(model):
+    return {"model": model, "messages": []}
+
+def parse(content):
+    return content if content in ("restaurants", "reservation") else None
+
+def accept(intent):
+    return intent is not None
+
+def route(router, budget=None):
+    async def run():
+        if budget is None:
+            return await router.complete(payload, parse, accept)
+        with turn_budget(budget):
+            return await router.complete(payload, parse, accept)
+    return asyncio.run(run())
+
+def test_small_model_answer_is_kept():
+    dispatcher = FakeDispatcher({"small-a": [(0, "reservation")], "large-a": []})
+    router = ModelRouter(dispatcher, models=("small-a", "large-a"))
+    assert route(router) == "reservation"
+    assert dispatcher.calls == [("small-a", True)]
+    assert router.stats()["decisions"] == {"small-a:accepted": 1}
+
+def test_unusable_answer_escalates_to_larger_model():
+    dispatcher = FakeDispatcher({"small-b": [(0, "not json")], "large-b": [(0, "restaurants")]})
+    router = ModelRouter(dispatcher, models=("small-b", "large-b"))
+    assert route(router) == "restaurants"
+    assert router.stats()["decisions"] == {"large-b:accepted": 1, "small-b:escalated": 1}
+
+def test_unclear_intent_is_kept_but_unparsed_answer_escalates():
+    dispatcher = FakeDispatcher({
+        "small-f": [(0, '{"intent": null}'), (0, "I think they want food")],
+        "large-f": [(0, '{"intent": "restaurants"}')],
+    })
+    router = ModelRouter(dispatcher, models=("small-f", "large-f"))
+    # Chit-chat parses as an unclear intent: a real answer, not worth the larger model
+    assert asyncio.run(router.complete(payload, ChatAgent._parse_intent, ChatAgent._parsed)) == UNCLEAR
+    assert asyncio.run(router.complete(payload, ChatAgent._parse_intent, ChatAgent._parsed)) == "restaurants"
+    assert router.stats()["decisions"] == {"small-f:accepted": 1, "small-f:escalated": 1, "large-f:accepted": 1}
+
+def test_budget_bounds_the_turn():
+    # Nothing answers in time
+    dispatcher = FakeDispatcher({"small-c": [(1.0, "restaurants")]})
+    router = ModelRouter(dispatcher, models=("small-c",))
+    start = time.monotonic()
+    try:
+        route(router, budget=0.05)
+        assert False, "expected BudgetExceededError"
+    except BudgetExceededError:
+        pass
+    assert time.monotonic() - start < 0.5
+
+    # The larger model runs out of budget: the small model's answer is returned as is
+    dispatcher = FakeDispatcher({"small-d": [(0, "unclear")], "large-d": [(1.0, "restaurants")]})
+    router = ModelRouter(dispatcher, models=("small-d", "large-d"))
+    assert route(router, budget=0.05) is None
+    assert router.stats()["decisions"] == {"large-d:timed_out": 1, "small-d:escalated": 1}
+
+def test_hedged_request_wins_over_slow_primary():
+    for _ in range(20):
+        model_histogram("small-e").observe(0.01)
+    dispatcher = FakeDispatcher({"small-e": [(1.0, "restaurants"), (0, "reservation")]})
+    router = ModelRouter(dispatcher, models=("small-e",), hedge=True)
+    start = time.monotonic()
+    assert route(router) == "reservation"
+    assert time.monotonic() - start < 0.5
+    # The hedge must bypass coalescing, or it would just join the slow request
+    assert dispatcher.calls == [("small-e", True), ("small-e", False)]
+    assert router.stats()["decisions"] == {"small-e:accepted": 1, "small-e:hedge_won": 1, "small-e:hedged": 1}
+
+if __name__ == "__main__":
+    test_small_model_answer_is_kept()
+    test_unusable_answer_escalates_to_larger_model()
+    test_unclear_intent_is_kept_but_unparsed_answer_escalates()
+    test_budget_bounds_the_turn()
+    test_hedged_request_wins_over_slow_primary()
@@ -0,0 +1,62 @@
+import sys
+import os
+import json
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.catalog import CatalogIndex
+from agents.resolver import CatalogResolver, NameResolver, trigrams
+
+CITIES = ["Mumbai", "Pune", "Bangalore", "New Delhi", "Hyderabad"]
+CUISINES = ["Indian", "Italian", "Chinese", "South Indian", "Street Food"]
+
+def test_trigrams_match_pg_trgm_padding():
+    assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+
+def test_city_exact_alias_and_typo():
+    cities = NameResolver(CITIES, {"bombay": "mumbai", "bengaluru": "bangalore", "delhi": "new delhi"})
+    assert cities.resolve("mumbai ") == "Mumbai"
+    assert cities.resolve("NEW-DELHI") == "New Delhi"
+    assert cities.resolve("Bombay") == "Mumbai"
+    assert cities.resolve("Bengaluru") == "Bangalore"
+    assert cities.resolve("Delhi") == "New Delhi"
+    assert cities.resolve("Mumbaai") == "Mumbai"
+    assert cities.resolve("Hyderbad") == "Hyderabad"
+    assert cities.resolve("Tokyo") is None
+    assert cities.resolve("") is None
+
+def test_cuisine_filler_words_and_aliases():
+    resolver = CatalogResolver(CITIES, CUISINES)
+    assert resolver.resolve("bombay", "italian food") == ("Mumbai", "Italian")
+    assert resolver.resolve("Pune", "pizza") == ("Pune", "Italian")
+    assert resolver.resolve("Pune", "street food") == ("Pune", "Street Food")
+    assert resolver.resolve("Pune", "south indain") == ("Pune", "South Indian")
+    # Unresolvable values pass through unchanged
+    assert resolver.resolve("Atlantis", None) == ("Atlantis", None)
+
+def test_aliases_file_extends_builtin_aliases():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "aliases.json")
+        with open(path, "w") as f:
+            json.dump({"city": {"amchi": "mumbai"}, "cuisine": {"noodles": "chinese"}}, f)
+        resolver = CatalogResolver(CITIES, CUISINES, aliases_path=path)
+        assert resolver.resolve("amchi", "noodles") == ("Mumbai", "Chinese")
+
+def test_catalog_rebuilds_resolver_after_changes():
+    index = CatalogIndex()
+    index.load([(1, "Taj", "Mumbai", "Indian")])
+    assert index.resolve("bombay", "indain") == ("Mumbai", "Indian")
+    resolver = index.resolver()
+    assert index.resolver() is resolver
+
+    index.upsert([(2, "Saffron", "Pune", "Mughlai")])
+    assert index.resolver() is not resolver
+    assert index.resolve("poona", "biryani") == ("Pune", "Mughlai")
+    assert [r["id"] for r in index.top(*index.resolve("bombay"))[0]] == [1]
+
+if __name__ == "__main__":
+    test_trigrams_match_pg_trgm_padding()
+    test_city_exact_alias_and_typo()
+    test_cuisine_filler_words_and_aliases()
+    test_aliases_file_extends_builtin_aliases()
+    test_catalog_rebuilds_resolver_after_changes()
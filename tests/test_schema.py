@@ -0,0 +1,126 @@
+import sys
+import os
+from datetime import date, datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from benchmarks.partitions import relations
+from database import schema
+
+class FakeResult(list):
+    rowcount = 0
+
+    def scalar(self):
+        return self[0][0]
+
+    def fetchone(self):
+        return self[0]
+
+class FakeSession:
+    """Answers the partition listing from ``partitions`` and records DDL scripts."""
+
+    def __init__(self, partitions, duplicates=(), overlaps=()):
+        self.partitions = list(partitions)
+        self.duplicates = list(duplicates)
+        self.overlaps = list(overlaps)
+        self.scripts = []
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "HAVING COUNT" in sql:
+            return FakeResult(self.duplicates)
+        if "earlier.id < later.id" in sql:
+            return FakeResult(self.overlaps)
+        if "MIN(reservation_time)" in sql:
+            return FakeResult([(None, None, 0)])
+        if "pg_inherits" in sql:
+            return FakeResult([(name,) for name in sorted(self.partitions)])
+        return FakeResult([(None,)])
+
+    def connection(self):
+        return self
+
+    def exec_driver_sql(self, sql):
+        self.scripts.append(sql)
+
+def test_month_arithmetic_and_names():
+    assert schema.add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert schema.add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert schema.partition_name(date(2026, 3, 1)) == "reservations_2026_03"
+    assert schema.partition_month("reservations_2026_03") == date(2026, 3, 1)
+    assert schema.partition_month("reservations_default") is None
+    months = list(schema.months_between(datetime(2025, 11, 20, 19, 30), date(2026, 1, 5)))
+    assert months == [date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1)]
+
+def test_ensure_partitions_creates_only_missing_months():
+    db = FakeSession(["reservations_2026_01", "reservations_default"])
+    created = schema.ensure_partitions(db, date(2025, 12, 15), date(2026, 2, 1))
+    assert created == ["reservations_2025_12", "reservations_2026_02"]
+    assert "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')" in db.scripts[0]
+    assert "reservations_2025_12_no_overlap" in db.scripts[0]
+
+def test_archive_moves_only_finished_months():
+    names = ["reservations_2025_03", "reservations_2025_04", "reservations_2025_05", "reservations_default"]
+    db = FakeSession(names)
+    # On 17 October 2025 March ended more than 6 months ago; April did not
+    assert schema.archive(db, keep_months=6, today=date(2025, 10, 17), dry_run=True) == names[:1]
+    assert db.scripts == []
+    assert schema.archive(db, keep_months=5, tablespace="cold", today=date(2025, 10, 17)) == names[:2]
+    assert "DETACH PARTITION reservations_2025_03" in db.scripts[0]
+    assert "SET TABLESPACE cold" in db.scripts[1]
+    try:
+        schema.archive(db, tablespace="cold; DROP TABLE tables")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+def test_natural_keys_refuse_duplicate_restaurants():
+    db = FakeSession([])
+    schema.ensure_natural_keys(db)
+    assert "tables_restaurant_number_key" in db.statements[-1]
+
+    db = FakeSession([], duplicates=[("Spice Hub", "Delhi", 2)])
+    try:
+        schema.ensure_natural_keys(db)
+        assert False, "expected ValueError"
+    except ValueError as error:
+        assert "'Spice Hub' in 'Delhi' (2 rows)" in str(error)
+    assert not any("CREATE UNIQUE INDEX" in sql for sql in db.statements)
+
+def test_migrate_stops_on_overlapping_bookings():
+    # 1 (19:00) and 2 (20:00) clash, 2 and 3 (21:15) clash, 1 and 3 do not: only 2 must go
+    evening = datetime(2025, 3, 18, 19, 0)
+    overlaps = [
+        (2, 7, evening.replace(hour=20), 1, evening),
+        (3, 7, evening.replace(hour=21, minute=15), 2, evening.replace(hour=20)),
+    ]
+    assert schema.overlaps_to_cancel(overlaps) == [2]
+
+    db = FakeSession([], overlaps=overlaps)
+    try:
+        schema.migrate(db, today=date(2025, 3, 1))
+        assert False, "expected ValueError"
+    except ValueError as error:
+        assert "(ids 2)" in str(error) and "--cancel-overlaps" in str(error)
+    assert db.scripts == []
+
+    db = FakeSession([], overlaps=overlaps)
+    assert schema.migrate(db, today=date(2025, 3, 1), cancel_overlaps=True)["cancelled"] == [2]
+    assert "SET status = 'cancelled'" in db.statements[3]
+    assert "RENAME TO reservations_unpartitioned" in db.scripts[0]
+
+def test_explain_relations_are_collected_from_nested_plans():
+    plan = {"Node Type": "Limit", "Plans": [
+        {"Node Type": "Index Scan", "Relation Name": "tables"},
+        {"Node Type": "Append", "Plans": [{"Relation Name": "reservations_2026_10"}]},
+    ]}
+    assert relations(plan) == {"tables", "reservations_2026_10"}
+
+if __name__ == "__main__":
+    test_month_arithmetic_and_names()
+    test_ensure_partitions_creates_only_missing_months()
+    test_archive_moves_only_finished_months()
+    test_natural_keys_refuse_duplicate_restaurants()
+    test_migrate_stops_on_overlapping_bookings()
+    test_explain_relations_are_collected_from_nested_plans()
@@ -0,0 +1,45 @@
+import sys
+import os
+import subprocess
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from settings import Settings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def test_settings_from_env():
+    settings = Settings.from_env({
+        "DB_NAME": "foodie", "DB_USER": "app", "DB_PASSWORD": "secret", "DB_HOST": "db", "DB_PORT": "5432",
+        "DB_POOL_SIZE": "20", "DB_POOL_PRE_PING": "false",
+    })
+    assert settings.pool_size == 20 and settings.pool_pre_ping is False
+    assert settings.max_overflow == 10
+    assert settings.database_url("postgresql+asyncpg") == "postgresql+asyncpg://app:secret@db:5432/foodie"
+    assert "secret" not in repr(settings)
+
+def test_missing_database_variables_are_named_not_shown():
+    settings = Settings.from_env({"DB_NAME": "foodie", "DB_PASSWORD": "secret"})
+    try:
+        settings.database_url()
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "DB_USER" in str(e) and "DB_HOST" in str(e) and "DB_PORT" in str(e)
+        assert "DB_NAME" not in str(e) and "secret" not in str(e)
+
+def test_imports_create_no_engine_and_skip_crewai():
+    # A fresh interpreter, so modules imported by other tests don't count
+    code = (
+        "import sys, database.connect as connect, agents.chat\n"
+        "assert connect._engine is None\n"
+        "assert 'crewai' not in sys.modules\n"
+        "print(connect.pool_status()['checked_out'])\n"
+    )
+    env = {k: v for k, v in os.environ.items() if not k.startswith("DB_")}
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "0"
+
+if __name__ == "__main__":
+    test_settings_from_env()
+    test_missing_database_variables_are_named_not_shown()
+    test_imports_create_no_engine_and_skip_crewai()
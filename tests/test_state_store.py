@@ -0,0 +1,140 @@
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.catalog import CatalogIndex
+from agents.state_store import MemoryStateStore, SQLiteStateStore, StateStore, compact_state
+from database.queries import HAS_RESTAURANT_WATERMARK, LOAD_CATALOG
+
+class FakeDatabaseAgent:
+    """Serves the catalog without an updated_at column, so every refresh is a full load."""
+
+    def fetch(self, query, params=None):
+        if query == HAS_RESTAURANT_WATERMARK:
+            return []
+        if query == LOAD_CATALOG:
+            return [(1, "Taj", "Mumbai", "Indian"), (2, "Trishna", "Mumbai", "Indian")]
+        return []
+
+    async def afetch(self, query, params=None):
+        return self.fetch(query, params)
+
+def make_catalog():
+    catalog = CatalogIndex()
+    catalog.load([(1, "Taj", "Mumbai", "Indian"), (2, "Trishna", "Mumbai", "Indian")])
+    return catalog
+
+STATE = {
+    "intent": "restaurants",
+    "city": "Mumbai",
+    "cuisine": "Indian",
+    "recommendations": [
+        {"id": 1, "name": "Taj", "location": "Mumbai", "cuisine": "Indian"},
+        {"id": 2, "name": "Trishna", "location": "Mumbai", "cuisine": "Indian"},
+    ],
+}
+
+def test_recommendations_stored_as_ids():
+    compact = compact_state(STATE)
+    assert compact["recommendation_ids"] == [1, 2]
+    assert "recommendations" not in compact
+
+    catalog = make_catalog()
+    store = MemoryStateStore(catalog=catalog)
+    store.save("s1", STATE)
+    assert store.load("s1") == STATE
+    # A restaurant that left the catalog drops out of the resolved state
+    catalog.remove([2])
+    assert [r["id"] for r in store.load("s1")["recommendations"]] == [1]
+    assert store.load("unknown") == {}
+
+def test_memory_store_evicts_lru_and_expires():
+    now = [0.0]
+    store = MemoryStateStore(max_sessions=2, ttl=60, catalog=make_catalog(), clock=lambda: now[0])
+    store.save("a", {"city": "Pune"})
+    store.save("b", {"city": "Delhi"})
+    store.load("a")
+    store.save("c", {"city": "Goa"})
+    assert store.load("b") == {}
+    assert store.load("a") == {"city": "Pune"}
+    now[0] = 61.0
+    assert store.load("a") == {}
+    assert store.stats()["expirations"] == 1
+
+def test_memory_store_byte_cap():
+    store = MemoryStateStore(max_bytes=100, catalog=make_catalog())
+    for i in range(10):
+        store.save(f"s{i}", {"city": "x" * 30})
+    stats = store.stats()
+    assert stats["bytes"] <= 100
+    assert stats["sessions"] == 2
+
+def test_sqlite_store_is_shared_between_instances():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions.db")
+        catalog = make_catalog()
+        SQLiteStateStore(path, catalog=catalog).save("s1", STATE)
+        # A second instance stands in for another worker process
+        other = SQLiteStateStore(path, catalog=catalog)
+        assert other.load("s1") == STATE
+        other.delete("s1")
+        assert other.load("s1") == {}
+
+def test_cold_catalog_is_loaded_before_expanding():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions.db")
+        SQLiteStateStore(path, catalog=make_catalog()).save("s1", STATE)
+        # A restarted worker starts with an empty catalog
+        cold = CatalogIndex(FakeDatabaseAgent())
+        assert SQLiteStateStore(path, catalog=cold).load("s1") == STATE
+        assert asyncio.run(SQLiteStateStore(path, catalog=CatalogIndex(FakeDatabaseAgent())).aload("s1")) == STATE
+    try:
+        StateStore()
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
+
+class ThreadRecordingStore(SQLiteStateStore):
+    """Records the thread each storage call runs on."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = []
+
+    def _read(self, session_id):
+        self.threads.append(threading.get_ident())
+        return super()._read(session_id)
+
+    def _write(self, session_id, raw):
+        self.threads.append(threading.get_ident())
+        return super()._write(session_id, raw)
+
+    def delete(self, session_id):
+        self.threads.append(threading.get_ident())
+        return super().delete(session_id)
+
+def test_sqlite_store_keeps_its_io_off_the_event_loop():
+    with tempfile.TemporaryDirectory() as directory:
+        store = ThreadRecordingStore(os.path.join(directory, "sessions.db"), catalog=make_catalog())
+
+        async def session():
+            await store.asave("s1", STATE)
+            state = await store.aload("s1")
+            await store.adelete("s1")
+            return state, await store.aload("s1"), threading.get_ident()
+
+        state, deleted, loop_thread = asyncio.run(session())
+        assert (state, deleted) == (STATE, {})
+        assert len(store.threads) == 4 and loop_thread not in store.threads
+
+if __name__ == "__main__":
+    test_recommendations_stored_as_ids()
+    test_memory_store_evicts_lru_and_expires()
+    test_memory_store_byte_cap()
+    test_sqlite_store_is_shared_between_instances()
+    test_cold_catalog_is_loaded_before_expanding()
+    test_sqlite_store_keeps_its_io_off_the_event_loop()
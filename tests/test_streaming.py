@@ -0,0 +1,102 @@
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.extraction import REPLY_MARKER
+from agents.llm_client import GroqClient, LLMError, iter_sse_deltas
+from agents.streaming import ReplyStream
+
+class FakeSSEHandler(BaseHTTPRequestHandler):
+    # Deltas sent one chunked event at a time, with ``delay`` seconds between them
+    protocol_version = "HTTP/1.1"
+    deltas = []
+    delay = 0.0
+    status = 200
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        assert request["stream"] is True
+        self.send_response(self.status)
+        if self.status != 200:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for delta in self.deltas:
+            chunk = {"choices": [{"delta": {"content": delta}}]}
+            self.send_chunk(f"data: {json.dumps(chunk)}\n\n")
+            time.sleep(self.delay)
+        self.send_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def send_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+def start_server(deltas, delay=0.0, status=200):
+    handler = type("Handler", (FakeSSEHandler,), {"deltas": deltas, "delay": delay, "status": status})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/openai/v1/chat/completions"
+
+EXTRACTION = {"intent": "restaurants", "city": "Mumbai", "cuisine": "Italian",
+              "restaurant_name": None, "date": None, "time": None, "num_people": None}
+
+def test_reply_streams_before_completion():
+    # The marker is split across events so it must never leak into the visible text
+    deltas = ["Sure, ", "looking for ", "Italian in Mumbai.", "\n<<<DA", "TA>>>\n", json.dumps(EXTRACTION)]
+    server, url = start_server(deltas, delay=0.05)
+    try:
+        client = GroqClient("test-key", api_url=url)
+        start = time.perf_counter()
+        reply = ReplyStream(client.stream({"model": "m", "messages": []}))
+        chunks = iter(reply)
+        first = next(chunks)
+        first_token_at = time.perf_counter() - start
+        rest = list(chunks)
+        assert first == "Sure,"
+        assert "".join([first] + rest) == reply.text == "Sure, looking for Italian in Mumbai."
+        assert REPLY_MARKER not in reply.text
+        assert reply.result["intent"] == "restaurants" and reply.result["city"] == "Mumbai"
+        # Six events 50ms apart: the first token arrives long before the stream ends
+        assert first_token_at < reply.total_time / 2
+    finally:
+        server.shutdown()
+
+def test_stream_error_is_reported():
+    server, url = start_server([], status=400)
+    try:
+        client = GroqClient("test-key", api_url=url, max_retries=0)
+        reply = ReplyStream(client.stream({"model": "m", "messages": []}))
+        assert list(reply) == []
+        assert isinstance(reply.error, LLMError)
+        assert reply.result is None
+    finally:
+        server.shutdown()
+
+def test_iter_sse_deltas():
+    lines = [": keep-alive", "", 'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+             'data: {"choices": [{"delta": {"content": "Hi"}}]}', "data: [DONE]",
+             'data: {"choices": [{"delta": {"content": "ignored"}}]}']
+    assert list(iter_sse_deltas(lines)) == ["Hi"]
+    try:
+        list(iter_sse_deltas(['data: {"error": {"message": "overloaded"}}']))
+        assert False, "Expected LLMError"
+    except LLMError:
+        pass
+
+if __name__ == "__main__":
+    test_reply_streams_before_completion()
+    test_stream_error_is_reported()
+    test_iter_sse_deltas()
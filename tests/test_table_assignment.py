@@ -0,0 +1,46 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from agents.availability import DayOccupancy, slot_range
+from agents.table_assignment import make_policy
+
+def make_floor():
+    # Table 1 seats 8, table 2 seats 2, tables 3 and 4 seat 4; open 12:00-23:00, 90 minute meals
+    occupancy = DayOccupancy([1, 2, 3, 4], [8, 2, 4, 4], [True] * 4, 12 * 60, 23 * 60, 6, 0)
+    # Table 3 is booked 18:00-19:30, table 4 is booked 20:30-22:00
+    occupancy.mark(3, *slot_range(18 * 60, 90))
+    occupancy.mark(4, *slot_range(20 * 60 + 30, 90))
+    return occupancy
+
+def ranked_ids(name, occupancy, minute, party):
+    first, last = slot_range(minute, 90)
+    free = occupancy.free_tables(first, last, party)
+    rows = make_policy(name, 6).rank(occupancy, free, first, last, party)
+    return [int(occupancy.table_ids[r]) for r in rows]
+
+def test_first_and_smallest():
+    occupancy = make_floor()
+    assert ranked_ids("first", occupancy, 12 * 60, 2) == [1, 2, 3, 4]
+    assert ranked_ids("smallest", occupancy, 12 * 60, 2) == [2, 3, 4, 1]
+
+def test_lookahead_fills_gaps_exactly():
+    occupancy = make_floor()
+    # 19:30 starts exactly when table 3 frees up, leaving no gap; table 4 clashes at 20:30
+    assert ranked_ids("lookahead", occupancy, 19 * 60 + 30, 3) == [3, 1]
+    # 16:00-17:30 on table 3 strands a 30 minute gap before its 18:00 booking,
+    # so the otherwise equal table 4 is preferred
+    assert ranked_ids("lookahead", occupancy, 16 * 60, 4) == [4, 3, 1]
+    assert ranked_ids("smallest", occupancy, 16 * 60, 4) == [3, 4, 1]
+
+def test_unknown_policy():
+    try:
+        make_policy("random", 6)
+        assert False, "Expected ValueError"
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    test_first_and_smallest()
+    test_lookahead_fills_gaps_exactly()
+    test_unknown_policy()